@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router, transaction
+
+from rest_framework import exceptions
+from rest_framework_expiring_authtoken.authentication import ExpiringTokenAuthentication
+from rest_framework_expiring_authtoken.models import ExpiringToken
+
+# tokens are invalidated when they are saved or deleted, the timeout only bounds stale memory
+AUTH_TOKEN_CACHE_TIMEOUT = 5 * 60
+
+# unknown keys are remembered for less time, a token could be created for them
+INVALID_AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+# the fields of the user cached along with a token, which the permission checks and most views read,
+# in the order of the model's fields as `Model.from_db` expects them. The other fields, like the password,
+# are only loaded from the database when they are used
+AUTH_USER_FIELDS = ('id', 'is_superuser', 'username', 'first_name', 'last_name', 'email', 'is_staff', 'is_active')
+
+
+def get_auth_token_cache_key(key):
+    return 'auth_token_user_{}'.format(key)
+
+
+def invalidate_cached_auth_token(key):
+    """
+    Removes a cached token, again once the transaction commits so that a token read before
+    the commit is not served afterwards
+    """
+    cache_key = get_auth_token_cache_key(key)
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
+
+
+class CachedExpiringTokenAuthentication(ExpiringTokenAuthentication):
+    """
+    Expiring token authentication which caches the creation time of a token with the `AUTH_USER_FIELDS`
+    of its user, and whether a key is invalid. The user is built from the cached fields, so that a request
+    is authenticated and checked for permissions without any query once they are cached.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_auth_token_cache_key(key)
+        cached_token = cache.get(cache_key)
+        if cached_token is None:
+            try:
+                token = self.model.objects.select_related('user').get(key=key)
+            except self.model.DoesNotExist:
+                cache.set(cache_key, False, INVALID_AUTH_TOKEN_CACHE_TIMEOUT)
+                raise exceptions.AuthenticationFailed('Invalid token')
+            cached_token = (token.created, [getattr(token.user, field_name) for field_name in AUTH_USER_FIELDS])
+            cache.set(cache_key, cached_token, AUTH_TOKEN_CACHE_TIMEOUT)
+
+        if cached_token is False:
+            raise exceptions.AuthenticationFailed('Invalid token')
+
+        created, user_values = cached_token
+        # the fields which are not cached are deferred, and left out when the user is saved
+        user = User.from_db(router.db_for_read(User), AUTH_USER_FIELDS, user_values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted')
+
+        token = ExpiringToken(key=key, user=user, created=created)
+
+        if token.expired():
+            raise exceptions.AuthenticationFailed('Token has expired')
+
+        return (user, token)
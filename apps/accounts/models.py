@@ -1,12 +1,18 @@
 from __future__ import unicode_literals
 
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
 
+from allauth.account.models import EmailAddress
+from allauth.account.signals import email_confirmed
+from rest_framework.authtoken.models import Token
+
 from base.models import (TimeStampedModel,)
 
+from .utils import invalidate_verified_email
+
 
 class UserStatus(TimeStampedModel):
     """
@@ -78,3 +84,35 @@ class Profile(TimeStampedModel):
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+
+@receiver(email_confirmed)
+def invalidate_verified_email_on_confirmation(sender, email_address, **kwargs):
+    invalidate_verified_email(email_address.user_id)
+
+
+@receiver(post_save, sender=EmailAddress)
+@receiver(post_delete, sender=EmailAddress)
+def invalidate_verified_email_on_change(sender, instance, **kwargs):
+    invalidate_verified_email(instance.user_id)
+
+
+@receiver(post_save, sender='authtoken.Token')
+@receiver(post_delete, sender='authtoken.Token')
+@receiver(post_save, sender='rest_framework_expiring_authtoken.ExpiringToken')
+@receiver(post_delete, sender='rest_framework_expiring_authtoken.ExpiringToken')
+def invalidate_cached_auth_token_on_change(sender, instance, **kwargs):
+    from .authentication import invalidate_cached_auth_token
+
+    invalidate_cached_auth_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_auth_tokens_on_user_change(sender, instance, update_fields=None, **kwargs):
+    """The cached tokens of a user hold some of its fields, the tokens of a deleted user are deleted"""
+    from .authentication import AUTH_USER_FIELDS, invalidate_cached_auth_token
+
+    if update_fields is not None and not set(update_fields) & set(AUTH_USER_FIELDS):
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_cached_auth_token(key)
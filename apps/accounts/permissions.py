@@ -1,6 +1,7 @@
-from allauth.account.models import EmailAddress
 from rest_framework import permissions
 
+from .utils import has_verified_email
+
 
 class HasVerifiedEmail(permissions.BasePermission):
     """
@@ -14,7 +15,7 @@ class HasVerifiedEmail(permissions.BasePermission):
         if request.user.is_anonymous:
             return True
         else:
-            if EmailAddress.objects.filter(user=request.user, verified=True).exists():
+            if has_verified_email(request.user):
                 return True
             else:
                 return False
@@ -0,0 +1,30 @@
+from allauth.account.models import EmailAddress
+from django.core.cache import cache
+from django.db import transaction
+
+# the cached flags are invalidated when an email address changes, the timeout only bounds stale memory
+VERIFIED_EMAIL_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_verified_email_cache_key(user_id):
+    return 'user_has_verified_email_{}'.format(user_id)
+
+
+def has_verified_email(user):
+    """Returns whether the user has verified one of their email addresses, caching the answer"""
+    cache_key = get_verified_email_cache_key(user.pk)
+    verified = cache.get(cache_key)
+    if verified is None:
+        verified = EmailAddress.objects.filter(user=user, verified=True).exists()
+        cache.set(cache_key, verified, VERIFIED_EMAIL_CACHE_TIMEOUT)
+    return verified
+
+
+def invalidate_verified_email(user_id):
+    """
+    Removes the cached verified email flag of a user, again once the transaction commits so that
+    a flag read before the commit is not served afterwards
+    """
+    cache_key = get_verified_email_cache_key(user_id)
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
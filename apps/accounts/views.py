@@ -5,12 +5,13 @@ from rest_framework import permissions, status
 from rest_framework.decorators import (api_view,
                                        authentication_classes,
                                        permission_classes,)
-from rest_framework_expiring_authtoken.authentication import (ExpiringTokenAuthentication,)
+
+from .authentication import CachedExpiringTokenAuthentication
 
 
 @api_view(['POST'])
 @permission_classes((permissions.IsAuthenticated,))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def disable_user(request):
 
     user = request.user
@@ -0,0 +1,77 @@
+from django.conf import settings
+
+from rest_framework import throttling
+
+try:
+    from datadog import statsd
+except ImportError:
+    # datadog is only installed where metrics are reported
+    statsd = None
+
+
+class FixedWindowRateThrottleMixin(object):
+    """
+    Counts the requests of every window of the throttle duration with an atomic increment of a cached
+    counter, instead of reading and writing the list of request times like `SimpleRateThrottle`.
+    It costs one round trip to the cache per request whatever the rate is, but allows up to twice the rate
+    across the boundary between two windows.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        window = int(self.timer() // self.duration)
+        self.window_end = (window + 1) * self.duration
+        count = self.increment_count('{}_{}'.format(self.key, window))
+        if count is None or count <= self.num_requests:
+            return True
+
+        self.report_throttled_request(request)
+        return False
+
+    def increment_count(self, key):
+        """
+        Increments the count cached under `key` in one round trip to the cache once it exists, creating it
+        with a count of 1 otherwise. Returns None if the count keeps disappearing, which lets the request through.
+        """
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            if self.cache.add(key, 1, self.duration):
+                return 1
+        # another request created the count in the meantime
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            return None
+
+    def wait(self):
+        return max(self.window_end - self.timer(), 0)
+
+    def report_throttled_request(self, request):
+        app_name = getattr(settings, 'DATADOG_APP_NAME', None)
+        if statsd is None or app_name is None:
+            return
+        tags = ['path:{0}'.format(request.path), 'scope:{0}'.format(self.scope)]
+        statsd.increment('{0}.no_of_throttled_requests_metric'.format(app_name), tags=tags)
+
+
+class AnonRateThrottle(FixedWindowRateThrottleMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(FixedWindowRateThrottleMixin, throttling.UserRateThrottle):
+    pass
+
+
+class SubmissionUploadRateThrottle(UserRateThrottle):
+    """
+    Throttles the chunks of resumable submission uploads apart from the other requests of a user,
+    so that a large upload does not use up the rate of the whole API.
+    """
+    scope = 'submission_upload'
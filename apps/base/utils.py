@@ -1,18 +1,54 @@
 import os
+import time
 import uuid
 
+from collections import OrderedDict
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils.deconstruct import deconstructible
 
 from rest_framework.exceptions import NotFound
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination which seeks to the position of the first ordering field of the
+    last row instead of using an offset, so that deep pages cost as much as the first one.
+    The total count is only computed when asked for with `?count=true`.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get('count') in ('true', '1'):
+            self.count = queryset.count()
+        return super(KeysetPagination, self).paginate_queryset(queryset, request, view)
 
+    def get_paginated_response(self, data):
+        response_data = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+        if self.count is not None:
+            response_data['count'] = self.count
+        return Response(response_data)
 
-def paginated_queryset(queryset, request):
+
+def paginated_queryset(queryset, request, cursor_ordering=None):
     '''
-        Return a paginated result for a queryset
+        Return a paginated result for a queryset.
+        When `cursor_ordering` is given, the client can ask for keyset pagination on it
+        with `?pagination=cursor`. Its first field should be unique, or nearly so.
     '''
-    paginator = PageNumberPagination()
+    if cursor_ordering and request.query_params.get('pagination') == 'cursor':
+        paginator = KeysetPagination()
+        paginator.ordering = cursor_ordering
+    else:
+        paginator = PageNumberPagination()
     paginator.page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
     result_page = paginator.paginate_queryset(queryset, request)
     return (paginator, result_page)
@@ -25,13 +61,14 @@ class RandomFileName(object):
 
     def __call__(self, instance, filename):
         extension = os.path.splitext(filename)[1]
-        if 'id' in self.path and instance.pk:
-            self.path = self.path.format(id=instance.pk)
-        elif 'id' not in self.path and instance.pk:
+        path = self.path
+        if 'id' in path and instance.pk:
+            path = path.format(id=instance.pk)
+        elif 'id' not in path and instance.pk:
             path = "submission_files/submission_{id}"
-            self.path = path.format(id=instance.pk)
+            path = path.format(id=instance.pk)
         filename = '{}{}'.format(uuid.uuid4(), extension)
-        filename = os.path.join(self.path, filename)
+        filename = os.path.join(path, filename)
         return filename
 
 
@@ -44,3 +81,112 @@ def get_model_object(model_name):
             raise NotFound('{} {} does not exist'.format(model_name.__name__, pk))
     get_model_by_pk.__name__ = 'get_{}_object'.format(model_name.__name__.lower())
     return get_model_by_pk
+
+
+def get_cache_version(version_key):
+    """
+    Returns the current version of a group of cached values, initialising it if it is missing.
+    It is initialised from the current time so that values cached under a version which has
+    been evicted are not served again.
+    """
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, int(time.time() * 1000), None)
+        version = cache.get(version_key, int(time.time() * 1000))
+    return version
+
+
+def get_cache_versions(version_keys):
+    """Returns the current versions of several groups of cached values in one round trip to the cache"""
+    versions = cache.get_many(version_keys)
+    for version_key in version_keys:
+        if version_key not in versions:
+            versions[version_key] = get_cache_version(version_key)
+    return versions
+
+
+def bump_cache_version(version_key):
+    """Invalidates all the values cached under the current version of a group"""
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # the version is not cached, start again from a fresh one
+        cache.set(version_key, int(time.time() * 1000), None)
+
+
+def get_or_compute_cached(key, compute, timeout, lock_timeout=10, wait_timeout=2, wait_interval=0.05):
+    """
+    Returns the value cached under `key`, calling `compute` to fill it on a miss.
+    `timeout` can also be a function returning it, which is only called on a miss.
+    Only one caller computes a missing value at a time, the others wait up to
+    `wait_timeout` seconds for it to be cached before computing it themselves.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = '{}_lock'.format(key)
+    waited = 0
+    while not cache.add(lock_key, 1, lock_timeout):
+        if waited >= wait_timeout:
+            return compute()
+        time.sleep(wait_interval)
+        waited += wait_interval
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    try:
+        # the value could have been cached while waiting for the lock
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, timeout() if callable(timeout) else timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+# cached objects are invalidated when they are saved or deleted, the timeout only bounds stale memory
+MODEL_OBJECT_CACHE_TIMEOUT = 60 * 60
+
+
+def get_model_object_cache_key(model, pk):
+    return 'model_object_{}_{}'.format(model._meta.label_lower, pk)
+
+
+def get_cached_model_object(request, model, pk, **field_values):
+    """
+    Returns the object of a model with the given pk, from the objects already looked up while serving
+    the request, then from the cache, then from the database. Only use it for models whose cached objects
+    are invalidated with `invalidate_cached_model_object`.
+    Raises `model.DoesNotExist` when there is no such object or it does not have the given field values.
+    """
+    cache_key = get_model_object_cache_key(model, pk)
+    model_objects = getattr(request, '_model_objects', None)
+    if model_objects is None:
+        model_objects = {}
+        if request is not None:
+            request._model_objects = model_objects
+
+    if cache_key not in model_objects:
+        model_object = cache.get(cache_key)
+        if model_object is None:
+            model_object = model.objects.get(pk=pk)
+            cache.set(cache_key, model_object, MODEL_OBJECT_CACHE_TIMEOUT)
+        model_objects[cache_key] = model_object
+
+    model_object = model_objects[cache_key]
+    if any(getattr(model_object, field_name) != value for field_name, value in field_values.items()):
+        raise model.DoesNotExist('{} matching query does not exist.'.format(model._meta.object_name))
+    return model_object
+
+
+def invalidate_cached_model_object(sender, instance, **kwargs):
+    """
+    Receiver removing a saved or deleted object from the cache, again once the transaction commits
+    so that an object read before the commit is not served afterwards
+    """
+    cache_key = get_model_object_cache_key(sender, instance.pk)
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.contrib.postgres.search import SearchQuery
 
 from base.admin import TimeStampedAdmin
 
@@ -8,7 +9,10 @@ from .models import (Challenge,
                      ChallengePhaseSplit,
                      DatasetSplit,
                      Leaderboard,
-                     LeaderboardData,)
+                     LeaderboardData,
+                     LeaderboardEntry,)
+
+from .utils import CHALLENGE_SEARCH_CONFIG
 
 from import_export.admin import ImportExportModelAdmin
 
@@ -17,7 +21,13 @@ from import_export.admin import ImportExportModelAdmin
 class ChallengeAdmin(TimeStampedAdmin, ImportExportModelAdmin):
     list_display = ("title", "start_date", "end_date", "creator", "published", "enable_forum", "anonymous_leaderboard")
     list_filter = ("creator", "published", "enable_forum", "anonymous_leaderboard")
-    search_fields = ("title", "creator")
+    search_fields = ("title",)
+    exclude = ("search_vector",)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return queryset.filter(search_vector=SearchQuery(search_term, config=CHALLENGE_SEARCH_CONFIG)), False
 
 
 @admin.register(DatasetSplit)
@@ -54,6 +64,13 @@ class LeaderboardDataAdmin(TimeStampedAdmin, ImportExportModelAdmin):
     search_fields = ("challenge_phase_split", "submission", "leaderboard", "result")
 
 
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(TimeStampedAdmin):
+    list_display = ("challenge_phase_split", "participant_team", "leaderboard_data", "score", "rank")
+    list_filter = ("challenge_phase_split",)
+    raw_id_fields = ("leaderboard_data",)
+
+
 @admin.register(ChallengeConfiguration)
 class ChallengeConfigurationAdmin(TimeStampedAdmin, ImportExportModelAdmin):
     list_display = ('user', 'challenge', 'is_created', 'zip_configuration',)
@@ -0,0 +1,29 @@
+from django.core.management import BaseCommand
+
+from challenges.models import ChallengePhaseSplit
+from challenges.utils import get_aggregate, rebuild_aggregate_leaderboard_data, rebuild_leaderboard_entries
+
+
+class Command(BaseCommand):
+
+    help = "Recreates the ranked leaderboard entries of challenge phase splits from their leaderboard data, " \
+           "recomputing the leaderboard data of the splits aggregating other ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('challenge_phase_split_ids', nargs='*', type=int,
+                            help='Challenge phase splits to rebuild, all of them if none are given')
+
+    def handle(self, *args, **options):
+        challenge_phase_splits = ChallengePhaseSplit.objects.select_related('leaderboard')
+        if options['challenge_phase_split_ids']:
+            challenge_phase_splits = challenge_phase_splits.filter(pk__in=options['challenge_phase_split_ids'])
+
+        count = 0
+        for challenge_phase_split in challenge_phase_splits:
+            if get_aggregate(challenge_phase_split.leaderboard):
+                rebuild_aggregate_leaderboard_data(challenge_phase_split)
+            else:
+                rebuild_leaderboard_entries(challenge_phase_split)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            'Rebuilt the leaderboard entries of {} challenge phase splits.'.format(count)))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from challenges.models import ChallengePhaseSplit
+from challenges.utils import take_leaderboard_snapshot
+
+
+class Command(BaseCommand):
+
+    help = "Records the rankings of the leaderboards which changed since their last snapshot. " \
+           "Meant to be run periodically, e.g. hourly from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', default=False,
+                            help='Also snapshot the leaderboards of challenges which ended more than a day ago')
+
+    def handle(self, *args, **options):
+        challenge_phase_splits = ChallengePhaseSplit.objects.all()
+        if not options['all']:
+            challenge_phase_splits = challenge_phase_splits.filter(
+                challenge_phase__challenge__end_date__gte=timezone.now() - timedelta(days=1))
+
+        count = 0
+        for challenge_phase_split in challenge_phase_splits:
+            if take_leaderboard_snapshot(challenge_phase_split):
+                count += 1
+        self.stdout.write(self.style.SUCCESS('Took {} leaderboard snapshots.'.format(count)))
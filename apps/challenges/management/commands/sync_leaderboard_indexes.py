@@ -0,0 +1,22 @@
+from django.core.management import BaseCommand
+
+from challenges.utils import sync_leaderboard_data_indexes, sync_leaderboard_entry_indexes
+
+
+class Command(BaseCommand):
+
+    help = "Creates the indexes ranking the leaderboard data on the default order by key of every leaderboard " \
+           "and the leaderboard entries on every label, and drops the ones which are not used anymore."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leaderboard', type=int, default=None,
+                            help='Only sync the leaderboard data indexes of this leaderboard')
+
+    def handle(self, *args, **options):
+        created_indexes, dropped_indexes = sync_leaderboard_data_indexes(options['leaderboard'])
+        self.stdout.write(self.style.SUCCESS('Created {} and dropped {} leaderboard data indexes.'.format(
+            len(created_indexes), len(dropped_indexes))))
+
+        created_indexes, dropped_indexes = sync_leaderboard_entry_indexes()
+        self.stdout.write(self.style.SUCCESS('Created {} and dropped {} leaderboard entry indexes.'.format(
+            len(created_indexes), len(dropped_indexes))))
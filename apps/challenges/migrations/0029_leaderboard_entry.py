@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-24 09:41
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0008_added_unique_in_team_name'),
+        ('challenges', '0028_zip_configuration_models_for_challenge_creation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('result', django.contrib.postgres.fields.jsonb.JSONField()),
+                ('score', models.FloatField(null=True)),
+                ('rank', models.PositiveIntegerField(null=True)),
+                ('challenge_phase_split', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='challenges.ChallengePhaseSplit')),
+                ('leaderboard_data', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='challenges.LeaderboardData')),
+                ('participant_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='participants.ParticipantTeam')),
+            ],
+            options={
+                'db_table': 'leaderboard_entry',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardentry',
+            unique_together=set([('challenge_phase_split', 'participant_team')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='leaderboardentry',
+            index_together=set([('challenge_phase_split', 'rank')]),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-25 11:08
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0029_leaderboard_entry'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX leaderboard_data_result_gin ON leaderboard_data USING gin (result)',
+            reverse_sql='DROP INDEX leaderboard_data_result_gin',
+        ),
+    ]
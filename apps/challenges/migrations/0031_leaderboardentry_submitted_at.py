@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-26 14:22
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_content_addressed_submission_files'),
+        ('challenges', '0030_leaderboard_data_result_gin_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(
+            '''
+            UPDATE leaderboard_entry SET submitted_at = submission.submitted_at
+            FROM leaderboard_data
+            INNER JOIN submission ON submission.id = leaderboard_data.submission_id
+            WHERE leaderboard_data.id = leaderboard_entry.leaderboard_data_id
+            ''',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
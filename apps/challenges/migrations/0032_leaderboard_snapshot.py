@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-28 08:35
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0031_leaderboardentry_submitted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('is_keyframe', models.BooleanField(default=False)),
+                ('ranks', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), size=None)),
+                ('challenge_phase_split', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_snapshots', to='challenges.ChallengePhaseSplit')),
+            ],
+            options={
+                'db_table': 'leaderboard_snapshot',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='leaderboardsnapshot',
+            index_together=set([('challenge_phase_split', 'created_at')]),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-30 09:12
+from __future__ import unicode_literals
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0032_leaderboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(null=True),
+        ),
+        migrations.RunSQL(
+            "UPDATE challenge SET search_vector = "
+            "setweight(to_tsvector('english', COALESCE(title, '')), 'A') || "
+            "setweight(to_tsvector('english', COALESCE(short_description, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(description, '')), 'C')",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX challenge_search_vector_gin ON challenge USING gin (search_vector)',
+            reverse_sql='DROP INDEX challenge_search_vector_gin',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0033_challenge_search_vector'),
+    ]
+
+    operations = [
+        # the score of a result on a key, null when its value is not a number instead of failing the cast
+        migrations.RunSQL(
+            r"""
+            CREATE OR REPLACE FUNCTION leaderboard_score(jsonb, text) RETURNS double precision AS $$
+                SELECT CASE WHEN $1->>$2 ~ '^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$'
+                    THEN ($1->>$2)::double precision END
+            $$ LANGUAGE SQL IMMUTABLE
+            """,
+            reverse_sql='DROP FUNCTION leaderboard_score(jsonb, text)',
+        ),
+        # the indexes on the unguarded cast make inserting a non numeric value fail, they are
+        # created again on the score by the `sync_leaderboard_indexes` command
+        migrations.RunSQL(
+            r"""
+            DO $$
+            DECLARE
+                index_name text;
+            BEGIN
+                FOR index_name IN
+                    SELECT relname FROM pg_class WHERE relkind = 'i' AND relname LIKE 'leaderboard\_data\_lb%'
+                LOOP
+                    EXECUTE 'DROP INDEX ' || quote_ident(index_name);
+                END LOOP;
+            END
+            $$
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0034_leaderboard_score_function'),
+    ]
+
+    operations = [
+        # the indexes on the unguarded cast make inserting a non numeric value fail for every leaderboard
+        # showing the label, they are created again on the score by the `sync_leaderboard_indexes` command
+        migrations.RunSQL(
+            r"""
+            DO $$
+            DECLARE
+                index_name text;
+            BEGIN
+                FOR index_name IN
+                    SELECT relname FROM pg_class WHERE relkind = 'i' AND relname LIKE 'leaderboard\_entry\_by\_%'
+                LOOP
+                    EXECUTE 'DROP INDEX ' || quote_ident(index_name);
+                END LOOP;
+            END
+            $$
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-07-08 10:21
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0035_drop_unguarded_leaderboard_entry_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='leaderboarddata',
+            name='is_aggregate',
+            field=models.BooleanField(default=False),
+        ),
+        # the data of the splits on aggregate leaderboards was only computed until now
+        migrations.RunSQL(
+            "UPDATE leaderboard_data SET is_aggregate = true FROM leaderboard "
+            "WHERE leaderboard_data.leaderboard_id = leaderboard.id "
+            "AND jsonb_typeof(leaderboard.schema -> 'aggregate') = 'object'",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
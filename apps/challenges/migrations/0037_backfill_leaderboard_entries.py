@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from challenges.utils import INSERT_MISSING_LEADERBOARD_ENTRIES_QUERY, RANK_LEADERBOARD_ENTRIES_QUERY
+
+
+def backfill_leaderboard_entries(apps, schema_editor):
+    """
+    Creates the entries of the leaderboards which had results before the entries were introduced,
+    as `repair_leaderboard_entries` does. Leaderboards which already have entries are left as they are.
+    """
+    ChallengePhaseSplit = apps.get_model('challenges', 'ChallengePhaseSplit')
+    with schema_editor.connection.cursor() as cursor:
+        for challenge_phase_split in ChallengePhaseSplit.objects.select_related('leaderboard').order_by('pk'):
+            schema = challenge_phase_split.leaderboard.schema
+            default_order_by = schema.get('default_order_by') if isinstance(schema, dict) else None
+            if not default_order_by:
+                continue
+            cursor.execute(INSERT_MISSING_LEADERBOARD_ENTRIES_QUERY, [
+                challenge_phase_split.pk, default_order_by, challenge_phase_split.pk,
+                challenge_phase_split.leaderboard_id, default_order_by, challenge_phase_split.pk])
+            cursor.execute(RANK_LEADERBOARD_ENTRIES_QUERY, [challenge_phase_split.pk])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0036_leaderboarddata_is_aggregate'),
+        ('jobs', '0007_content_addressed_submission_files'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_leaderboard_entries, reverse_code=migrations.RunPython.noop),
+    ]
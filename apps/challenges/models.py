@@ -2,12 +2,13 @@ from __future__ import unicode_literals
 
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.contrib.postgres.fields import JSONField
-from django.db import models
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.db.models import signals
 
 from base.models import (TimeStampedModel, model_field_name, create_post_model_field, )
-from base.utils import RandomFileName
+from base.utils import RandomFileName, invalidate_cached_model_object
 from participants.models import (ParticipantTeam, )
 
 
@@ -43,6 +44,8 @@ class Challenge(TimeStampedModel):
         default=False, upload_to=RandomFileName("evaluation_scripts"))  # should be zip format
     approved_by_admin = models.BooleanField(
         default=False, verbose_name="Approved By Admin")
+    # maintained from the title and descriptions when the challenge is saved
+    search_vector = SearchVectorField(null=True)
 
     class Meta:
         app_label = 'challenges'
@@ -84,6 +87,32 @@ signals.post_save.connect(model_field_name(field_name='evaluation_script')(creat
                           sender=Challenge, weak=False)
 
 
+def update_challenge_search_vector(sender, instance, update_fields, **kwargs):
+    """Updates the full text search vector of a challenge from its title and descriptions"""
+    from .utils import CHALLENGE_SEARCH_FIELDS, get_challenge_search_vector
+
+    if update_fields and not set(update_fields) & set(CHALLENGE_SEARCH_FIELDS):
+        return
+    # an update so that the search vector is computed by the database and saving sends no signals
+    Challenge.objects.filter(pk=instance.pk).update(search_vector=get_challenge_search_vector())
+
+
+signals.post_save.connect(update_challenge_search_vector, sender=Challenge, weak=False)
+
+
+def invalidate_challenge_lists(sender, instance, **kwargs):
+    """Invalidates the cached challenge listings when a challenge or its host team changes"""
+    from .utils import bump_challenge_list_version
+
+    bump_challenge_list_version()
+
+
+signals.post_save.connect(invalidate_challenge_lists, sender=Challenge, weak=False)
+signals.post_delete.connect(invalidate_challenge_lists, sender=Challenge, weak=False)
+signals.post_save.connect(invalidate_challenge_lists, sender='hosts.ChallengeHostTeam', weak=False)
+signals.post_delete.connect(invalidate_challenge_lists, sender='hosts.ChallengeHostTeam', weak=False)
+
+
 class DatasetSplit(TimeStampedModel):
     name = models.CharField(max_length=100)
     codename = models.CharField(max_length=100, unique=True)
@@ -150,6 +179,11 @@ signals.post_save.connect(model_field_name(field_name='test_annotation')(create_
 
 class Leaderboard(TimeStampedModel):
 
+    def __init__(self, *args, **kwargs):
+        super(Leaderboard, self).__init__(*args, **kwargs)
+        # a deferred schema is missing from `__dict__`, reading it would cost a query per instance
+        self._original_schema = self.__dict__.get('schema')
+
     schema = JSONField()
 
     def __unicode__(self):
@@ -160,6 +194,56 @@ class Leaderboard(TimeStampedModel):
         db_table = 'leaderboard'
 
 
+def update_leaderboard_entries_on_schema_change(sender, instance, created, **kwargs):
+    """
+    Re-ranks the leaderboards of all the splits using a leaderboard and indexes its data on the new key
+    when its `default_order_by` changes, recomputes their results when its aggregate changes, and
+    invalidates their cached responses on any other change of its schema
+    """
+    # imported here since the utils module depends on the models defined above
+    from .utils import (bump_leaderboard_version,
+                        rebuild_aggregate_leaderboard_data,
+                        rebuild_leaderboard_entries,
+                        sync_leaderboard_data_indexes,
+                        sync_leaderboard_entry_indexes,)
+
+    update_fields = kwargs.get('update_fields')
+    if 'schema' not in instance.__dict__ or (update_fields is not None and 'schema' not in update_fields):
+        # the schema was not saved
+        return
+
+    original_schema = instance._original_schema if isinstance(instance._original_schema, dict) else {}
+    schema = instance.schema if isinstance(instance.schema, dict) else {}
+    order_by_changed = original_schema.get('default_order_by') != schema.get('default_order_by')
+    # indexes are built concurrently once the transaction saving the leaderboard commits
+    if created or order_by_changed:
+        transaction.on_commit(lambda: sync_leaderboard_data_indexes(instance.pk))
+    if created or original_schema.get('labels') != schema.get('labels'):
+        transaction.on_commit(sync_leaderboard_entry_indexes)
+    aggregate_changed = original_schema.get('aggregate') != schema.get('aggregate')
+    if not created and instance._original_schema != instance.schema:
+        for challenge_phase_split in instance.challengephasesplit_set.all():
+            if aggregate_changed or (order_by_changed and 'aggregate' in schema):
+                rebuild_aggregate_leaderboard_data(challenge_phase_split)
+            elif order_by_changed:
+                rebuild_leaderboard_entries(challenge_phase_split)
+            else:
+                bump_leaderboard_version(challenge_phase_split.pk)
+    instance._original_schema = instance.schema
+
+
+def drop_leaderboard_indexes(sender, instance, **kwargs):
+    from .utils import sync_leaderboard_data_indexes, sync_leaderboard_entry_indexes
+
+    leaderboard_id = instance.pk
+    transaction.on_commit(lambda: sync_leaderboard_data_indexes(leaderboard_id))
+    transaction.on_commit(sync_leaderboard_entry_indexes)
+
+
+signals.post_save.connect(update_leaderboard_entries_on_schema_change, sender=Leaderboard, weak=False)
+signals.post_delete.connect(drop_leaderboard_indexes, sender=Leaderboard, weak=False)
+
+
 class ChallengePhaseSplit(TimeStampedModel):
 
     # visibility options
@@ -173,6 +257,12 @@ class ChallengePhaseSplit(TimeStampedModel):
         (PUBLIC, 'public'),
     )
 
+    def __init__(self, *args, **kwargs):
+        super(ChallengePhaseSplit, self).__init__(*args, **kwargs)
+        # read from __dict__ so that deferred fields are not loaded one query per split
+        self._original_visibility = self.__dict__.get('visibility')
+        self._original_leaderboard_id = self.__dict__.get('leaderboard_id')
+
     challenge_phase = models.ForeignKey('ChallengePhase')
     dataset_split = models.ForeignKey('DatasetSplit')
     leaderboard = models.ForeignKey('Leaderboard')
@@ -189,12 +279,72 @@ class ChallengePhaseSplit(TimeStampedModel):
         db_table = 'challenge_phase_split'
 
 
+def update_leaderboard_entries_on_split_change(sender, instance, created, **kwargs):
+    """
+    Re-ranks the leaderboard of a challenge phase split when it is moved to another leaderboard,
+    computing its results first if it aggregates other splits, and invalidates its cached responses
+    when its visibility changes
+    """
+    from .utils import (bump_leaderboard_version,
+                        get_aggregate,
+                        rebuild_aggregate_leaderboard_data,
+                        rebuild_leaderboard_entries,)
+
+    # a deferred field which was not loaded is not saved either
+    leaderboard_changed = ('leaderboard_id' in instance.__dict__ and
+                           instance._original_leaderboard_id != instance.leaderboard_id)
+    visibility_changed = 'visibility' in instance.__dict__ and instance._original_visibility != instance.visibility
+    if created or leaderboard_changed:
+        if get_aggregate(instance.leaderboard):
+            rebuild_aggregate_leaderboard_data(instance)
+        elif not created:
+            rebuild_leaderboard_entries(instance)
+    elif visibility_changed:
+        bump_leaderboard_version(instance.pk)
+    instance._original_visibility = instance.__dict__.get('visibility')
+    instance._original_leaderboard_id = instance.__dict__.get('leaderboard_id')
+
+
+signals.post_save.connect(update_leaderboard_entries_on_split_change, sender=ChallengePhaseSplit, weak=False)
+
+
+def invalidate_challenge_bundles(sender, instance, **kwargs):
+    """Invalidates the cached bundles of the challenges which include the saved or deleted object"""
+    from .utils import bump_challenge_bundle_versions
+
+    if isinstance(instance, Challenge):
+        challenge_ids = [instance.pk]
+    elif isinstance(instance, ChallengePhase):
+        challenge_ids = [instance.challenge_id]
+    elif isinstance(instance, ChallengePhaseSplit):
+        challenge_ids = ChallengePhase.objects.filter(pk=instance.challenge_phase_id).values_list(
+            'challenge_id', flat=True)
+    elif isinstance(instance, DatasetSplit):
+        challenge_ids = ChallengePhase.objects.filter(
+            challengephasesplit__dataset_split=instance).values_list('challenge_id', flat=True)
+    else:
+        challenge_ids = Challenge.objects.filter(creator=instance).values_list('pk', flat=True)
+    bump_challenge_bundle_versions(list(challenge_ids))
+
+
+for bundle_sender in (Challenge, ChallengePhase, ChallengePhaseSplit, DatasetSplit, 'hosts.ChallengeHostTeam'):
+    signals.post_save.connect(invalidate_challenge_bundles, sender=bundle_sender, weak=False)
+    signals.post_delete.connect(invalidate_challenge_bundles, sender=bundle_sender, weak=False)
+
+# the challenges, phases and host teams looked up with `get_cached_model_object`
+for cached_sender in (Challenge, ChallengePhase, 'hosts.ChallengeHostTeam'):
+    signals.post_save.connect(invalidate_cached_model_object, sender=cached_sender, weak=False)
+    signals.post_delete.connect(invalidate_cached_model_object, sender=cached_sender, weak=False)
+
+
 class LeaderboardData(TimeStampedModel):
 
     challenge_phase_split = models.ForeignKey('ChallengePhaseSplit')
     submission = models.ForeignKey('jobs.Submission')
     leaderboard = models.ForeignKey('Leaderboard')
     result = JSONField()
+    # computed from the results of the submission on other splits, see `update_aggregate_leaderboard_data`
+    is_aggregate = models.BooleanField(default=False)
 
     def __unicode__(self):
         return '{0} : {1}'.format(self.challenge_phase_split, self.submission)
@@ -204,6 +354,77 @@ class LeaderboardData(TimeStampedModel):
         db_table = 'leaderboard_data'
 
 
+def update_leaderboard_entries_on_leaderboard_data_delete(sender, instance, **kwargs):
+    """
+    Promotes the next best results of the teams whose entry went away with the deleted LeaderboardData,
+    once for every leaderboard when the transaction deleting them commits
+    """
+    from .utils import repair_leaderboard_entries_on_commit
+
+    repair_leaderboard_entries_on_commit(instance.challenge_phase_split_id)
+
+
+signals.post_delete.connect(update_leaderboard_entries_on_leaderboard_data_delete, sender=LeaderboardData, weak=False)
+
+
+class LeaderboardEntry(TimeStampedModel):
+    """
+    Model holding the best public LeaderboardData of every participant team on a
+    challenge phase split, with its score and rank, maintained as results arrive
+    """
+    challenge_phase_split = models.ForeignKey('ChallengePhaseSplit', related_name='leaderboard_entries')
+    participant_team = models.ForeignKey(ParticipantTeam, related_name='leaderboard_entries')
+    leaderboard_data = models.ForeignKey('LeaderboardData', related_name='leaderboard_entries')
+    result = JSONField()
+    score = models.FloatField(null=True)
+    submitted_at = models.DateTimeField()
+    rank = models.PositiveIntegerField(null=True)
+
+    def __unicode__(self):
+        return '{0} : {1}'.format(self.challenge_phase_split, self.participant_team)
+
+    class Meta:
+        app_label = 'challenges'
+        db_table = 'leaderboard_entry'
+        unique_together = (('challenge_phase_split', 'participant_team'),)
+        index_together = (('challenge_phase_split', 'rank'),)
+
+
+def bump_leaderboard_versions_on_team_change(sender, instance, created, **kwargs):
+    """
+    Invalidates the cached leaderboard responses showing the name of a participant team
+    """
+    from .utils import bump_leaderboard_version
+
+    if not created:
+        challenge_phase_split_ids = LeaderboardEntry.objects.filter(
+            participant_team=instance).values_list('challenge_phase_split', flat=True)
+        for challenge_phase_split_id in challenge_phase_split_ids:
+            bump_leaderboard_version(challenge_phase_split_id)
+
+
+signals.post_save.connect(bump_leaderboard_versions_on_team_change, sender=ParticipantTeam, weak=False)
+
+
+class LeaderboardSnapshot(TimeStampedModel):
+    """
+    Model to store the ranking of the participant teams on a challenge phase split at a point in time.
+    A keyframe stores the ids of all the teams in rank order, the other snapshots store only the
+    changes since the previous one as pairs of team id and new rank, 0 meaning the team left.
+    """
+    challenge_phase_split = models.ForeignKey('ChallengePhaseSplit', related_name='leaderboard_snapshots')
+    is_keyframe = models.BooleanField(default=False)
+    ranks = ArrayField(models.PositiveIntegerField())
+
+    def __unicode__(self):
+        return '{0} : {1}'.format(self.challenge_phase_split, self.created_at)
+
+    class Meta:
+        app_label = 'challenges'
+        db_table = 'leaderboard_snapshot'
+        index_together = (('challenge_phase_split', 'created_at'),)
+
+
 class ChallengeConfiguration(TimeStampedModel):
     """
     Model to store zip file for challenge creation.
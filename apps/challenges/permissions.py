@@ -1,5 +1,8 @@
 from rest_framework import permissions
 
+from base.utils import get_cached_model_object
+from hosts.models import ChallengeHostTeam
+
 from .models import Challenge
 
 
@@ -15,11 +18,13 @@ class IsChallengeCreator(permissions.BasePermission):
             return True
         elif request.method in ['DELETE', 'PATCH', 'PUT', 'POST']:
             try:
-                challenge = Challenge.objects.get(pk=request.parser_context['kwargs']['challenge_pk'])
+                challenge = get_cached_model_object(
+                    request, Challenge, request.parser_context['kwargs']['challenge_pk'])
             except Challenge.DoesNotExist:
                 return False
 
-            if request.user.id == challenge.creator.created_by.id:
+            creator = get_cached_model_object(request, ChallengeHostTeam, challenge.creator_id)
+            if request.user.id == creator.created_by_id:
                 return True
             else:
                 return False
@@ -0,0 +1,40 @@
+import json
+import pika
+
+from django.conf import settings
+
+
+def publish_message(routing_key, message, queue=None):
+    """Publishes a persistent message on the EvalAI exchange, declaring the queue it is meant for first"""
+    connection = pika.BlockingConnection(pika.ConnectionParameters(
+        host=settings.RABBITMQ_PARAMETERS['HOST']))
+    channel = connection.channel()
+    channel.exchange_declare(
+        exchange=settings.RABBITMQ_PARAMETERS['EVALAI_EXCHANGE']['NAME'],
+        type=settings.RABBITMQ_PARAMETERS['EVALAI_EXCHANGE']['TYPE'])
+
+    # the worker declares the queue too, it is declared here so that messages
+    # published before the worker starts are not lost
+    if queue:
+        channel.queue_declare(queue=queue, durable=True)
+
+    channel.basic_publish(exchange=settings.RABBITMQ_PARAMETERS['EVALAI_EXCHANGE']['NAME'],
+                          routing_key=routing_key,
+                          body=json.dumps(message),
+                          properties=pika.BasicProperties(delivery_mode=2))    # make message persistent
+    connection.close()
+
+
+def publish_challenge_configuration_message(challenge_configuration_id, challenge_host_team_id):
+    """Asks the challenge configuration worker to create the challenge of an uploaded zip configuration"""
+    message = {
+        'challenge_configuration_id': challenge_configuration_id,
+        'challenge_host_team_id': challenge_host_team_id,
+    }
+    publish_message('challenge_configuration.*', message,
+                    queue=settings.RABBITMQ_PARAMETERS['CHALLENGE_CONFIGURATION_QUEUE'])
+
+
+def publish_challenge_message(challenge_id):
+    """Tells the submission workers to load a new challenge"""
+    publish_message('challenge.*.*', {'challenge_id': challenge_id})
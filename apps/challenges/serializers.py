@@ -1,9 +1,12 @@
+import zipfile
+
 from rest_framework import serializers
 
 from hosts.serializers import ChallengeHostTeamSerializer
 
 from .models import (
                      Challenge,
+                     ChallengeConfiguration,
                      ChallengePhase,
                      ChallengePhaseSplit,
                      DatasetSplit,)
@@ -30,6 +33,25 @@ class ChallengeSerializer(serializers.ModelSerializer):
                   'published', 'enable_forum', 'anonymous_leaderboard', 'is_active',)
 
 
+class ChallengeListSerializer(serializers.ModelSerializer):
+    """
+    Serializes challenges in listings, leaving out the large text fields which are only
+    shown on the page of a challenge and the search vector. Querysets should defer
+    `DEFERRED_FIELDS` and select `creator__created_by` along with the challenges.
+    """
+
+    DEFERRED_FIELDS = ('description', 'terms_and_conditions', 'submission_guidelines', 'evaluation_details',
+                       'search_vector',)
+
+    is_active = serializers.ReadOnlyField()
+    creator = ChallengeHostTeamSerializer()
+
+    class Meta:
+        model = Challenge
+        fields = ('id', 'title', 'short_description', 'image', 'start_date', 'end_date', 'creator',
+                  'published', 'enable_forum', 'anonymous_leaderboard', 'is_active',)
+
+
 class ChallengePhaseSerializer(serializers.ModelSerializer):
 
     is_active = serializers.ReadOnlyField()
@@ -71,3 +93,18 @@ class ChallengePhaseSplitSerializer(serializers.ModelSerializer):
 
     def get_challenge_phase_name(self, obj):
         return obj.challenge_phase.name
+
+
+class ChallengeConfigurationSerializer(serializers.ModelSerializer):
+    """Serializes the zip configurations uploaded to create challenges, and the progress of their creation"""
+
+    class Meta:
+        model = ChallengeConfiguration
+        fields = ('id', 'zip_configuration', 'is_created', 'challenge', 'stdout_file', 'stderr_file',)
+        read_only_fields = ('is_created', 'challenge', 'stdout_file', 'stderr_file',)
+
+    def validate_zip_configuration(self, zip_configuration):
+        if not zipfile.is_zipfile(zip_configuration):
+            raise serializers.ValidationError('The challenge configuration should be a zip file')
+        zip_configuration.seek(0)
+        return zip_configuration
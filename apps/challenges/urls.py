@@ -4,8 +4,13 @@ from . import views
 
 urlpatterns = [
 
+    url(r'^search$', views.search_challenges_by_text, name='search_challenges'),
     url(r'challenge_host_team/(?P<challenge_host_team_pk>[0-9]+)/challenge$', views.challenge_list,
         name='get_challenge_list'),
+    url(r'challenge_host_team/(?P<challenge_host_team_pk>[0-9]+)/zip_upload$',
+        views.create_challenge_using_zip_file, name='create_challenge_using_zip_file'),
+    url(r'challenge_configuration/(?P<pk>[0-9]+)$', views.get_challenge_configuration,
+        name='get_challenge_configuration'),
     url(r'challenge_host_team/(?P<challenge_host_team_pk>[0-9]+)/challenge/(?P<challenge_pk>[0-9]+)$',
         views.challenge_detail, name='get_challenge_detail'),
     url(r'challenge/(?P<challenge_pk>[0-9]+)/participant_team/(?P<participant_team_pk>[0-9]+)',
@@ -19,6 +24,8 @@ urlpatterns = [
     # `A-Za-z` because it accepts either of `all, future, past or present` in either case
     url(r'challenge/(?P<challenge_time>[A-Za-z]+)$', views.get_all_challenges,
         name='get_all_challenges'),
+    url(r'challenge/(?P<pk>[0-9]+)/bundle$',
+        views.get_challenge_bundle, name='get_challenge_bundle'),
     url(r'challenge/(?P<pk>[0-9]+)/',
         views.get_challenge_by_pk, name='get_challenge_by_pk'),
     url(r'challenge$', views.get_challenges_based_on_teams,
@@ -0,0 +1,796 @@
+import bisect
+import hashlib
+import operator
+import threading
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, transaction
+from django.utils import timezone
+from django.db.models import BooleanField, F, FloatField, Min
+from django.db.models.expressions import OrderBy, RawSQL
+
+from base.utils import bump_cache_version, get_cache_version, get_cache_versions
+
+from .models import (Challenge, ChallengePhase, ChallengePhaseSplit, Leaderboard, LeaderboardData, LeaderboardEntry,
+                     LeaderboardSnapshot,)
+
+# leaderboard responses are invalidated through their version, the timeout only bounds stale memory
+LEADERBOARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+# best public LeaderboardData of every participant team on a challenge phase split, the leaderboard
+# predicate lets the planner use the partial index of the leaderboard's order by key
+BEST_LEADERBOARD_DATA_QUERY = """
+    SELECT DISTINCT ON (submission.participant_team_id)
+        leaderboard_data.id AS leaderboard_data_id, submission.participant_team_id, leaderboard_data.result,
+        leaderboard_score(leaderboard_data.result, %s) AS score, submission.submitted_at
+    FROM leaderboard_data
+    INNER JOIN submission ON submission.id = leaderboard_data.submission_id
+    WHERE leaderboard_data.challenge_phase_split_id = %s AND leaderboard_data.leaderboard_id = %s
+        AND submission.is_public AND leaderboard_data.result ? %s
+    ORDER BY submission.participant_team_id, score DESC NULLS LAST, submission.submitted_at, leaderboard_data.id
+"""
+
+INSERT_LEADERBOARD_ENTRIES_QUERY = """
+    INSERT INTO leaderboard_entry (created_at, modified_at, challenge_phase_split_id, participant_team_id,
+                                   leaderboard_data_id, result, score, submitted_at)
+    SELECT NOW(), NOW(), %s, participant_team_id, leaderboard_data_id, result, score, submitted_at
+    FROM ({best_leaderboard_data_query}) AS best_leaderboard_data
+""".format(best_leaderboard_data_query=BEST_LEADERBOARD_DATA_QUERY)
+
+# entries of the participant teams which have results on a challenge phase split but no entry
+INSERT_MISSING_LEADERBOARD_ENTRIES_QUERY = """
+    {insert_leaderboard_entries_query}
+    WHERE NOT EXISTS (
+        SELECT 1 FROM leaderboard_entry
+        WHERE leaderboard_entry.challenge_phase_split_id = %s
+            AND leaderboard_entry.participant_team_id = best_leaderboard_data.participant_team_id
+    )
+""".format(insert_leaderboard_entries_query=INSERT_LEADERBOARD_ENTRIES_QUERY)
+
+RANK_LEADERBOARD_ENTRIES_QUERY = """
+    UPDATE leaderboard_entry SET rank = ranked_leaderboard_entry.rank
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC NULLS LAST, submitted_at, id) AS rank
+        FROM leaderboard_entry
+        WHERE leaderboard_entry.challenge_phase_split_id = %s
+    ) AS ranked_leaderboard_entry
+    WHERE leaderboard_entry.id = ranked_leaderboard_entry.id
+        AND leaderboard_entry.rank IS DISTINCT FROM ranked_leaderboard_entry.rank
+"""
+
+
+class NullsLastOrderBy(OrderBy):
+    template = '%(expression)s %(ordering)s NULLS LAST'
+
+
+def get_leaderboard_version_key(challenge_phase_split_id):
+    return 'leaderboard_version_{}'.format(challenge_phase_split_id)
+
+
+def get_leaderboard_version(challenge_phase_split_id):
+    """Returns the version under which the leaderboard responses of a challenge phase split are cached"""
+    return get_cache_version(get_leaderboard_version_key(challenge_phase_split_id))
+
+
+def get_leaderboard_versions(challenge_phase_split_ids):
+    """Returns the versions of the leaderboards of several challenge phase splits, by split id"""
+    versions = get_cache_versions([get_leaderboard_version_key(pk) for pk in challenge_phase_split_ids])
+    return dict((pk, versions[get_leaderboard_version_key(pk)]) for pk in challenge_phase_split_ids)
+
+
+def bump_leaderboard_version(challenge_phase_split_id):
+    """
+    Invalidates the cached leaderboard responses of a challenge phase split.
+    The version is bumped again once the transaction commits, so that a response computed
+    by a concurrent request from the data before the commit is not served afterwards.
+    """
+    version_key = get_leaderboard_version_key(challenge_phase_split_id)
+    bump_cache_version(version_key)
+    transaction.on_commit(lambda: bump_cache_version(version_key))
+
+
+# fields of the leaderboard entries read to build the leaderboard responses
+LEADERBOARD_ENTRY_FIELDS = ('leaderboard_data', 'participant_team', 'participant_team__team_name',
+                            'challenge_phase_split', 'result', 'score', 'rank')
+
+
+def only_leaderboard_entry_fields(leaderboard_entries):
+    """Reads only the fields of the leaderboard entries which are used to build the leaderboard responses"""
+    return leaderboard_entries.select_related('participant_team').only(*LEADERBOARD_ENTRY_FIELDS)
+
+
+def format_leaderboard_entry(leaderboard_entry, leaderboard):
+    """
+    Returns the leaderboard response item of an entry read with `only_leaderboard_entry_fields`,
+    with its results listed in the order of the leaderboard's labels
+    """
+    return {
+        'id': leaderboard_entry.leaderboard_data_id,
+        'submission__participant_team__team_name': leaderboard_entry.participant_team.team_name,
+        'challenge_phase_split': leaderboard_entry.challenge_phase_split_id,
+        'result': [leaderboard_entry.result[label] for label in get_leaderboard_labels(leaderboard)],
+        'filtering_score': leaderboard_entry.score,
+        'rank': leaderboard_entry.rank,
+        'leaderboard__schema': leaderboard.schema,
+    }
+
+
+def get_default_order_by(challenge_phase_split):
+    """Returns the key on which the leaderboard of a challenge phase split is ranked"""
+    schema = challenge_phase_split.leaderboard.schema
+    return schema.get('default_order_by') if isinstance(schema, dict) else None
+
+
+def lock_leaderboard(challenge_phase_split):
+    """
+    Locks the row of a challenge phase split until the end of the transaction, so that the entries on its
+    leaderboard are updated and ranked by one transaction at a time. The lock does not block the LeaderboardData
+    being inserted for the split by other transactions.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT id FROM challenge_phase_split WHERE id = %s FOR NO KEY UPDATE',
+                       [challenge_phase_split.pk])
+
+
+def rank_leaderboard_entries(challenge_phase_split):
+    """Recomputes the rank of every entry on the leaderboard of a challenge phase split"""
+    with connection.cursor() as cursor:
+        cursor.execute(RANK_LEADERBOARD_ENTRIES_QUERY, [challenge_phase_split.pk])
+
+
+def rebuild_leaderboard_entries(challenge_phase_split):
+    """Recreates all the entries on the leaderboard of a challenge phase split from its LeaderboardData"""
+    default_order_by = get_default_order_by(challenge_phase_split)
+    with transaction.atomic():
+        lock_leaderboard(challenge_phase_split)
+        LeaderboardEntry.objects.filter(challenge_phase_split=challenge_phase_split).delete()
+        if default_order_by:
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT_LEADERBOARD_ENTRIES_QUERY, [
+                    challenge_phase_split.pk, default_order_by, challenge_phase_split.pk,
+                    challenge_phase_split.leaderboard_id, default_order_by])
+            rank_leaderboard_entries(challenge_phase_split)
+        bump_leaderboard_version(challenge_phase_split.pk)
+
+
+def update_leaderboard_entry(challenge_phase_split, participant_team_id):
+    """
+    Picks the best public LeaderboardData of a participant team on a challenge phase split
+    and re-ranks the leaderboard if the entry of the team changed.
+    Returns whether the entry changed.
+    """
+    default_order_by = get_default_order_by(challenge_phase_split)
+    if not default_order_by:
+        return False
+
+    with transaction.atomic():
+        # the best result is read once the leaderboard is locked, so that it includes the results
+        # committed by the transaction which held the lock before
+        lock_leaderboard(challenge_phase_split)
+        best_leaderboard_data = LeaderboardData.objects.filter(
+            challenge_phase_split=challenge_phase_split,
+            leaderboard=challenge_phase_split.leaderboard_id,
+            submission__participant_team=participant_team_id,
+            submission__is_public=True,
+            result__has_key=default_order_by).annotate(
+            score=RawSQL('leaderboard_score(result, %s)', (default_order_by, ), output_field=FloatField()),
+            # ranks results with a null score last, as the leaderboard does
+            score_is_null=RawSQL('leaderboard_score(result, %s) IS NULL', (default_order_by, ),
+                                 output_field=BooleanField())).order_by(
+            'score_is_null', '-score', 'submission__submitted_at', 'pk').select_related('submission').first()
+
+        if best_leaderboard_data is None:
+            changed = bool(LeaderboardEntry.objects.filter(
+                challenge_phase_split=challenge_phase_split, participant_team=participant_team_id).delete()[0])
+        else:
+            leaderboard_entry, created = LeaderboardEntry.objects.select_for_update().get_or_create(
+                challenge_phase_split=challenge_phase_split,
+                participant_team_id=participant_team_id,
+                defaults={'leaderboard_data': best_leaderboard_data,
+                          'result': best_leaderboard_data.result,
+                          'score': best_leaderboard_data.score,
+                          'submitted_at': best_leaderboard_data.submission.submitted_at})
+            changed = created or leaderboard_entry.leaderboard_data_id != best_leaderboard_data.pk or \
+                leaderboard_entry.result != best_leaderboard_data.result
+            if not created and changed:
+                leaderboard_entry.leaderboard_data = best_leaderboard_data
+                leaderboard_entry.result = best_leaderboard_data.result
+                leaderboard_entry.score = best_leaderboard_data.score
+                leaderboard_entry.submitted_at = best_leaderboard_data.submission.submitted_at
+                leaderboard_entry.save()
+
+        if changed:
+            rank_leaderboard_entries(challenge_phase_split)
+            bump_leaderboard_version(challenge_phase_split.pk)
+    return changed
+
+
+def repair_leaderboard_entries(challenge_phase_split):
+    """
+    Creates the entries of the teams which lost theirs with a deleted LeaderboardData from their next
+    best result and re-ranks the leaderboard of a challenge phase split
+    """
+    default_order_by = get_default_order_by(challenge_phase_split)
+    with transaction.atomic():
+        lock_leaderboard(challenge_phase_split)
+        if default_order_by:
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT_MISSING_LEADERBOARD_ENTRIES_QUERY, [
+                    challenge_phase_split.pk, default_order_by, challenge_phase_split.pk,
+                    challenge_phase_split.leaderboard_id, default_order_by, challenge_phase_split.pk])
+            rank_leaderboard_entries(challenge_phase_split)
+        bump_leaderboard_version(challenge_phase_split.pk)
+
+
+# ids of the challenge phase splits whose leaderboard is to be repaired when the current transaction commits
+_pending_leaderboard_repairs = threading.local()
+
+
+def repair_leaderboard_entries_on_commit(challenge_phase_split_id):
+    """
+    Repairs the leaderboard of a challenge phase split once the current transaction commits,
+    only once however many of its LeaderboardData the transaction deleted
+    """
+    if not hasattr(_pending_leaderboard_repairs, 'challenge_phase_split_ids'):
+        _pending_leaderboard_repairs.challenge_phase_split_ids = set()
+    _pending_leaderboard_repairs.challenge_phase_split_ids.add(challenge_phase_split_id)
+
+    def repair():
+        # the first callback of the transaction repairs the leaderboard, the others find it done
+        if challenge_phase_split_id not in _pending_leaderboard_repairs.challenge_phase_split_ids:
+            return
+        _pending_leaderboard_repairs.challenge_phase_split_ids.discard(challenge_phase_split_id)
+        challenge_phase_split = ChallengePhaseSplit.objects.select_related('leaderboard').filter(
+            pk=challenge_phase_split_id).first()
+        if challenge_phase_split is not None:
+            repair_leaderboard_entries(challenge_phase_split)
+
+    transaction.on_commit(repair)
+
+
+def update_leaderboard_entries_for_submission(submission):
+    """Updates the entries of the submission's team on every challenge phase split it has results for"""
+    leaderboard_data = LeaderboardData.objects.filter(submission=submission).select_related(
+        'challenge_phase_split__leaderboard')
+    # the leaderboards are locked in the same order by every transaction updating several of them
+    challenge_phase_splits = set(data.challenge_phase_split for data in leaderboard_data)
+    for challenge_phase_split in sorted(challenge_phase_splits, key=operator.attrgetter('pk')):
+        update_leaderboard_entry(challenge_phase_split, submission.participant_team_id)
+
+
+LEADERBOARD_DATA_INDEX_PREFIX = 'leaderboard_data_lb'
+
+
+def get_leaderboard_data_index_name(leaderboard_id, order_by):
+    """Name of the index ranking the LeaderboardData of a leaderboard on an order by key"""
+    return '{}{}_{}'.format(
+        LEADERBOARD_DATA_INDEX_PREFIX, leaderboard_id, hashlib.md5(order_by.encode('utf-8')).hexdigest()[:8])
+
+
+def index_exists(cursor, index_name):
+    """Returns if an index exists, `CREATE INDEX IF NOT EXISTS` needs Postgres 9.5"""
+    cursor.execute("SELECT 1 FROM pg_class WHERE relname = %s AND relkind = 'i'", [index_name])
+    return cursor.fetchone() is not None
+
+
+def sync_leaderboard_data_indexes(leaderboard_id=None):
+    """
+    Creates a partial expression index on `(challenge_phase_split_id, leaderboard_score(result, '<key>'))`
+    for the `default_order_by` key of every leaderboard, or of the given one, and drops the
+    indexes of the keys and leaderboards which are not used anymore.
+    Outside of a transaction the indexes are built concurrently, without locking the table.
+    Returns the names of the created and dropped indexes.
+    """
+    leaderboards = Leaderboard.objects.all()
+    existing_index_pattern = '{}%'.format(LEADERBOARD_DATA_INDEX_PREFIX)
+    if leaderboard_id is not None:
+        leaderboards = leaderboards.filter(pk=leaderboard_id)
+        existing_index_pattern = '{}{}\\_%'.format(LEADERBOARD_DATA_INDEX_PREFIX, leaderboard_id)
+
+    wanted_indexes = {}
+    for leaderboard in leaderboards:
+        order_by = leaderboard.schema.get('default_order_by') if isinstance(leaderboard.schema, dict) else None
+        if order_by:
+            wanted_indexes[get_leaderboard_data_index_name(leaderboard.pk, order_by)] = (leaderboard.pk, order_by)
+
+    concurrently = '' if connection.in_atomic_block else 'CONCURRENTLY'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'leaderboard_data' AND indexname LIKE %s",
+            [existing_index_pattern])
+        existing_indexes = set(row[0] for row in cursor.fetchall())
+
+        stale_indexes = existing_indexes - set(wanted_indexes)
+        for index_name in stale_indexes:
+            cursor.execute('DROP INDEX {} IF EXISTS {}'.format(concurrently, index_name))
+
+        missing_indexes = set(wanted_indexes) - existing_indexes
+        for index_name in missing_indexes:
+            # the index could have been created by a concurrent sync in the meantime
+            if index_exists(cursor, index_name):
+                continue
+            leaderboard_pk, order_by = wanted_indexes[index_name]
+            cursor.execute(
+                'CREATE INDEX {} {} ON leaderboard_data '
+                '(challenge_phase_split_id, leaderboard_score(result, %s)) WHERE leaderboard_id = %s'.format(
+                    concurrently, index_name),
+                [order_by, leaderboard_pk])
+    return missing_indexes, stale_indexes
+
+
+LEADERBOARD_ENTRY_INDEX_PREFIX = 'leaderboard_entry_by_'
+
+SORT_DIRECTIONS = ('asc', 'desc')
+
+
+def get_leaderboard_labels(leaderboard):
+    """Returns the keys of the results shown on a leaderboard"""
+    schema = leaderboard.schema if isinstance(leaderboard.schema, dict) else {}
+    return [label.lower() for label in schema.get('labels', [])]
+
+
+def get_leaderboard_entry_ordering(order_by, direction):
+    """
+    Orders leaderboard entries on a key of their results, in the given direction with
+    missing and non numeric values last, breaking ties by submission time.
+    The entries hold the best result of every team on the default order by key, so it is
+    that result which is ordered, not the best result of the team on the given key.
+    """
+    score = RawSQL('leaderboard_score(result, %s)', (order_by, ), output_field=FloatField())
+    return [NullsLastOrderBy(score, descending=direction == 'desc'), 'submitted_at', 'id']
+
+
+def get_leaderboard_entry_index_name(order_by, direction):
+    """Name of the index ordering the leaderboard entries of a split on a key in a direction"""
+    return '{}{}_{}'.format(
+        LEADERBOARD_ENTRY_INDEX_PREFIX, hashlib.md5(order_by.encode('utf-8')).hexdigest()[:8], direction)
+
+
+def sync_leaderboard_entry_indexes():
+    """
+    Creates an expression index on `(challenge_phase_split_id, leaderboard_score(result, '<label>'), submitted_at,
+    id)` in both directions for every label shown on a leaderboard, so that the entries of a split can be
+    ranked on any of them, and drops the indexes of the labels which are not used anymore.
+    The indexes are shared by all the leaderboards showing a label, whatever its values are:
+    `leaderboard_score` indexes the values which are not numbers as null instead of failing.
+    Returns the names of the created and dropped indexes.
+    """
+    wanted_indexes = {}
+    for leaderboard in Leaderboard.objects.all():
+        for label in get_leaderboard_labels(leaderboard):
+            for direction in SORT_DIRECTIONS:
+                wanted_indexes[get_leaderboard_entry_index_name(label, direction)] = (label, direction)
+
+    concurrently = '' if connection.in_atomic_block else 'CONCURRENTLY'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'leaderboard_entry' AND indexname LIKE %s",
+            ['{}%'.format(LEADERBOARD_ENTRY_INDEX_PREFIX)])
+        existing_indexes = set(row[0] for row in cursor.fetchall())
+
+        stale_indexes = existing_indexes - set(wanted_indexes)
+        for index_name in stale_indexes:
+            cursor.execute('DROP INDEX {} IF EXISTS {}'.format(concurrently, index_name))
+
+        missing_indexes = set(wanted_indexes) - existing_indexes
+        for index_name in missing_indexes:
+            # the index could have been created by a concurrent sync in the meantime
+            if index_exists(cursor, index_name):
+                continue
+            label, direction = wanted_indexes[index_name]
+            cursor.execute(
+                'CREATE INDEX {} {} ON leaderboard_entry '
+                '(challenge_phase_split_id, leaderboard_score(result, %s) {} NULLS LAST, submitted_at, id)'.format(
+                    concurrently, index_name, direction.upper()),
+                [label])
+    return missing_indexes, stale_indexes
+
+
+# a snapshot is stored in full after this many deltas, which bounds the cost of reading one
+LEADERBOARD_SNAPSHOT_KEYFRAME_INTERVAL = 24
+
+
+def get_leaderboard_delta(old_team_ids, new_team_ids):
+    """
+    Returns the changes turning a ranking of team ids into another one, as a flat list of
+    pairs of team id and new rank, 0 meaning the team left the leaderboard.
+    Teams whose relative order did not change are left out, so that a team overtaking
+    others is stored as a single pair.
+    """
+    new_team_ids_set = set(new_team_ids)
+    delta = []
+    for team_id in old_team_ids:
+        if team_id not in new_team_ids_set:
+            delta.extend([team_id, 0])
+
+    # the teams forming the longest run of the old ranking kept in the new one stay in place
+    old_ranks = dict((team_id, rank) for rank, team_id in enumerate(old_team_ids))
+    run_tails, run_tail_indexes, previous_indexes = [], [], [None] * len(new_team_ids)
+    for index, team_id in enumerate(new_team_ids):
+        if team_id not in old_ranks:
+            continue
+        position = bisect.bisect_left(run_tails, old_ranks[team_id])
+        previous_indexes[index] = run_tail_indexes[position - 1] if position else None
+        if position == len(run_tails):
+            run_tails.append(old_ranks[team_id])
+            run_tail_indexes.append(index)
+        else:
+            run_tails[position] = old_ranks[team_id]
+            run_tail_indexes[position] = index
+
+    unmoved_indexes = set()
+    index = run_tail_indexes[-1] if run_tail_indexes else None
+    while index is not None:
+        unmoved_indexes.add(index)
+        index = previous_indexes[index]
+
+    for index, team_id in enumerate(new_team_ids):
+        if index not in unmoved_indexes:
+            delta.extend([team_id, index + 1])
+    return delta
+
+
+def apply_leaderboard_delta(team_ids, delta):
+    """Applies the changes returned by `get_leaderboard_delta` to a ranking of team ids"""
+    changed_team_ids = set(delta[::2])
+    team_ids = [team_id for team_id in team_ids if team_id not in changed_team_ids]
+    for team_id, rank in zip(delta[::2], delta[1::2]):
+        if rank:
+            team_ids.insert(rank - 1, team_id)
+    return team_ids
+
+
+def iter_leaderboard_snapshots(challenge_phase_split, until=None):
+    """
+    Replays the leaderboard snapshots of a challenge phase split, from the last keyframe before
+    `until` or from the first one, yielding every snapshot with the ranking of team ids it records
+    """
+    snapshots = LeaderboardSnapshot.objects.filter(challenge_phase_split=challenge_phase_split).order_by('id')
+    if until is not None:
+        snapshots = snapshots.filter(created_at__lte=until)
+        keyframe_id = snapshots.filter(is_keyframe=True).order_by('-id').values_list('id', flat=True).first()
+        if keyframe_id is not None:
+            snapshots = snapshots.filter(id__gte=keyframe_id)
+
+    team_ids = []
+    for snapshot in snapshots.iterator():
+        team_ids = list(snapshot.ranks) if snapshot.is_keyframe else apply_leaderboard_delta(team_ids, snapshot.ranks)
+        yield snapshot, team_ids
+
+
+def get_leaderboard_as_of(challenge_phase_split, until):
+    """Returns the ranking of team ids on a challenge phase split as it was at a point in time"""
+    team_ids = []
+    for snapshot, team_ids in iter_leaderboard_snapshots(challenge_phase_split, until):
+        pass
+    return team_ids
+
+
+def take_leaderboard_snapshot(challenge_phase_split):
+    """
+    Records the current ranking of a challenge phase split if it changed since the last snapshot.
+    Returns the new snapshot, or None when nothing changed.
+    """
+    team_ids = list(LeaderboardEntry.objects.filter(challenge_phase_split=challenge_phase_split).order_by(
+        'rank', 'id').values_list('participant_team_id', flat=True))
+
+    last_team_ids, last_keyframe_distance = [], None
+    for snapshot, last_team_ids in iter_leaderboard_snapshots(challenge_phase_split, timezone.now()):
+        last_keyframe_distance = 0 if snapshot.is_keyframe else last_keyframe_distance + 1
+
+    if last_team_ids == team_ids and (last_keyframe_distance is not None or not team_ids):
+        return None
+
+    delta = get_leaderboard_delta(last_team_ids, team_ids)
+    is_keyframe = (last_keyframe_distance is None or
+                   last_keyframe_distance + 1 >= LEADERBOARD_SNAPSHOT_KEYFRAME_INTERVAL or
+                   # the delta holds a pair per moved team, store the whole ranking once it is not shorter
+                   len(delta) // 2 >= len(team_ids))
+    return LeaderboardSnapshot.objects.create(
+        challenge_phase_split=challenge_phase_split,
+        is_keyframe=is_keyframe,
+        ranks=team_ids if is_keyframe else delta)
+
+
+# what to do with a submission missing the result of one of the splits of an aggregate leaderboard:
+# leave it out of the leaderboard, count the missing score as 0, or average over the splits it has
+AGGREGATE_MISSING_SPLIT_POLICIES = ('exclude', 'zero', 'renormalize')
+
+
+def get_aggregate(leaderboard):
+    """
+    Returns the aggregate declared in the schema of a leaderboard ranking the weighted mean of the
+    results of a submission on other dataset splits of the same challenge phase, e.g.
+
+        "aggregate": {
+            "splits": ["test-dev", "test-std"],
+            "keys": {"test-dev": "accuracy", "test-std": "accuracy"},
+            "weights": {"test-dev": 0.3, "test-std": 0.7},
+            "missing_split_policy": "exclude"
+        }
+
+    `keys` can also be a single key used for all the splits, weights default to 1 and the missing
+    split policy to "exclude". Returns None when the schema declares no valid aggregate.
+    """
+    schema = leaderboard.schema if isinstance(leaderboard.schema, dict) else {}
+    aggregate = schema.get('aggregate')
+    if not isinstance(aggregate, dict) or not aggregate.get('splits') or not schema.get('default_order_by'):
+        return None
+
+    keys = aggregate.get('keys', schema['default_order_by'])
+    if not isinstance(keys, dict):
+        keys = dict((codename, keys) for codename in aggregate['splits'])
+    weights = aggregate.get('weights') or {}
+    missing_split_policy = aggregate.get('missing_split_policy', 'exclude')
+    if missing_split_policy not in AGGREGATE_MISSING_SPLIT_POLICIES:
+        return None
+    return {
+        'order_by': schema['default_order_by'],
+        'splits': [(codename, keys.get(codename), float(weights.get(codename, 1))) for codename in aggregate['splits']],
+        'missing_split_policy': missing_split_policy,
+    }
+
+
+def compute_aggregate_result(aggregate, results):
+    """
+    Computes the result of a submission on an aggregate leaderboard from its results by dataset split
+    codename. The result holds the aggregated score under the order by key and the score of every
+    split under its codename. Returns None when the submission should not be on the leaderboard.
+    """
+    result = {}
+    weighted_sum, total_weight = 0.0, 0.0
+    for codename, key, weight in aggregate['splits']:
+        try:
+            score = float(results[codename][key])
+        except (KeyError, TypeError, ValueError):
+            score = None
+
+        if score is None:
+            if aggregate['missing_split_policy'] == 'exclude':
+                return None
+            if aggregate['missing_split_policy'] == 'zero':
+                score = 0.0
+            else:
+                result[codename] = None
+                continue
+        result[codename] = score
+        weighted_sum += weight * score
+        total_weight += weight
+
+    if not total_weight:
+        return None
+    result[aggregate['order_by']] = weighted_sum / total_weight
+    return result
+
+
+def get_aggregate_challenge_phase_splits(challenge_phase):
+    challenge_phase_splits = ChallengePhaseSplit.objects.filter(
+        challenge_phase=challenge_phase).select_related('leaderboard')
+    return [challenge_phase_split for challenge_phase_split in challenge_phase_splits
+            if get_aggregate(challenge_phase_split.leaderboard)]
+
+
+def get_results_by_codename(leaderboard_data, codenames):
+    """Groups the evaluated results of LeaderboardData by submission and dataset split codename"""
+    results_by_submission = {}
+    for item in leaderboard_data.filter(
+            challenge_phase_split__dataset_split__codename__in=codenames, is_aggregate=False).values(
+            'submission', 'challenge_phase_split__dataset_split__codename', 'result'):
+        results_by_submission.setdefault(item['submission'], {})[
+            item['challenge_phase_split__dataset_split__codename']] = item['result']
+    return results_by_submission
+
+
+def update_aggregate_leaderboard_data(submission):
+    """
+    Computes the LeaderboardData of a submission on the aggregate leaderboards of its challenge phase
+    from its results on the other splits. The leaderboard entries are then maintained from them as
+    from any other LeaderboardData.
+    """
+    for challenge_phase_split in get_aggregate_challenge_phase_splits(submission.challenge_phase):
+        aggregate = get_aggregate(challenge_phase_split.leaderboard)
+        results = get_results_by_codename(
+            LeaderboardData.objects.filter(submission=submission),
+            [codename for codename, key, weight in aggregate['splits']]).get(submission.pk, {})
+        result = compute_aggregate_result(aggregate, results)
+
+        if result is None:
+            LeaderboardData.objects.filter(
+                challenge_phase_split=challenge_phase_split, submission=submission, is_aggregate=True).delete()
+        else:
+            LeaderboardData.objects.update_or_create(
+                challenge_phase_split=challenge_phase_split,
+                submission=submission,
+                is_aggregate=True,
+                defaults={'leaderboard': challenge_phase_split.leaderboard, 'result': result})
+
+
+def rebuild_aggregate_leaderboard_data(challenge_phase_split):
+    """
+    Recomputes all the LeaderboardData an aggregate leaderboard computed, e.g. after its weights changed,
+    and rebuilds its entries. The evaluated results of the split are kept.
+    """
+    aggregate = get_aggregate(challenge_phase_split.leaderboard)
+    with transaction.atomic():
+        lock_leaderboard(challenge_phase_split)
+        # deleted in bulk, without updating the entries of every team one at a time
+        LeaderboardEntry.objects.filter(challenge_phase_split=challenge_phase_split).delete()
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM leaderboard_data WHERE challenge_phase_split_id = %s AND is_aggregate',
+                           [challenge_phase_split.pk])
+
+        if aggregate is not None:
+            results_by_submission = get_results_by_codename(
+                LeaderboardData.objects.filter(
+                    challenge_phase_split__challenge_phase=challenge_phase_split.challenge_phase_id),
+                [codename for codename, key, weight in aggregate['splits']])
+            leaderboard_data_list = []
+            for submission_id, results in results_by_submission.items():
+                result = compute_aggregate_result(aggregate, results)
+                if result is not None:
+                    leaderboard_data_list.append(LeaderboardData(
+                        challenge_phase_split=challenge_phase_split,
+                        submission_id=submission_id,
+                        leaderboard=challenge_phase_split.leaderboard,
+                        result=result,
+                        is_aggregate=True))
+            LeaderboardData.objects.bulk_create(leaderboard_data_list)
+
+        rebuild_leaderboard_entries(challenge_phase_split)
+
+
+CHALLENGE_LIST_VERSION_KEY = 'challenge_list_version'
+
+CHALLENGE_TIMES = ('all', 'future', 'past', 'present')
+
+# challenge listings are cached until the next challenge starts or ends, but at most this long
+MAX_CHALLENGE_LIST_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_challenge_list_version():
+    """Returns the version under which the challenge listings are cached"""
+    return get_cache_version(CHALLENGE_LIST_VERSION_KEY)
+
+
+def bump_challenge_list_version():
+    """
+    Invalidates the cached challenge listings, again once the transaction commits so that
+    a listing computed from the data before the commit is not served afterwards
+    """
+    bump_cache_version(CHALLENGE_LIST_VERSION_KEY)
+    transaction.on_commit(lambda: bump_cache_version(CHALLENGE_LIST_VERSION_KEY))
+
+
+def get_challenge_time_filters(challenge_time):
+    """Returns the lookups filtering the challenges of one of `CHALLENGE_TIMES`"""
+    q_params = {}
+    if challenge_time.lower() == "past":
+        q_params['end_date__lt'] = timezone.now()
+
+    elif challenge_time.lower() == "present":
+        q_params['start_date__lt'] = timezone.now()
+        q_params['end_date__gt'] = timezone.now()
+
+    elif challenge_time.lower() == "future":
+        q_params['start_date__gt'] = timezone.now()
+    # for `all` we dont need any condition in `q_params`
+    return q_params
+
+
+def get_challenge_list_cache_timeout():
+    """
+    Returns the number of seconds until the next published challenge starts or ends, at which
+    point the past, present and future listings and the `is_active` flags change
+    """
+    now = timezone.now()
+    published_challenges = Challenge.objects.filter(published=True)
+    boundaries = [
+        published_challenges.filter(start_date__gt=now).aggregate(boundary=Min('start_date'))['boundary'],
+        published_challenges.filter(end_date__gt=now).aggregate(boundary=Min('end_date'))['boundary'],
+    ]
+    boundaries = [boundary for boundary in boundaries if boundary is not None]
+    if not boundaries:
+        return MAX_CHALLENGE_LIST_CACHE_TIMEOUT
+    # a second past the boundary, so that the challenge is on the other side of it when recomputed
+    return min(int((min(boundaries) - now).total_seconds()) + 1, MAX_CHALLENGE_LIST_CACHE_TIMEOUT)
+
+
+# bundles are invalidated through their version, the timeout only bounds stale memory
+MAX_CHALLENGE_BUNDLE_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_challenge_bundle_version_key(challenge_id):
+    return 'challenge_bundle_version_{}'.format(challenge_id)
+
+
+def get_challenge_bundle_version(challenge_id):
+    """Returns the version under which the bundle of a challenge is cached"""
+    return get_cache_version(get_challenge_bundle_version_key(challenge_id))
+
+
+def bump_challenge_bundle_versions(challenge_ids):
+    """
+    Invalidates the cached bundles of the challenges, again once the transaction commits so that
+    a bundle computed from the data before the commit is not served afterwards
+    """
+    version_keys = [get_challenge_bundle_version_key(challenge_id) for challenge_id in set(challenge_ids)]
+
+    def bump_versions():
+        for version_key in version_keys:
+            bump_cache_version(version_key)
+
+    bump_versions()
+    transaction.on_commit(bump_versions)
+
+
+def get_challenge_bundle_cache_timeout(challenge_id):
+    """
+    Returns the number of seconds until the challenge or one of its phases starts or ends, at which
+    point the `is_active` flags in its bundle change
+    """
+    now = timezone.now()
+    dates = list(Challenge.objects.filter(pk=challenge_id).values_list('start_date', 'end_date'))
+    dates += list(ChallengePhase.objects.filter(challenge_id=challenge_id).values_list('start_date', 'end_date'))
+    boundaries = [date for start_and_end in dates for date in start_and_end if date is not None and date > now]
+    if not boundaries:
+        return MAX_CHALLENGE_BUNDLE_CACHE_TIMEOUT
+    return min(int((min(boundaries) - now).total_seconds()) + 1, MAX_CHALLENGE_BUNDLE_CACHE_TIMEOUT)
+
+
+CHALLENGE_SEARCH_CONFIG = 'english'
+
+# the fields of a challenge which are searched, from the highest weighted one
+CHALLENGE_SEARCH_FIELDS = ('title', 'short_description', 'description')
+
+
+def get_challenge_search_vector():
+    """Returns the expression computing the full text search vector of a challenge"""
+    vectors = [SearchVector(field_name, weight=weight, config=CHALLENGE_SEARCH_CONFIG)
+               for field_name, weight in zip(CHALLENGE_SEARCH_FIELDS, ('A', 'B', 'C'))]
+    return reduce(operator.add, vectors)
+
+
+def search_challenges(queryset, search_text):
+    """Filters the challenges matching the search text, ordered from the best match"""
+    query = SearchQuery(search_text, config=CHALLENGE_SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)).order_by('-search_rank', 'pk')
+
+
+# whether any member of a participant team hosts a challenge, whether any of them already participates in it
+# through another team, and whether the team itself already participates in it
+PARTICIPANT_TEAM_ELIGIBILITY_QUERY = """
+    SELECT
+        EXISTS (
+            SELECT 1 FROM participant
+            INNER JOIN challenge_host ON challenge_host.user_id = participant.user_id
+            WHERE participant.team_id = %s AND challenge_host.team_name_id = %s
+        ),
+        EXISTS (
+            SELECT 1 FROM participant
+            INNER JOIN participant AS other_participant ON other_participant.user_id = participant.user_id
+                AND other_participant.team_id <> participant.team_id
+            INNER JOIN challenge_participant_teams
+                ON challenge_participant_teams.participantteam_id = other_participant.team_id
+            WHERE participant.team_id = %s AND challenge_participant_teams.challenge_id = %s
+        ),
+        EXISTS (
+            SELECT 1 FROM challenge_participant_teams
+            WHERE challenge_participant_teams.participantteam_id = %s AND challenge_participant_teams.challenge_id = %s
+        )
+"""
+
+
+def get_participant_team_eligibility(challenge, participant_team_id):
+    """
+    Returns whether a member of the participant team hosts the challenge, whether a member already
+    participates in it through another team and whether the team already participates in it
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(PARTICIPANT_TEAM_ELIGIBILITY_QUERY, [
+            participant_team_id, challenge.creator_id,
+            participant_team_id, challenge.pk,
+            participant_team_id, challenge.pk,
+        ])
+        return cursor.fetchone()
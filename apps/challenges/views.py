@@ -1,4 +1,8 @@
-from django.utils import timezone
+import hashlib
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.http import urlencode
 
 from rest_framework import permissions, status
 from rest_framework.decorators import (api_view,
@@ -6,37 +10,54 @@ from rest_framework.decorators import (api_view,
                                        permission_classes,
                                        throttle_classes,)
 from rest_framework.response import Response
-from rest_framework_expiring_authtoken.authentication import (ExpiringTokenAuthentication,)
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 
+from accounts.authentication import CachedExpiringTokenAuthentication
 from accounts.permissions import HasVerifiedEmail
-from base.utils import paginated_queryset
+from base.throttling import AnonRateThrottle, UserRateThrottle
+from base.utils import get_cached_model_object, get_or_compute_cached, paginated_queryset
 from hosts.models import ChallengeHost, ChallengeHostTeam
 from hosts.utils import get_challenge_host_teams_for_user
-from participants.models import Participant, ParticipantTeam
-from participants.utils import get_participant_teams_for_user, has_user_participated_in_challenge
+from participants.models import ParticipantTeam
+from participants.utils import get_participant_teams_for_user
 
 
-from .models import Challenge, ChallengePhase, ChallengePhaseSplit
+from .models import Challenge, ChallengeConfiguration, ChallengePhase, ChallengePhaseSplit
 from .permissions import IsChallengeCreator
-from .serializers import ChallengeSerializer, ChallengePhaseSerializer, ChallengePhaseSplitSerializer
+from .sender import publish_challenge_configuration_message
+from .serializers import (ChallengeConfigurationSerializer,
+                          ChallengeListSerializer,
+                          ChallengeSerializer,
+                          ChallengePhaseSerializer,
+                          ChallengePhaseSplitSerializer,)
+from .utils import (CHALLENGE_TIMES,
+                    get_challenge_bundle_cache_timeout,
+                    get_challenge_bundle_version,
+                    get_challenge_list_cache_timeout,
+                    get_challenge_list_version,
+                    get_challenge_time_filters,
+                    get_participant_team_eligibility,
+                    search_challenges,)
+
+# the query parameters which change a cached challenge listing, the others are left out of its cache key
+CHALLENGE_LIST_CACHE_QUERY_PARAMS = ('page',)
 
 
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_list(request, challenge_host_team_pk):
     try:
-        challenge_host_team = ChallengeHostTeam.objects.get(pk=challenge_host_team_pk)
+        challenge_host_team = get_cached_model_object(request, ChallengeHostTeam, challenge_host_team_pk)
     except ChallengeHostTeam.DoesNotExist:
         response_data = {'error': 'ChallengeHostTeam does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
     if request.method == 'GET':
-        challenge = Challenge.objects.filter(creator=challenge_host_team)
+        challenge = Challenge.objects.filter(creator=challenge_host_team).select_related(
+            'creator__created_by').defer(*ChallengeListSerializer.DEFERRED_FIELDS)
         paginator, result_page = paginated_queryset(challenge, request)
-        serializer = ChallengeSerializer(result_page, many=True, context={'request': request})
+        serializer = ChallengeListSerializer(result_page, many=True, context={'request': request})
         response_data = serializer.data
         return paginator.get_paginated_response(response_data)
 
@@ -56,19 +77,68 @@ def challenge_list(request, challenge_host_team_pk):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@throttle_classes([UserRateThrottle])
+@api_view(['POST'])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((CachedExpiringTokenAuthentication,))
+def create_challenge_using_zip_file(request, challenge_host_team_pk):
+    """
+    Stores a zip configuration of a challenge and queues the creation of the challenge from it,
+    whose progress is returned by `get_challenge_configuration`
+    """
+    try:
+        challenge_host_team = get_cached_model_object(request, ChallengeHostTeam, challenge_host_team_pk)
+    except ChallengeHostTeam.DoesNotExist:
+        response_data = {'error': 'ChallengeHostTeam does not exist'}
+        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    if not ChallengeHost.objects.filter(user=request.user, team_name_id=challenge_host_team_pk).exists():
+        response_data = {
+            'error': 'Sorry, you do not belong to this Host Team!'}
+        return Response(response_data, status=status.HTTP_401_UNAUTHORIZED)
+
+    serializer = ChallengeConfigurationSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        challenge_configuration = serializer.save(user=request.user)
+        transaction.on_commit(lambda: publish_challenge_configuration_message(
+            challenge_configuration.pk, challenge_host_team.pk))
+        response_data = serializer.data
+        return Response(response_data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@throttle_classes([UserRateThrottle])
+@api_view(['GET'])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((CachedExpiringTokenAuthentication,))
+def get_challenge_configuration(request, pk):
+    """
+    Returns a zip configuration uploaded by the user, with whether its challenge is created and the logs of its creation
+    """
+    try:
+        challenge_configuration = ChallengeConfiguration.objects.get(pk=pk, user=request.user)
+    except ChallengeConfiguration.DoesNotExist:
+        response_data = {'error': 'Challenge configuration does not exist'}
+        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    serializer = ChallengeConfigurationSerializer(challenge_configuration, context={'request': request})
+    response_data = serializer.data
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_detail(request, challenge_host_team_pk, challenge_pk):
     try:
-        challenge_host_team = ChallengeHostTeam.objects.get(pk=challenge_host_team_pk)
+        challenge_host_team = get_cached_model_object(request, ChallengeHostTeam, challenge_host_team_pk)
     except ChallengeHostTeam.DoesNotExist:
         response_data = {'error': 'ChallengeHostTeam does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
     try:
-        challenge = Challenge.objects.get(pk=challenge_pk)
+        challenge = get_cached_model_object(request, Challenge, challenge_pk)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
@@ -79,23 +149,26 @@ def challenge_detail(request, challenge_host_team_pk, challenge_pk):
         return Response(response_data, status=status.HTTP_200_OK)
 
     elif request.method in ['PUT', 'PATCH']:
-        if request.method == 'PATCH':
-            serializer = ChallengeSerializer(challenge,
-                                             data=request.data,
-                                             context={'challenge_host_team': challenge_host_team,
-                                                      'request': request},
-                                             partial=True)
-        else:
-            serializer = ChallengeSerializer(challenge,
-                                             data=request.data,
-                                             context={'challenge_host_team': challenge_host_team,
-                                                      'request': request})
-        if serializer.is_valid():
-            serializer.save()
-            response_data = serializer.data
-            return Response(response_data, status=status.HTTP_200_OK)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # the cached challenge may be stale, the one being saved is read again from the database
+        with transaction.atomic():
+            challenge = Challenge.objects.select_for_update().get(pk=challenge.pk)
+            if request.method == 'PATCH':
+                serializer = ChallengeSerializer(challenge,
+                                                 data=request.data,
+                                                 context={'challenge_host_team': challenge_host_team,
+                                                          'request': request},
+                                                 partial=True)
+            else:
+                serializer = ChallengeSerializer(challenge,
+                                                 data=request.data,
+                                                 context={'challenge_host_team': challenge_host_team,
+                                                          'request': request})
+            if serializer.is_valid():
+                serializer.save()
+                response_data = serializer.data
+                return Response(response_data, status=status.HTTP_200_OK)
+            else:
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
         challenge.delete()
@@ -105,47 +178,43 @@ def challenge_detail(request, challenge_host_team_pk, challenge_pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def add_participant_team_to_challenge(request, challenge_pk, participant_team_pk):
 
-    try:
-        challenge = Challenge.objects.get(pk=challenge_pk)
-    except Challenge.DoesNotExist:
-        response_data = {'error': 'Challenge does not exist'}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    try:
-        participant_team = ParticipantTeam.objects.get(pk=participant_team_pk)
-    except ParticipantTeam.DoesNotExist:
-        response_data = {'error': 'ParticipantTeam does not exist'}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
-
-    # check to disallow the user if he is a Challenge Host for this challenge
+    # the challenge is locked so that two teams sharing a member cannot both be added to it concurrently
+    with transaction.atomic():
+        try:
+            challenge = Challenge.objects.select_for_update().get(pk=challenge_pk)
+        except Challenge.DoesNotExist:
+            response_data = {'error': 'Challenge does not exist'}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    challenge_host_team_pk = challenge.creator.pk
-    challenge_host_team_user_ids = set(ChallengeHost.objects.select_related('user').filter(
-        team_name__id=challenge_host_team_pk).values_list('user', flat=True))
+        try:
+            participant_team = ParticipantTeam.objects.get(pk=participant_team_pk)
+        except ParticipantTeam.DoesNotExist:
+            response_data = {'error': 'ParticipantTeam does not exist'}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    participant_team_user_ids = set(Participant.objects.select_related('user').filter(
-        team__id=participant_team_pk).values_list('user', flat=True))
+        is_host, has_members_participated, has_team_participated = get_participant_team_eligibility(
+            challenge, participant_team.pk)
 
-    if challenge_host_team_user_ids & participant_team_user_ids:
-        response_data = {'error': 'Sorry, You cannot participate in your own challenge!',
-                         'challenge_id': int(challenge_pk), 'participant_team_id': int(participant_team_pk)}
-        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+        # check to disallow the user if he is a Challenge Host for this challenge
+        if is_host:
+            response_data = {'error': 'Sorry, You cannot participate in your own challenge!',
+                             'challenge_id': int(challenge_pk), 'participant_team_id': int(participant_team_pk)}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    for user in participant_team_user_ids:
-        if has_user_participated_in_challenge(user, challenge_pk):
+        if has_members_participated:
             response_data = {'error': 'Sorry, other team member(s) have already participated in the Challenge.'
                              ' Please participate with a different team!',
                              'challenge_id': int(challenge_pk), 'participant_team_id': int(participant_team_pk)}
             return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    if participant_team.challenge_set.filter(id=challenge_pk).exists():
-        response_data = {'error': 'Team already exists', 'challenge_id': int(challenge_pk),
-                         'participant_team_id': int(participant_team_pk)}
-        return Response(response_data, status=status.HTTP_200_OK)
-    else:
+        if has_team_participated:
+            response_data = {'error': 'Team already exists', 'challenge_id': int(challenge_pk),
+                             'participant_team_id': int(participant_team_pk)}
+            return Response(response_data, status=status.HTTP_200_OK)
+
         challenge.participant_teams.add(participant_team)
         return Response(status=status.HTTP_201_CREATED)
 
@@ -153,16 +222,17 @@ def add_participant_team_to_challenge(request, challenge_pk, participant_team_pk
 @throttle_classes([UserRateThrottle])
 @api_view(['POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail, IsChallengeCreator))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def disable_challenge(request, challenge_pk):
     try:
-        challenge = Challenge.objects.get(pk=challenge_pk)
+        challenge = get_cached_model_object(request, Challenge, challenge_pk)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
+    # the challenge may come from the cache, only write the field being changed
     challenge.is_disabled = True
-    challenge.save()
+    challenge.save(update_fields=['is_disabled', 'modified_at'])
     return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -173,25 +243,56 @@ def get_all_challenges(request, challenge_time):
     Returns the list of all challenges
     """
     # make sure that a valid url is requested.
-    if challenge_time.lower() not in ("all", "future", "past", "present"):
+    if challenge_time.lower() not in CHALLENGE_TIMES:
         response_data = {'error': 'Wrong url pattern!'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    q_params = {'published': True}
-    if challenge_time.lower() == "past":
-        q_params['end_date__lt'] = timezone.now()
+    def get_challenges_response_data():
+        q_params = get_challenge_time_filters(challenge_time)
+        q_params['published'] = True
+
+        challenge = Challenge.objects.filter(**q_params).select_related(
+            'creator__created_by').defer(*ChallengeListSerializer.DEFERRED_FIELDS)
+        paginator, result_page = paginated_queryset(challenge, request)
+        serializer = ChallengeListSerializer(result_page, many=True, context={'request': request})
+        response_data = serializer.data
+        return paginator.get_paginated_response(response_data).data
 
-    elif challenge_time.lower() == "present":
-        q_params['start_date__lt'] = timezone.now()
-        q_params['end_date__gt'] = timezone.now()
+    # The listings are cached until a challenge changes, starts or ends. The other query parameters are
+    # left out of the cache key, the links to the other pages keep those of the request which cached them.
+    cache_params = [('challenge_time', challenge_time.lower())]
+    cache_params += [(name, request.query_params[name])
+                     for name in CHALLENGE_LIST_CACHE_QUERY_PARAMS if name in request.query_params]
+    cache_key = 'challenge_list_{}_{}'.format(
+        get_challenge_list_version(), hashlib.md5(urlencode(cache_params).encode('utf-8')).hexdigest())
+    response_data = get_or_compute_cached(cache_key, get_challenges_response_data, get_challenge_list_cache_timeout)
+    return Response(response_data)
 
-    elif challenge_time.lower() == "future":
-        q_params['start_date__gt'] = timezone.now()
-    # for `all` we dont need any condition in `q_params`
 
-    challenge = Challenge.objects.filter(**q_params)
+@throttle_classes([AnonRateThrottle])
+@api_view(['GET'])
+def search_challenges_by_text(request):
+    """
+    Returns the published challenges matching `q` in their title or descriptions, from the best match.
+    They can be restricted to the `past`, `present` or `future` ones with `challenge_time`.
+    """
+    search_text = request.query_params.get('q', '').strip()
+    if not search_text:
+        response_data = {'error': 'A search query is required'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    challenge_time = request.query_params.get('challenge_time', 'all')
+    if challenge_time.lower() not in CHALLENGE_TIMES:
+        response_data = {'error': 'challenge_time should be one of {}'.format(', '.join(CHALLENGE_TIMES))}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    q_params = get_challenge_time_filters(challenge_time)
+    q_params['published'] = True
+    challenge = Challenge.objects.filter(**q_params).select_related('creator__created_by').defer(
+        *ChallengeListSerializer.DEFERRED_FIELDS)
+    challenge = search_challenges(challenge, search_text)
     paginator, result_page = paginated_queryset(challenge, request)
-    serializer = ChallengeSerializer(result_page, many=True, context={'request': request})
+    serializer = ChallengeListSerializer(result_page, many=True, context={'request': request})
     response_data = serializer.data
     return paginator.get_paginated_response(response_data)
 
@@ -203,7 +304,7 @@ def get_challenge_by_pk(request, pk):
     Returns a particular challenge by id
     """
     try:
-        challenge = Challenge.objects.get(pk=pk)
+        challenge = get_cached_model_object(request, Challenge, pk)
         serializer = ChallengeSerializer(challenge, context={'request': request})
         response_data = serializer.data
         return Response(response_data, status=status.HTTP_200_OK)
@@ -212,10 +313,42 @@ def get_challenge_by_pk(request, pk):
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
 
+@throttle_classes([AnonRateThrottle])
+@api_view(['GET'])
+def get_challenge_bundle(request, pk):
+    """
+    Returns a challenge along with its host team, phases and phase splits
+    """
+    def get_challenge_bundle_response_data():
+        challenge_phase_splits = ChallengePhaseSplit.objects.select_related('dataset_split').order_by('pk')
+        challenge = Challenge.objects.select_related('creator__created_by').prefetch_related(
+            Prefetch('challengephase_set', queryset=ChallengePhase.objects.order_by('pk')),
+            Prefetch('challengephase_set__challengephasesplit_set', queryset=challenge_phase_splits),
+        ).get(pk=pk)
+        challenge_phases = challenge.challengephase_set.all()
+        return {
+            'challenge': ChallengeSerializer(challenge, context={'request': request}).data,
+            'challenge_phases': ChallengePhaseSerializer(challenge_phases, many=True).data,
+            'challenge_phase_splits': ChallengePhaseSplitSerializer(
+                [split for phase in challenge_phases for split in phase.challengephasesplit_set.all()],
+                many=True).data,
+        }
+
+    # The bundle is cached until the challenge or anything in it changes, starts or ends
+    cache_key = 'challenge_bundle_{}_{}'.format(pk, get_challenge_bundle_version(pk))
+    try:
+        response_data = get_or_compute_cached(cache_key, get_challenge_bundle_response_data,
+                                              lambda: get_challenge_bundle_cache_timeout(pk))
+    except Challenge.DoesNotExist:
+        response_data = {'error': 'Challenge does not exist!'}
+        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', ])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def get_challenges_based_on_teams(request):
     q_params = {}
     participant_team_id = request.query_params.get('participant_team', None)
@@ -244,9 +377,10 @@ def get_challenges_based_on_teams(request):
         host_team_ids = get_challenge_host_teams_for_user(request.user)
         q_params['creator__id__in'] = host_team_ids
 
-    challenge = Challenge.objects.filter(**q_params)
+    challenge = Challenge.objects.filter(**q_params).select_related(
+        'creator__created_by').defer(*ChallengeListSerializer.DEFERRED_FIELDS)
     paginator, result_page = paginated_queryset(challenge, request)
-    serializer = ChallengeSerializer(result_page, many=True, context={'request': request})
+    serializer = ChallengeListSerializer(result_page, many=True, context={'request': request})
     response_data = serializer.data
     return paginator.get_paginated_response(response_data)
 
@@ -254,10 +388,10 @@ def get_challenges_based_on_teams(request):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'POST'])
 @permission_classes((permissions.IsAuthenticatedOrReadOnly, HasVerifiedEmail, IsChallengeCreator))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_phase_list(request, challenge_pk):
     try:
-        challenge = Challenge.objects.get(pk=challenge_pk)
+        challenge = get_cached_model_object(request, Challenge, challenge_pk)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
@@ -282,16 +416,16 @@ def challenge_phase_list(request, challenge_pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes((permissions.IsAuthenticatedOrReadOnly, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_phase_detail(request, challenge_pk, pk):
     try:
-        challenge = Challenge.objects.get(pk=challenge_pk)
+        challenge = get_cached_model_object(request, Challenge, challenge_pk)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
     try:
-        challenge_phase = ChallengePhase.objects.get(pk=pk)
+        challenge_phase = get_cached_model_object(request, ChallengePhase, pk)
     except ChallengePhase.DoesNotExist:
         response_data = {'error': 'ChallengePhase does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
@@ -302,21 +436,24 @@ def challenge_phase_detail(request, challenge_pk, pk):
         return Response(response_data, status=status.HTTP_200_OK)
 
     elif request.method in ['PUT', 'PATCH']:
-        if request.method == 'PATCH':
-            serializer = ChallengePhaseSerializer(challenge_phase,
-                                                  data=request.data,
-                                                  context={'challenge': challenge},
-                                                  partial=True)
-        else:
-            serializer = ChallengePhaseSerializer(challenge_phase,
-                                                  data=request.data,
-                                                  context={'challenge': challenge})
-        if serializer.is_valid():
-            serializer.save()
-            response_data = serializer.data
-            return Response(response_data, status=status.HTTP_200_OK)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # the cached phase may be stale, the one being saved is read again from the database
+        with transaction.atomic():
+            challenge_phase = ChallengePhase.objects.select_for_update().get(pk=challenge_phase.pk)
+            if request.method == 'PATCH':
+                serializer = ChallengePhaseSerializer(challenge_phase,
+                                                      data=request.data,
+                                                      context={'challenge': challenge},
+                                                      partial=True)
+            else:
+                serializer = ChallengePhaseSerializer(challenge_phase,
+                                                      data=request.data,
+                                                      context={'challenge': challenge})
+            if serializer.is_valid():
+                serializer.save()
+                response_data = serializer.data
+                return Response(response_data, status=status.HTTP_200_OK)
+            else:
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
         challenge_phase.delete()
@@ -330,7 +467,7 @@ def challenge_phase_split_list(request, challenge_pk):
     Returns the list of Challenge Phase Splits for a particular challenge
     """
     try:
-        challenge = Challenge.objects.get(pk=challenge_pk)
+        challenge = get_cached_model_object(request, Challenge, challenge_pk)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
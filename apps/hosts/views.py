@@ -4,10 +4,10 @@ from rest_framework.decorators import (api_view,
                                        permission_classes,
                                        throttle_classes,)
 from rest_framework.response import Response
-from rest_framework_expiring_authtoken.authentication import (ExpiringTokenAuthentication,)
-from rest_framework.throttling import UserRateThrottle
 
+from accounts.authentication import CachedExpiringTokenAuthentication
 from accounts.permissions import HasVerifiedEmail
+from base.throttling import UserRateThrottle
 from base.utils import paginated_queryset
 from .models import (ChallengeHost,
                      ChallengeHostTeam,)
@@ -20,7 +20,7 @@ from .serializers import (ChallengeHostSerializer,
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_host_team_list(request):
 
     if request.method == 'GET':
@@ -44,7 +44,7 @@ def challenge_host_team_list(request):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_host_team_detail(request, pk):
     try:
         challenge_host_team = ChallengeHostTeam.objects.get(pk=pk)
@@ -83,7 +83,7 @@ def challenge_host_team_detail(request, pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_host_list(request, challenge_host_team_pk):
 
     try:
@@ -122,7 +122,7 @@ def challenge_host_list(request, challenge_host_team_pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_host_detail(request, challenge_host_team_pk, pk):
     try:
         challenge_host_team = ChallengeHostTeam.objects.get(pk=challenge_host_team_pk)
@@ -168,7 +168,7 @@ def challenge_host_detail(request, challenge_host_team_pk, pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def create_challenge_host_team(request):
 
     serializer = ChallengeHostTeamSerializer(data=request.data,
@@ -189,7 +189,7 @@ def create_challenge_host_team(request):
 @throttle_classes([UserRateThrottle, ])
 @api_view(['DELETE', ])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication, ))
+@authentication_classes((CachedExpiringTokenAuthentication, ))
 def remove_self_from_challenge_host_team(request, challenge_host_team_pk):
     """
     A user can remove himself from the challenge host team.
@@ -211,7 +211,7 @@ def remove_self_from_challenge_host_team(request, challenge_host_team_pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def invite_host_to_team(request, pk):
 
     try:
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from jobs.models import SubmissionUpload
+from jobs.utils import delete_submission_upload_file
+
+
+class Command(BaseCommand):
+
+    help = "Deletes submission uploads which were never finalized, along with their partial files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Uploads untouched for more than these many days are deleted')
+
+    def handle(self, *args, **options):
+        stale_uploads = SubmissionUpload.objects.filter(
+            submission__isnull=True, modified_at__lt=timezone.now() - timedelta(days=options['days']))
+        for submission_upload in stale_uploads:
+            delete_submission_upload_file(submission_upload)
+        count = stale_uploads.delete()[0]
+        self.stdout.write(self.style.SUCCESS('Deleted {} stale submission uploads.'.format(count)))
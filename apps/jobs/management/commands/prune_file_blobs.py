@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import FileBlob
+
+# blobs saved more recently than this could be about to be referred to by the model saving them
+FILE_BLOB_GRACE_PERIOD = timedelta(hours=1)
+
+
+class Command(BaseCommand):
+
+    help = "Deletes the content addressed files which are not referred to by any submission anymore."
+
+    def handle(self, *args, **options):
+        count = 0
+        saved_before = timezone.now() - FILE_BLOB_GRACE_PERIOD
+        for blob_id in FileBlob.objects.filter(reference_count=0, modified_at__lt=saved_before).values_list(
+                'id', flat=True):
+            with transaction.atomic():
+                # the blob could have been referred to or saved again in the meantime
+                blob = FileBlob.objects.select_for_update().filter(
+                    pk=blob_id, reference_count=0, modified_at__lt=saved_before).first()
+                if not blob:
+                    continue
+                default_storage.delete(blob.name)
+                blob.delete()
+                count += 1
+        self.stdout.write(self.style.SUCCESS('Deleted {} unreferenced file blobs.'.format(count)))
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-18 10:12
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('participants', '0008_added_unique_in_team_name'),
+        ('challenges', '0028_zip_configuration_models_for_challenge_creation'),
+        ('jobs', '0005_added_new_fields_to_submission_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionUpload',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('total_size', models.BigIntegerField()),
+                ('uploaded_size', models.BigIntegerField(default=0)),
+                ('challenge_phase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_uploads', to='challenges.ChallengePhase')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('participant_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_uploads', to='participants.ParticipantTeam')),
+                ('submission', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='upload', to='jobs.Submission')),
+            ],
+            options={
+                'db_table': 'submission_upload',
+            },
+        ),
+    ]
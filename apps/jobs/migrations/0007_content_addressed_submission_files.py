@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-20 16:41
+from __future__ import unicode_literals
+
+import base.utils
+from django.db import migrations, models
+import jobs.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_submission_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('modified_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('reference_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'file_blob',
+            },
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='input_file',
+            field=models.FileField(storage=jobs.storage.ContentAddressedStorage(), upload_to=base.utils.RandomFileName('submission_files/submission_{id}')),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='stderr_file',
+            field=models.FileField(blank=True, null=True, storage=jobs.storage.ContentAddressedStorage(), upload_to=base.utils.RandomFileName('submission_files/submission_{id}')),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='stdout_file',
+            field=models.FileField(blank=True, null=True, storage=jobs.storage.ContentAddressedStorage(), upload_to=base.utils.RandomFileName('submission_files/submission_{id}')),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='submission_metadata_file',
+            field=models.FileField(blank=True, null=True, storage=jobs.storage.ContentAddressedStorage(), upload_to=base.utils.RandomFileName('submission_files/submission_{id}')),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='submission_result_file',
+            field=models.FileField(blank=True, null=True, storage=jobs.storage.ContentAddressedStorage(), upload_to=base.utils.RandomFileName('submission_files/submission_{id}')),
+        ),
+    ]
@@ -1,14 +1,16 @@
 from __future__ import unicode_literals
 
-import datetime
 import logging
+import os
+import uuid
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models import Max
+from django.db import models, transaction
+from django.db.models import Case, Count, IntegerField, Max, When
 from django.utils import timezone
 from rest_framework.exceptions import PermissionDenied
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
 
@@ -17,25 +19,45 @@ from base.utils import RandomFileName
 from challenges.models import ChallengePhase
 from participants.models import ParticipantTeam
 
+from .storage import ContentAddressedStorage
+from .utils import (
+    MAX_SUBMISSIONS_PER_DAY_REACHED,
+    MAX_SUBMISSIONS_REACHED,
+    clear_submission_quota_counts,
+    get_submission_quota_version,
+    set_submission_quota_counts,)
+
 logger = logging.getLogger(__name__)
 
 
-# submission.pk is not available when saving input_file
-# OutCome: `input_file` was saved for submission in folder named `submission_None`
-# why is the hack not done for `stdout_file` and `stderr_file`
-# Because they will be saved only after a submission instance is saved(pk will be available)
-@receiver(pre_save, sender='jobs.Submission')
-def skip_saving_file(sender, instance, **kwargs):
-    if not instance.pk and not hasattr(instance, '_input_file'):
-        setattr(instance, '_input_file', instance.input_file)
-        instance.input_file = None
+@receiver(post_delete, sender='jobs.Submission')
+def clear_quota_counts(sender, instance, **kwargs):
+    clear_submission_quota_counts(instance.challenge_phase_id, instance.participant_team_id)
+
 
+@receiver(post_delete, sender='jobs.Submission')
+def release_submission_files(sender, instance, **kwargs):
+    for field_name in Submission.FILE_FIELDS:
+        submission_file = getattr(instance, field_name)
+        if submission_file:
+            submission_file.storage.delete(submission_file.name)
 
-@receiver(post_save, sender='jobs.Submission')
-def save_file(sender, instance, created, **kwargs):
-    if created and hasattr(instance, '_input_file'):
-        instance.input_file = getattr(instance, '_input_file')
-        instance.save()
+
+class FileBlob(TimeStampedModel):
+    """
+    Model representing a file stored once under the hash of its content by
+    `ContentAddressedStorage`, along with the number of file fields referring to it
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    reference_count = models.PositiveIntegerField(default=0)
+
+    def __unicode__(self):
+        return '{}'.format(self.name)
+
+    class Meta:
+        app_label = 'jobs'
+        db_table = 'file_blob'
 
 
 class Submission(TimeStampedModel):
@@ -56,6 +78,8 @@ class Submission(TimeStampedModel):
         (SUBMITTING, SUBMITTING),
     )
 
+    FILE_FIELDS = ('input_file', 'stdout_file', 'stderr_file', 'submission_result_file', 'submission_metadata_file',)
+
     participant_team = models.ForeignKey(
         ParticipantTeam, related_name='submissions')
     challenge_phase = models.ForeignKey(
@@ -70,13 +94,18 @@ class Submission(TimeStampedModel):
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     when_made_public = models.DateTimeField(null=True, blank=True)
-    input_file = models.FileField(upload_to=RandomFileName("submission_files/submission_{id}"))
-    stdout_file = models.FileField(upload_to=RandomFileName("submission_files/submission_{id}"), null=True, blank=True)
-    stderr_file = models.FileField(upload_to=RandomFileName("submission_files/submission_{id}"), null=True, blank=True)
+    input_file = models.FileField(upload_to=RandomFileName("submission_files/submission_{id}"),
+                                  storage=ContentAddressedStorage())
+    stdout_file = models.FileField(upload_to=RandomFileName("submission_files/submission_{id}"),
+                                   storage=ContentAddressedStorage(), null=True, blank=True)
+    stderr_file = models.FileField(upload_to=RandomFileName("submission_files/submission_{id}"),
+                                   storage=ContentAddressedStorage(), null=True, blank=True)
     submission_result_file = models.FileField(
-        upload_to=RandomFileName("submission_files/submission_{id}"), null=True, blank=True)
+        upload_to=RandomFileName("submission_files/submission_{id}"), storage=ContentAddressedStorage(),
+        null=True, blank=True)
     submission_metadata_file = models.FileField(
-        upload_to=RandomFileName("submission_files/submission_{id}"), null=True, blank=True)
+        upload_to=RandomFileName("submission_files/submission_{id}"), storage=ContentAddressedStorage(),
+        null=True, blank=True)
     execution_time_limit = models.PositiveIntegerField(default=300)
     method_name = models.CharField(max_length=1000, null=True)
     method_description = models.TextField(blank=True, null=True)
@@ -101,6 +130,43 @@ class Submission(TimeStampedModel):
         # else:
         #     return None
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Submission, cls).from_db(db, field_names, values)
+        # names of the files stored for the submission, deferred fields are missing from `__dict__`
+        instance._stored_file_names = {field_name: instance.__dict__[field_name]
+                                       for field_name in cls.FILE_FIELDS if field_name in instance.__dict__}
+        return instance
+
+    def get_submissions_with_same_input_file(self):
+        """
+        Returns the other submissions of the phase whose input file has exactly the same content,
+        e.g. to reuse their results instead of evaluating the same input again
+        """
+        return Submission.objects.filter(
+            challenge_phase=self.challenge_phase_id, input_file=self.input_file.name).exclude(pk=self.pk)
+
+    def update_file_references(self, update_fields=None):
+        """
+        Counts a reference to the stored file of every saved file field which changed and releases
+        the one held on the file it replaced, e.g. when the stdout of a submission is saved again
+        on re-evaluation. Saving the same content again leaves the counts as they are.
+        """
+        stored_file_names = getattr(self, '_stored_file_names', {})
+        for field_name in self.FILE_FIELDS:
+            if field_name not in self.__dict__ or (update_fields is not None and field_name not in update_fields):
+                continue
+            submission_file = getattr(self, field_name)
+            stored_file_name = stored_file_names.get(field_name)
+            if submission_file.name == stored_file_name:
+                continue
+            if submission_file.name:
+                submission_file.storage.add_reference(submission_file.name)
+            if stored_file_name:
+                submission_file.storage.delete(stored_file_name)
+            stored_file_names[field_name] = submission_file.name
+        self._stored_file_names = stored_file_names
+
     def save(self, *args, **kwargs):
 
         if hasattr(self, 'status'):
@@ -110,55 +176,106 @@ class Submission(TimeStampedModel):
                 self.completed_at = timezone.now()
 
         if not self.pk:
-            sub_num = Submission.objects.filter(
-                challenge_phase=self.challenge_phase,
-                participant_team=self.participant_team).aggregate(
-                Max('submission_number'))['submission_number__max']
-            if sub_num:
-                self.submission_number = sub_num + 1
-            else:
-                self.submission_number = 1
-
-            failed_count = Submission.objects.filter(
-                challenge_phase=self.challenge_phase,
-                participant_team=self.participant_team,
-                status=Submission.FAILED).count()
-
-            successful_count = self.submission_number - failed_count
-
-            if successful_count > self.challenge_phase.max_submissions:
-                logger.info("Checking to see if the successful_count {0} is greater than maximum allowed {1}".format(
-                        successful_count, self.challenge_phase.max_submissions))
-
-                logger.info("The submission request is submitted by user {0} from participant_team {1} ".format(
-                        self.created_by.pk, self.participant_team.pk))
-
-                raise PermissionDenied({'error': 'The maximum number of submissions has been reached'})
-            else:
-                logger.info("Submission is below for user {0} form participant_team {1} for challenge_phase {2}".format(
-                    self.created_by.pk, self.participant_team.pk, self.challenge_phase.pk))
-
-            if hasattr(self.challenge_phase, 'max_submissions_per_day'):
-                submissions_done_today_count = Submission.objects.filter(
-                    challenge_phase__challenge=self.challenge_phase.challenge,
-                    participant_team=self.participant_team,
-                    challenge_phase=self.challenge_phase,
-                    submitted_at__gte=datetime.date.today()).count()
-
-                failed_count = Submission.objects.filter(
-                    challenge_phase=self.challenge_phase,
-                    participant_team=self.participant_team,
-                    status=Submission.FAILED,
-                    submitted_at__gte=datetime.date.today()).count()
-
-                if ((submissions_done_today_count + 1 - failed_count > self.challenge_phase.max_submissions_per_day) or
-                        (self.challenge_phase.max_submissions_per_day == 0)):
-                    logger.info("Permission Denied: The maximum number of submission for today has been reached")
-                    raise PermissionDenied({'error': 'The maximum number of submission for today has been reached'})
-
-            self.is_public = (True if self.challenge_phase.is_submission_public else False)
-
-            self.status = Submission.SUBMITTED
-
-        submission_instance = super(Submission, self).save(*args, **kwargs)
+            with transaction.atomic():
+                self.check_submission_quota()
+                self.is_public = (True if self.challenge_phase.is_submission_public else False)
+                self.status = Submission.SUBMITTED
+                submission_instance = super(Submission, self).save(*args, **kwargs)
+                self.update_file_references()
+            return submission_instance
+
+        if self.status == Submission.FAILED:
+            # a failed submission gives the quota back to the team
+            transaction.on_commit(
+                lambda: clear_submission_quota_counts(self.challenge_phase_id, self.participant_team_id))
+
+        with transaction.atomic():
+            submission_instance = super(Submission, self).save(*args, **kwargs)
+            self.update_file_references(kwargs.get('update_fields'))
         return submission_instance
+
+    def check_submission_quota(self):
+        """
+        Allocates the `submission_number` and enforces `max_submissions` and
+        `max_submissions_per_day` for the participant team.
+
+        Must be called inside a transaction: the participant team row is locked
+        so that concurrent submissions of a team are serialized until commit.
+        """
+        ParticipantTeam.objects.select_for_update().get(pk=self.participant_team_id)
+
+        # read before counting, counts cleared by a commit made after this point will not be cached
+        quota_version = get_submission_quota_version(self.challenge_phase_id, self.participant_team_id)
+        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        submission_counts = Submission.objects.filter(
+            challenge_phase=self.challenge_phase,
+            participant_team=self.participant_team).aggregate(
+            max_submission_number=Max('submission_number'),
+            failed_count=Count(Case(When(status=Submission.FAILED, then=1), output_field=IntegerField())),
+            submissions_done_today_count=Count(Case(When(submitted_at__gte=today, then=1),
+                                                    output_field=IntegerField())),
+            failed_today_count=Count(Case(When(status=Submission.FAILED, submitted_at__gte=today, then=1),
+                                          output_field=IntegerField())))
+
+        self.submission_number = (submission_counts['max_submission_number'] or 0) + 1
+
+        successful_count = self.submission_number - submission_counts['failed_count']
+        successful_today_count = (submission_counts['submissions_done_today_count'] + 1 -
+                                  submission_counts['failed_today_count'])
+
+        if successful_count > self.challenge_phase.max_submissions:
+            logger.info("Checking to see if the successful_count {0} is greater than maximum allowed {1}".format(
+                    successful_count, self.challenge_phase.max_submissions))
+
+            logger.info("The submission request is submitted by user {0} from participant_team {1} ".format(
+                    self.created_by.pk, self.participant_team.pk))
+
+            set_submission_quota_counts(self.challenge_phase, self.participant_team_id,
+                                        successful_count - 1, successful_today_count - 1, quota_version)
+            raise PermissionDenied({'error': MAX_SUBMISSIONS_REACHED})
+        else:
+            logger.info("Submission is below for user {0} form participant_team {1} for challenge_phase {2}".format(
+                self.created_by.pk, self.participant_team.pk, self.challenge_phase.pk))
+
+        if ((successful_today_count > self.challenge_phase.max_submissions_per_day) or
+                (self.challenge_phase.max_submissions_per_day == 0)):
+            logger.info("Permission Denied: The maximum number of submission for today has been reached")
+            set_submission_quota_counts(self.challenge_phase, self.participant_team_id,
+                                        successful_count - 1, successful_today_count - 1, quota_version)
+            raise PermissionDenied({'error': MAX_SUBMISSIONS_PER_DAY_REACHED})
+
+        # counts as they will be once this submission is committed
+        transaction.on_commit(
+            lambda: set_submission_quota_counts(self.challenge_phase, self.participant_team_id,
+                                                successful_count, successful_today_count, quota_version))
+
+
+class SubmissionUpload(TimeStampedModel):
+    """
+    Model representing a resumable upload of a submission file. The file is received in
+    byte ranges, appended to `SUBMISSION_UPLOAD_DIR` and turned into a Submission on finalize.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    participant_team = models.ForeignKey(ParticipantTeam, related_name='submission_uploads')
+    challenge_phase = models.ForeignKey(ChallengePhase, related_name='submission_uploads')
+    created_by = models.ForeignKey(User)
+    file_name = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    uploaded_size = models.BigIntegerField(default=0)
+    submission = models.OneToOneField(Submission, null=True, blank=True, related_name='upload')
+
+    def __unicode__(self):
+        return '{}'.format(self.id)
+
+    class Meta:
+        app_label = 'jobs'
+        db_table = 'submission_upload'
+
+    @property
+    def is_complete(self):
+        """Returns if all the bytes of the file have been received"""
+        return self.uploaded_size == self.total_size
+
+    def get_temporary_file_path(self):
+        """Returns the path where the received bytes are stored until the upload is finalized"""
+        return os.path.join(settings.SUBMISSION_UPLOAD_DIR, '{}.part'.format(self.id))
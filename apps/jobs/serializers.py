@@ -5,7 +5,7 @@ from rest_framework import serializers
 from challenges.models import LeaderboardData
 from participants.models import Participant, ParticipantTeam
 
-from .models import Submission
+from .models import Submission, SubmissionUpload
 
 
 class SubmissionSerializer(serializers.ModelSerializer):
@@ -15,7 +15,7 @@ class SubmissionSerializer(serializers.ModelSerializer):
 
     def __init__(self, *args, **kwargs):
         context = kwargs.get('context')
-        if context and context.get('request').method == 'POST':
+        if context and context.get('request').method == 'POST' and kwargs.get('data') is not None:
             created_by = context.get('request').user
             kwargs['data']['created_by'] = created_by.pk
 
@@ -41,6 +41,17 @@ class SubmissionSerializer(serializers.ModelSerializer):
         return obj.execution_time
 
 
+class SubmissionUploadSerializer(serializers.ModelSerializer):
+
+    total_size = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = SubmissionUpload
+        fields = ('id', 'participant_team', 'challenge_phase', 'file_name', 'total_size', 'uploaded_size',
+                  'submission',)
+        read_only_fields = ('participant_team', 'challenge_phase', 'uploaded_size', 'submission',)
+
+
 class LeaderboardDataSerializer(serializers.ModelSerializer):
 
     participant_team_name = serializers.SerializerMethodField()
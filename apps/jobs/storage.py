@@ -0,0 +1,78 @@
+import hashlib
+import os
+
+from django.apps import apps
+from django.core.files.storage import Storage, default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Storage which saves a file under the SHA-256 hash of its content on top of the
+    default storage, so that a content uploaded many times is stored only once.
+    References to every stored blob are counted in `jobs.FileBlob` by the model saving
+    its name, blobs which are not referenced anymore are removed by the `prune_file_blobs`
+    command once they have not been saved for a while.
+    """
+
+    def __init__(self, location='blobs'):
+        self.location = location
+
+    def get_blob_name(self, name, digest):
+        extension = os.path.splitext(name)[1]
+        return os.path.join(self.location, digest[:2], digest[2:4], '{}{}'.format(digest, extension))
+
+    def get_available_name(self, name, max_length=None):
+        # same name means same content, there is nothing to make unique
+        return name
+
+    def _save(self, name, content):
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        blob_name = self.get_blob_name(name, sha256.hexdigest())
+
+        FileBlob = apps.get_model('jobs', 'FileBlob')
+        with transaction.atomic():
+            blob, created = FileBlob.objects.select_for_update().get_or_create(
+                name=blob_name, defaults={'size': content.size})
+            if created or not default_storage.exists(blob_name):
+                content.seek(0)
+                saved_name = default_storage.save(blob_name, content)
+                if saved_name != blob_name:
+                    # the blob was stored meanwhile, the copy saved under an available name is not needed
+                    default_storage.delete(saved_name)
+                    if not default_storage.exists(blob_name):
+                        raise IOError('The blob {} could not be saved under its own name'.format(blob_name))
+            if not created:
+                # keeps the blob from being pruned until the name is saved by the model
+                blob.save(update_fields=['modified_at'])
+        return blob_name
+
+    def _open(self, name, mode='rb'):
+        return default_storage.open(name, mode)
+
+    def add_reference(self, name):
+        """Counts one more reference to the blob"""
+        FileBlob = apps.get_model('jobs', 'FileBlob')
+        FileBlob.objects.filter(name=name).update(reference_count=F('reference_count') + 1)
+
+    def delete(self, name):
+        """Releases one reference to the blob, the content itself is removed when it is pruned"""
+        FileBlob = apps.get_model('jobs', 'FileBlob')
+        FileBlob.objects.filter(name=name, reference_count__gt=0).update(reference_count=F('reference_count') - 1)
+
+    def exists(self, name):
+        return default_storage.exists(name)
+
+    def size(self, name):
+        return default_storage.size(name)
+
+    def url(self, name):
+        return default_storage.url(name)
+
+    def path(self, name):
+        return default_storage.path(name)
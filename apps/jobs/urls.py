@@ -9,6 +9,19 @@ urlpatterns = [
     url(r'challenge/(?P<challenge_id>[0-9]+)/'
         r'challenge_phase/(?P<challenge_phase_id>[0-9]+)/submission/',
         views.challenge_submission, name='challenge_submission'),
+    url(r'challenge/(?P<challenge_id>[0-9]+)/'
+        r'challenge_phase/(?P<challenge_phase_id>[0-9]+)/submission_upload/$',
+        views.create_submission_upload, name='create_submission_upload'),
+    url(r'submission_upload/(?P<upload_id>[0-9a-f-]+)/finalize/$',
+        views.finalize_submission_upload, name='finalize_submission_upload'),
+    url(r'submission_upload/(?P<upload_id>[0-9a-f-]+)/$',
+        views.submission_upload_detail, name='submission_upload_detail'),
+    url(r'challenge_phase_split/(?P<challenge_phase_split_id>[0-9]+)/leaderboard/history/$',
+        views.leaderboard_history, name='leaderboard_history'),
     url(r'challenge_phase_split/(?P<challenge_phase_split_id>[0-9]+)/leaderboard/',
         views.leaderboard, name='leaderboard'),
+    url(r'challenge/(?P<challenge_id>[0-9]+)/leaderboards/$',
+        views.challenge_leaderboards, name='challenge_leaderboards'),
+    url(r'challenge_phase/(?P<challenge_phase_id>[0-9]+)/leaderboards/$',
+        views.challenge_phase_leaderboards, name='challenge_phase_leaderboards'),
 ]
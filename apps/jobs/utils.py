@@ -0,0 +1,127 @@
+import datetime
+import os
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from base.utils import bump_cache_version, get_cache_version
+
+MAX_SUBMISSIONS_REACHED = 'The maximum number of submissions has been reached'
+MAX_SUBMISSIONS_PER_DAY_REACHED = 'The maximum number of submission for today has been reached'
+
+UPLOAD_READ_SIZE = 64 * 1024
+
+
+def get_submission_quota_version_key(challenge_phase_id, participant_team_id):
+    """Returns the cache key holding the version of the cached submission counts of a team for a phase"""
+    return 'submission_quota_version_{0}_{1}'.format(challenge_phase_id, participant_team_id)
+
+
+def get_submission_quota_version(challenge_phase_id, participant_team_id):
+    """
+    Returns the current version of the cached submission counts of a team for a phase.
+    Counts taken from the database must be cached under the version read before taking them,
+    so that counts which were cleared in the meantime are never cached again.
+    """
+    return get_cache_version(get_submission_quota_version_key(challenge_phase_id, participant_team_id))
+
+
+def get_submission_quota_cache_key(challenge_phase_id, participant_team_id, version):
+    """Returns the cache key holding the submission counts of a team for a phase on the current UTC day"""
+    return 'submission_quota_{0}_{1}_{2}_{3}'.format(
+        challenge_phase_id, participant_team_id, version, timezone.now().strftime('%Y%m%d'))
+
+
+def get_seconds_until_end_of_day():
+    """Returns the number of seconds left in the current UTC day"""
+    now = timezone.now()
+    end_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+    return int((end_of_day - now).total_seconds()) + 1
+
+
+def set_submission_quota_counts(challenge_phase, participant_team_id, successful_count, successful_today_count,
+                                version=None):
+    """
+    Caches the number of successful submissions made by a team for a phase, in total and on the
+    current UTC day, along with the limits they were checked against.
+    The counts are always taken from the database in `Submission.check_submission_quota`, under the
+    `version` read before they were taken. Counts set under an older version are never read.
+    """
+    if version is None:
+        version = get_submission_quota_version(challenge_phase.pk, participant_team_id)
+    counts = {
+        'max_submissions': challenge_phase.max_submissions,
+        'max_submissions_per_day': challenge_phase.max_submissions_per_day,
+        'successful_count': successful_count,
+        'successful_today_count': successful_today_count,
+    }
+    cache.set(get_submission_quota_cache_key(challenge_phase.pk, participant_team_id, version), counts,
+              get_seconds_until_end_of_day())
+
+
+def clear_submission_quota_counts(challenge_phase_id, participant_team_id):
+    """
+    Drops the cached submission counts so that the next submission is checked against the database,
+    including the counts of transactions which are yet to be committed
+    """
+    bump_cache_version(get_submission_quota_version_key(challenge_phase_id, participant_team_id))
+
+
+def get_cached_submission_quota_error(challenge_phase, participant_team_id):
+    """
+    Returns the error message if the cached counts show that the team has exhausted its quota
+    for the phase, otherwise None. A cache miss (or limits that changed since the counts were
+    cached) returns None and leaves the decision to the database check.
+    """
+    version = get_submission_quota_version(challenge_phase.pk, participant_team_id)
+    counts = cache.get(get_submission_quota_cache_key(challenge_phase.pk, participant_team_id, version))
+    if not counts:
+        return None
+
+    if (counts['max_submissions'] != challenge_phase.max_submissions or
+            counts['max_submissions_per_day'] != challenge_phase.max_submissions_per_day):
+        return None
+
+    if counts['successful_count'] >= challenge_phase.max_submissions:
+        return MAX_SUBMISSIONS_REACHED
+
+    if (counts['successful_today_count'] >= challenge_phase.max_submissions_per_day or
+            challenge_phase.max_submissions_per_day == 0):
+        return MAX_SUBMISSIONS_PER_DAY_REACHED
+
+    return None
+
+
+def write_submission_upload_chunk(submission_upload, stream, offset, length):
+    """
+    Writes at most `length` bytes read from `stream` at `offset` of the file being assembled
+    for a submission upload and returns the number of bytes written. Whatever was received
+    before the client went away is kept, so that the upload can be resumed from there.
+    The upload row should be locked until its `uploaded_size` is moved past the written bytes.
+    """
+    file_path = submission_upload.get_temporary_file_path()
+    if not os.path.exists(os.path.dirname(file_path)):
+        os.makedirs(os.path.dirname(file_path))
+
+    received = 0
+    with open(file_path, 'r+b' if os.path.exists(file_path) else 'wb') as upload_file:
+        upload_file.seek(offset)
+        upload_file.truncate()
+        while stream is not None and received < length:
+            try:
+                data = stream.read(min(UPLOAD_READ_SIZE, length - received))
+            except IOError:
+                break
+            if not data:
+                break
+            upload_file.write(data)
+            received += len(data)
+    return received
+
+
+def delete_submission_upload_file(submission_upload):
+    """Removes the partially or fully received file of a submission upload"""
+    try:
+        os.remove(submission_upload.get_temporary_file_path())
+    except OSError:
+        pass
@@ -1,51 +1,84 @@
+import hashlib
+import re
+
 from rest_framework import permissions, status
 from rest_framework.decorators import (api_view,
                                        authentication_classes,
                                        permission_classes,
                                        throttle_classes,)
 
-from django.db.models.expressions import RawSQL
-from django.db.models import FloatField
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode
 
-from rest_framework_expiring_authtoken.authentication import (
-    ExpiringTokenAuthentication,)
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 
+from accounts.authentication import CachedExpiringTokenAuthentication
 from accounts.permissions import HasVerifiedEmail
-from base.utils import paginated_queryset
+from base.throttling import AnonRateThrottle, SubmissionUploadRateThrottle, UserRateThrottle
+from base.utils import get_cached_model_object, get_or_compute_cached, paginated_queryset
 from challenges.models import (
     ChallengePhase,
     Challenge,
     ChallengePhaseSplit,
-    LeaderboardData,)
+    LeaderboardEntry,)
+from challenges.utils import (
+    LEADERBOARD_CACHE_TIMEOUT,
+    SORT_DIRECTIONS,
+    format_leaderboard_entry,
+    get_leaderboard_as_of,
+    get_leaderboard_entry_ordering,
+    get_leaderboard_labels,
+    get_leaderboard_version,
+    get_leaderboard_versions,
+    iter_leaderboard_snapshots,
+    only_leaderboard_entry_fields,
+    update_leaderboard_entries_for_submission,)
 from participants.models import (ParticipantTeam,)
 from participants.utils import (
     get_participant_team_id_of_user_for_a_challenge,)
 
-from .models import Submission
+from .models import Submission, SubmissionUpload
 from .sender import publish_submission_message
-from .serializers import SubmissionSerializer
+from .serializers import SubmissionSerializer, SubmissionUploadSerializer
+from .utils import (
+    delete_submission_upload_file,
+    get_cached_submission_quota_error,
+    write_submission_upload_chunk,)
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+DEFAULT_TOP_LEADERBOARD_ENTRIES = 10
+MAX_TOP_LEADERBOARD_ENTRIES = 100
+
+DEFAULT_LEADERBOARD_NEIGHBOURHOOD = 5
+MAX_LEADERBOARD_NEIGHBOURHOOD = 50
+
+# the query parameters which change a cached leaderboard response, the others are left out of its cache key
+LEADERBOARD_CACHE_QUERY_PARAMS = ('page', 'pagination', 'cursor', 'count')
 
 
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def challenge_submission(request, challenge_id, challenge_phase_id):
     """API Endpoint for making a submission to a challenge"""
 
     # check if the challenge exists or not
     try:
-        challenge = Challenge.objects.get(pk=challenge_id)
+        challenge = get_cached_model_object(request, Challenge, challenge_id)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
     # check if the challenge phase exists or not
     try:
-        challenge_phase = ChallengePhase.objects.get(
-            pk=challenge_phase_id, challenge=challenge)
+        challenge_phase = get_cached_model_object(
+            request, ChallengePhase, challenge_phase_id, challenge_id=challenge.pk)
     except ChallengePhase.DoesNotExist:
         response_data = {'error': 'Challenge Phase does not exist'}
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
@@ -63,8 +96,8 @@ def challenge_submission(request, challenge_id, challenge_phase_id):
             return Response(response_data, status=status.HTTP_403_FORBIDDEN)
 
         submission = Submission.objects.filter(participant_team=participant_team_id,
-                                               challenge_phase=challenge_phase).order_by('-submitted_at')
-        paginator, result_page = paginated_queryset(submission, request)
+                                               challenge_phase=challenge_phase).order_by('-submitted_at', '-id')
+        paginator, result_page = paginated_queryset(submission, request, cursor_ordering=('-submitted_at', '-id'))
         try:
             serializer = SubmissionSerializer(result_page, many=True, context={'request': request})
             response_data = serializer.data
@@ -87,6 +120,13 @@ def challenge_submission(request, challenge_id, challenge_phase_id):
 
         participant_team_id = get_participant_team_id_of_user_for_a_challenge(
             request.user, challenge_id)
+
+        # reject teams which are known to be over their quota before the uploaded file is parsed
+        quota_error = get_cached_submission_quota_error(challenge_phase, participant_team_id)
+        if quota_error:
+            response_data = {'error': quota_error}
+            return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+
         try:
             participant_team = ParticipantTeam.objects.get(pk=participant_team_id)
         except ParticipantTeam.DoesNotExist:
@@ -111,21 +151,21 @@ def challenge_submission(request, challenge_id, challenge_phase_id):
 @throttle_classes([UserRateThrottle])
 @api_view(['PATCH'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def change_submission_visibility(request, challenge_id, challenge_phase_id, submission_id):
     """API Endpoint for making a submission to a challenge"""
 
     # check if the challenge exists or not
     try:
-        challenge = Challenge.objects.get(pk=challenge_id)
+        challenge = get_cached_model_object(request, Challenge, challenge_id)
     except Challenge.DoesNotExist:
         response_data = {'error': 'Challenge does not exist'}
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
     # check if the challenge phase exists or not
     try:
-        challenge_phase = ChallengePhase.objects.get(
-            pk=challenge_phase_id, challenge=challenge)
+        challenge_phase = get_cached_model_object(
+            request, ChallengePhase, challenge_phase_id, challenge_id=challenge.pk)
     except ChallengePhase.DoesNotExist:
         response_data = {'error': 'Challenge Phase does not exist'}
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
@@ -167,6 +207,8 @@ def change_submission_visibility(request, challenge_id, challenge_phase_id, subm
 
     if serializer.is_valid():
         serializer.save()
+        # the submission may now be, or no longer be, the best public entry of its team
+        update_leaderboard_entries_for_submission(submission)
         response_data = serializer.data
         return Response(response_data, status=status.HTTP_200_OK)
     else:
@@ -180,7 +222,7 @@ def leaderboard(request, challenge_phase_split_id):
 
     # check if the challenge exists or not
     try:
-        challenge_phase_split = ChallengePhaseSplit.objects.get(
+        challenge_phase_split = ChallengePhaseSplit.objects.select_related('leaderboard').get(
             pk=challenge_phase_split_id)
     except ChallengePhaseSplit.DoesNotExist:
         response_data = {'error': 'Challenge Phase Split does not exist'}
@@ -194,37 +236,397 @@ def leaderboard(request, challenge_phase_split_id):
     # Get the leaderboard associated with the Challenge Phase Split
     leaderboard = challenge_phase_split.leaderboard
 
-    # Get the default order by key to rank the entries on the leaderboard
-    try:
-        default_order_by = leaderboard.schema['default_order_by']
-    except:
+    # Check the default order by key to rank the entries on the leaderboard
+    if not isinstance(leaderboard.schema, dict) or 'default_order_by' not in leaderboard.schema:
         response_data = {'error': 'Sorry, Default filtering key not found in leaderboard schema!'}
         return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get all the successful submissions related to the challenge phase split
-    leaderboard_data = LeaderboardData.objects.filter(
-        challenge_phase_split=challenge_phase_split, submission__is_public=True).order_by('created_at')
-    leaderboard_data = leaderboard_data.annotate(
-        filtering_score=RawSQL('result->>%s', (default_order_by, ), output_field=FloatField())).values(
-            'id', 'submission__participant_team__team_name',
-            'challenge_phase_split', 'result', 'filtering_score', 'leaderboard__schema')
+    # Find a participant team on the leaderboard and return its rank with the teams around it
+    if 'team' in request.query_params:
+        try:
+            participant_team_id = int(request.query_params['team'])
+            around = int(request.query_params.get('around', DEFAULT_LEADERBOARD_NEIGHBOURHOOD))
+        except ValueError:
+            response_data = {'error': 'team and around should be numbers'}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        around = max(0, min(around, MAX_LEADERBOARD_NEIGHBOURHOOD))
+
+        rank = LeaderboardEntry.objects.filter(
+            challenge_phase_split=challenge_phase_split,
+            participant_team=participant_team_id).values_list('rank', flat=True).first()
+        if rank is None:
+            response_data = {'error': 'Participant team is not on the leaderboard'}
+            return Response(response_data, status=status.HTTP_404_NOT_FOUND)
+
+        leaderboard_entries = only_leaderboard_entry_fields(LeaderboardEntry.objects.filter(
+            challenge_phase_split=challenge_phase_split,
+            rank__gte=rank - around, rank__lte=rank + around).order_by('rank', 'id'))
+        response_data = {
+            'rank': rank,
+            'results': [format_leaderboard_entry(item, leaderboard) for item in leaderboard_entries],
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    # Search the participant teams on the leaderboard by name
+    if request.query_params.get('q'):
+        leaderboard_entries = only_leaderboard_entry_fields(LeaderboardEntry.objects.filter(
+            challenge_phase_split=challenge_phase_split,
+            participant_team__team_name__icontains=request.query_params['q']).order_by('rank', 'id'))
+        paginator, result_page = paginated_queryset(leaderboard_entries, request)
+        response_data = [format_leaderboard_entry(item, leaderboard) for item in result_page]
+        return paginator.get_paginated_response(response_data)
+
+    # Optionally rank the entries on another label of the leaderboard, or in the other direction.
+    # Every team keeps its entry, the best result on the default order by key, which is ranked on the label.
+    default_order_by = leaderboard.schema['default_order_by']
+    order_by = request.query_params.get('order_by', default_order_by)
+    order_by = order_by if order_by == default_order_by else order_by.lower()
+    direction = request.query_params.get('direction', 'desc').lower()
+    if order_by not in get_leaderboard_labels(leaderboard) + [default_order_by]:
+        response_data = {'error': 'Sorry, the leaderboard cannot be ordered by {}!'.format(order_by)}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+    if direction not in SORT_DIRECTIONS:
+        response_data = {'error': 'Sorry, direction should be one of {}!'.format(', '.join(SORT_DIRECTIONS))}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    is_default_ordering = order_by == default_order_by and direction == 'desc'
+    if is_default_ordering:
+        ordering = ['rank', 'id']
+    elif request.query_params.get('pagination') == 'cursor':
+        response_data = {'error': 'Sorry, cursor pagination is only available for the default ordering!'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        ordering = get_leaderboard_entry_ordering(order_by, direction)
+
+    def get_leaderboard_response_data():
+        # Read the best public entry of every team, ranked as the results arrived, and fetch only the requested page
+        leaderboard_entries = only_leaderboard_entry_fields(LeaderboardEntry.objects.filter(
+            challenge_phase_split=challenge_phase_split).order_by(*ordering))
+        # ranks are unique on a split, so the leaderboard can be paginated by seeking to a rank
+        paginator, result_page = paginated_queryset(leaderboard_entries, request, cursor_ordering=('rank', 'id'))
+
+        result_page = [format_leaderboard_entry(item, leaderboard) for item in result_page]
+        if not is_default_ordering:
+            # the stored ranks follow the default ordering, number the entries in the requested one instead
+            for rank, item in enumerate(result_page, paginator.page.start_index()):
+                item['rank'] = rank
+        return paginator.get_paginated_response(result_page).data
+
+    # The responses are cached under a version of the leaderboard which is bumped whenever it changes.
+    # The key is made of the known parameters only, so that unknown ones cannot fill the cache. The links
+    # to the other pages keep the query string of the request which cached the response.
+    cache_params = [(name, request.query_params[name])
+                    for name in LEADERBOARD_CACHE_QUERY_PARAMS if name in request.query_params]
+    cache_params += [('order_by', order_by), ('direction', direction)]
+    cache_url = '{}?{}'.format(request.build_absolute_uri(request.path), urlencode(cache_params))
+    cache_key = 'leaderboard_{}_{}_{}'.format(
+        challenge_phase_split.pk,
+        get_leaderboard_version(challenge_phase_split.pk),
+        hashlib.md5(cache_url.encode('utf-8')).hexdigest())
+    response_data = get_or_compute_cached(cache_key, get_leaderboard_response_data, LEADERBOARD_CACHE_TIMEOUT)
+    return Response(response_data)
+
 
-    sorted_leaderboard_data = sorted(leaderboard_data, key=lambda k: float(k['filtering_score']), reverse=True)
+@throttle_classes([AnonRateThrottle])
+@api_view(['GET'])
+def leaderboard_history(request, challenge_phase_split_id):
+    """
+    Returns the rank timeline of a participant team given with `?team=`, or the leaderboard
+    as it was at the time given with `?at=`, replayed from the leaderboard snapshots
+    """
 
-    distinct_sorted_leaderboard_data = []
-    team_list = []
+    # check if the challenge exists or not
+    try:
+        challenge_phase_split = ChallengePhaseSplit.objects.get(pk=challenge_phase_split_id)
+    except ChallengePhaseSplit.DoesNotExist:
+        response_data = {'error': 'Challenge Phase Split does not exist'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    for data in sorted_leaderboard_data:
-        if data['submission__participant_team__team_name'] in team_list:
-            continue
-        else:
-            distinct_sorted_leaderboard_data.append(data)
-            team_list.append(data['submission__participant_team__team_name'])
+    # Check if the Challenge Phase Split is publicly visible or not
+    if challenge_phase_split.visibility != ChallengePhaseSplit.PUBLIC:
+        response_data = {'error': 'Sorry, leaderboard is not public yet for this Challenge Phase Split!'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
-    leaderboard_labels = challenge_phase_split.leaderboard.schema['labels']
-    for item in distinct_sorted_leaderboard_data:
-        item['result'] = [item['result'][index.lower()] for index in leaderboard_labels]
+    if 'team' in request.query_params:
+        try:
+            participant_team_id = int(request.query_params['team'])
+        except ValueError:
+            response_data = {'error': 'team should be the id of a participant team'}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        # only the snapshots at which the rank of the team changed are returned
+        timeline = []
+        for snapshot, team_ids in iter_leaderboard_snapshots(challenge_phase_split):
+            rank = team_ids.index(participant_team_id) + 1 if participant_team_id in team_ids else None
+            if not timeline or timeline[-1]['rank'] != rank:
+                timeline.append({'timestamp': snapshot.created_at, 'rank': rank})
+        response_data = {'participant_team': participant_team_id, 'timeline': timeline}
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    try:
+        at = parse_datetime(request.query_params.get('at', ''))
+    except ValueError:
+        at = None
+    if at is None:
+        response_data = {'error': 'Either team or a valid at timestamp should be given'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+    if timezone.is_naive(at):
+        at = timezone.make_aware(at, timezone.utc)
+
+    team_ids = get_leaderboard_as_of(challenge_phase_split, at)
+    paginator, result_page = paginated_queryset(
+        [{'rank': rank, 'participant_team': team_id} for rank, team_id in enumerate(team_ids, 1)], request)
+    team_names = dict(ParticipantTeam.objects.filter(
+        pk__in=[item['participant_team'] for item in result_page]).values_list('id', 'team_name'))
+    for item in result_page:
+        item['team_name'] = team_names.get(item['participant_team'])
+    return paginator.get_paginated_response(result_page)
+
+
+def get_top_leaderboard_entries_response(request, challenge_phase_splits):
+    """
+    Returns a response with the top entries of the leaderboards of all the public challenge phase splits
+    given, read in one query and cached as a unit under the versions of the leaderboards
+    """
+    try:
+        top = int(request.query_params.get('top', DEFAULT_TOP_LEADERBOARD_ENTRIES))
+    except ValueError:
+        top = 0
+    if not 1 <= top <= MAX_TOP_LEADERBOARD_ENTRIES:
+        response_data = {'error': 'top should be a number between 1 and {}'.format(MAX_TOP_LEADERBOARD_ENTRIES)}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    challenge_phase_splits = list(challenge_phase_splits.filter(visibility=ChallengePhaseSplit.PUBLIC).select_related(
+        'leaderboard', 'dataset_split').order_by('challenge_phase', 'id'))
+
+    def get_top_leaderboard_entries_response_data():
+        leaderboard_entries = only_leaderboard_entry_fields(LeaderboardEntry.objects.filter(
+            challenge_phase_split__in=challenge_phase_splits, rank__lte=top).order_by(
+            'challenge_phase_split', 'rank', 'id'))
+        leaderboard_entries_by_split = {}
+        for leaderboard_entry in leaderboard_entries:
+            leaderboard_entries_by_split.setdefault(leaderboard_entry.challenge_phase_split_id, []).append(
+                leaderboard_entry)
+
+        return [{
+            'challenge_phase_split': challenge_phase_split.pk,
+            'challenge_phase': challenge_phase_split.challenge_phase_id,
+            'dataset_split': challenge_phase_split.dataset_split.name,
+            'leaderboard__schema': challenge_phase_split.leaderboard.schema,
+            'results': [format_leaderboard_entry(leaderboard_entry, challenge_phase_split.leaderboard)
+                        for leaderboard_entry in leaderboard_entries_by_split.get(challenge_phase_split.pk, [])],
+        } for challenge_phase_split in challenge_phase_splits]
+
+    # The responses are cached under the versions of all the leaderboards they are made of
+    leaderboard_versions = get_leaderboard_versions([split.pk for split in challenge_phase_splits])
+    leaderboard_versions = ','.join(
+        '{}:{}'.format(pk, version) for pk, version in sorted(leaderboard_versions.items()))
+    cache_key = 'top_leaderboard_entries_{}_{}'.format(
+        top, hashlib.md5(leaderboard_versions.encode('utf-8')).hexdigest())
+    response_data = get_or_compute_cached(
+        cache_key, get_top_leaderboard_entries_response_data, LEADERBOARD_CACHE_TIMEOUT)
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@throttle_classes([AnonRateThrottle])
+@api_view(['GET'])
+def challenge_leaderboards(request, challenge_id):
+    """Returns the top entries of the leaderboards of all the public challenge phase splits of a challenge"""
+
+    # check if the challenge exists or not
+    try:
+        challenge = get_cached_model_object(request, Challenge, challenge_id)
+    except Challenge.DoesNotExist:
+        response_data = {'error': 'Challenge does not exist'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    challenge_phase_splits = ChallengePhaseSplit.objects.filter(challenge_phase__challenge=challenge)
+    return get_top_leaderboard_entries_response(request, challenge_phase_splits)
+
+
+@throttle_classes([AnonRateThrottle])
+@api_view(['GET'])
+def challenge_phase_leaderboards(request, challenge_phase_id):
+    """Returns the top entries of the leaderboards of all the public challenge phase splits of a challenge phase"""
+
+    # check if the challenge phase exists or not
+    try:
+        challenge_phase = get_cached_model_object(request, ChallengePhase, challenge_phase_id)
+    except ChallengePhase.DoesNotExist:
+        response_data = {'error': 'Challenge Phase does not exist'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    challenge_phase_splits = ChallengePhaseSplit.objects.filter(challenge_phase=challenge_phase)
+    return get_top_leaderboard_entries_response(request, challenge_phase_splits)
+
+
+@throttle_classes([UserRateThrottle])
+@api_view(['POST'])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((CachedExpiringTokenAuthentication,))
+def create_submission_upload(request, challenge_id, challenge_phase_id):
+    """API Endpoint for starting a resumable upload of a submission file"""
+
+    # check if the challenge exists or not
+    try:
+        challenge = get_cached_model_object(request, Challenge, challenge_id)
+    except Challenge.DoesNotExist:
+        response_data = {'error': 'Challenge does not exist'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    # check if the challenge phase exists or not
+    try:
+        challenge_phase = get_cached_model_object(
+            request, ChallengePhase, challenge_phase_id, challenge_id=challenge.pk)
+    except ChallengePhase.DoesNotExist:
+        response_data = {'error': 'Challenge Phase does not exist'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    # check if the challenge is active or not
+    if not challenge.is_active:
+        response_data = {'error': 'Challenge is not active'}
+        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    # check if challenge phase is public and accepting solutions
+    if not challenge_phase.is_public:
+        response_data = {
+            'error': 'Sorry, cannot accept submissions since challenge phase is not public'}
+        return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+    participant_team_id = get_participant_team_id_of_user_for_a_challenge(
+        request.user, challenge_id)
+
+    quota_error = get_cached_submission_quota_error(challenge_phase, participant_team_id)
+    if quota_error:
+        response_data = {'error': quota_error}
+        return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        participant_team = ParticipantTeam.objects.get(pk=participant_team_id)
+    except ParticipantTeam.DoesNotExist:
+        response_data = {'error': 'You haven\'t participated in the challenge'}
+        return Response(response_data, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = SubmissionUploadSerializer(data=request.data)
+    if serializer.is_valid():
+        serializer.save(participant_team=participant_team,
+                        challenge_phase=challenge_phase,
+                        created_by=request.user)
+        response_data = serializer.data
+        return Response(response_data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@throttle_classes([SubmissionUploadRateThrottle])
+@api_view(['GET', 'PUT'])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((CachedExpiringTokenAuthentication,))
+def submission_upload_detail(request, upload_id):
+    """
+    API Endpoint for fetching the progress of a submission upload (GET) or
+    appending the byte range given in the `Content-Range` header to it (PUT)
+    """
+    try:
+        submission_upload = SubmissionUpload.objects.get(pk=upload_id, created_by=request.user)
+    except SubmissionUpload.DoesNotExist:
+        response_data = {'error': 'Submission upload does not exist'}
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == 'PUT':
+        content_range = CONTENT_RANGE_PATTERN.match(request.META.get('HTTP_CONTENT_RANGE', ''))
+        if not content_range:
+            response_data = {'error': 'Content-Range header of the form `bytes <start>-<end>/<total>` is required'}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        start, end, total = [int(value) for value in content_range.groups()]
+        if total != submission_upload.total_size or start > end or end >= total:
+            response_data = {'error': 'Content-Range does not match the size of the upload'}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        if end - start + 1 > settings.SUBMISSION_UPLOAD_MAX_CHUNK_SIZE:
+            response_data = {'error': 'Chunk should not be larger than {} bytes'.format(
+                settings.SUBMISSION_UPLOAD_MAX_CHUNK_SIZE)}
+            return Response(response_data, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        # the upload stays locked while the chunk is written, so that a concurrent request for the
+        # same offset waits and is then told where to resume from instead of writing over it
+        with transaction.atomic():
+            submission_upload = SubmissionUpload.objects.select_for_update().get(pk=submission_upload.pk)
+
+            if submission_upload.submission_id:
+                response_data = {'error': 'Submission upload is already finalized'}
+                return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+            if start != submission_upload.uploaded_size:
+                response_data = {'error': 'Chunk should start at byte {}'.format(submission_upload.uploaded_size),
+                                 'uploaded_size': submission_upload.uploaded_size}
+                return Response(response_data, status=status.HTTP_409_CONFLICT)
+
+            received = write_submission_upload_chunk(submission_upload, request.stream, start, end - start + 1)
+            submission_upload.uploaded_size = start + received
+            submission_upload.save(update_fields=['uploaded_size', 'modified_at'])
+
+    serializer = SubmissionUploadSerializer(submission_upload)
+    response_data = serializer.data
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@throttle_classes([UserRateThrottle])
+@api_view(['POST'])
+@permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
+@authentication_classes((CachedExpiringTokenAuthentication,))
+def finalize_submission_upload(request, upload_id):
+    """API Endpoint for creating and queueing the submission once its file is completely uploaded"""
+    with transaction.atomic():
+        try:
+            submission_upload = SubmissionUpload.objects.select_for_update().select_related(
+                'challenge_phase__challenge', 'participant_team').get(pk=upload_id, created_by=request.user)
+        except SubmissionUpload.DoesNotExist:
+            response_data = {'error': 'Submission upload does not exist'}
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        if submission_upload.submission_id:
+            response_data = {'error': 'Submission upload is already finalized'}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        if not submission_upload.is_complete:
+            response_data = {'error': 'Submission file is not uploaded completely',
+                             'uploaded_size': submission_upload.uploaded_size}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        challenge_phase = submission_upload.challenge_phase
+        challenge = challenge_phase.challenge
+
+        # check if the challenge is active or not
+        if not challenge.is_active:
+            response_data = {'error': 'Challenge is not active'}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
+
+        # check if challenge phase is public and accepting solutions
+        if not challenge_phase.is_public:
+            response_data = {
+                'error': 'Sorry, cannot accept submissions since challenge phase is not public'}
+            return Response(response_data, status=status.HTTP_406_NOT_ACCEPTABLE)
 
-    paginator, result_page = paginated_queryset(distinct_sorted_leaderboard_data, request)
-    response_data = result_page
-    return paginator.get_paginated_response(response_data)
+        submission = Submission(participant_team=submission_upload.participant_team,
+                                challenge_phase=challenge_phase,
+                                created_by=request.user,
+                                status=Submission.SUBMITTING,
+                                method_name=request.data.get('method_name'),
+                                method_description=request.data.get('method_description'),
+                                project_url=request.data.get('project_url'),
+                                publication_url=request.data.get('publication_url'))
+        with open(submission_upload.get_temporary_file_path(), 'rb') as upload_file:
+            submission.input_file = File(upload_file, name=submission_upload.file_name)
+            submission.save()
+
+        submission_upload.submission = submission
+        submission_upload.save()
+
+    delete_submission_upload_file(submission_upload)
+    # publish message in the queue
+    publish_submission_message(challenge.pk, challenge_phase.pk, submission.id)
+
+    serializer = SubmissionSerializer(submission, context={'request': request})
+    response_data = serializer.data
+    return Response(response_data, status=status.HTTP_201_CREATED)
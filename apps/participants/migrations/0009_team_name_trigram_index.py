@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.2 on 2017-06-29 10:17
+from __future__ import unicode_literals
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('participants', '0008_added_unique_in_team_name'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # serves the case insensitive `team_name__icontains` lookups, which compare UPPER(team_name)
+        migrations.RunSQL(
+            'CREATE INDEX participant_team_team_name_trgm ON participant_team '
+            'USING gin (UPPER(team_name::text) gin_trgm_ops)',
+            reverse_sql='DROP INDEX participant_team_team_name_trgm',
+        ),
+    ]
@@ -18,12 +18,6 @@ def get_participant_teams_for_user(user):
     return Participant.objects.filter(user=user).values_list('team', flat=True)
 
 
-def has_user_participated_in_challenge(user, challenge_id):
-    """Returns boolean if the user has participated in a particular challenge"""
-    participant_teams = get_participant_teams_for_user(user)
-    return Challenge.objects.filter(pk=challenge_id, participant_teams__in=participant_teams).exists()
-
-
 def get_participant_team_id_of_user_for_a_challenge(user, challenge_id):
     """Returns the participant team object for a particular user for a particular challenge"""
     participant_teams = get_participant_teams_for_user(user)
@@ -6,11 +6,10 @@ from rest_framework.decorators import (api_view,
                                        permission_classes,
                                        throttle_classes,)
 from rest_framework.response import Response
-from rest_framework_expiring_authtoken.authentication import (
-    ExpiringTokenAuthentication,)
-from rest_framework.throttling import UserRateThrottle
 
+from accounts.authentication import CachedExpiringTokenAuthentication
 from accounts.permissions import HasVerifiedEmail
+from base.throttling import UserRateThrottle
 from base.utils import paginated_queryset
 from challenges.models import Challenge
 
@@ -28,7 +27,7 @@ from .utils import (get_list_of_challenges_for_participant_team,
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def participant_team_list(request):
 
     if request.method == 'GET':
@@ -58,7 +57,7 @@ def participant_team_list(request):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def participant_team_detail(request, pk):
 
     try:
@@ -97,7 +96,7 @@ def participant_team_detail(request, pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['POST'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def invite_participant_to_team(request, pk):
 
     try:
@@ -142,7 +141,7 @@ def invite_participant_to_team(request, pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['DELETE'])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def delete_participant_from_team(request, participant_team_pk, participant_pk):
     """
     Deletes a participant from a Participant Team
@@ -177,7 +176,7 @@ def delete_participant_from_team(request, participant_team_pk, participant_pk):
 @throttle_classes([UserRateThrottle])
 @api_view(['GET', ])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def get_teams_and_corresponding_challenges_for_a_participant(request):
     """
     Returns list of teams and corresponding challenges for a participant
@@ -207,7 +206,7 @@ def get_teams_and_corresponding_challenges_for_a_participant(request):
 @throttle_classes([UserRateThrottle])
 @api_view(['DELETE', ])
 @permission_classes((permissions.IsAuthenticated, HasVerifiedEmail))
-@authentication_classes((ExpiringTokenAuthentication,))
+@authentication_classes((CachedExpiringTokenAuthentication,))
 def remove_self_from_participant_team(request, participant_team_pk):
     """
     A user can remove himself from the participant team.
@@ -8,7 +8,8 @@ from rest_framework.decorators import (api_view,
                                        permission_classes,
                                        throttle_classes,)
 from rest_framework.response import Response
-from rest_framework.throttling import AnonRateThrottle
+
+from base.throttling import AnonRateThrottle
 
 from .serializers import ContactSerializer, TeamSerializer
 
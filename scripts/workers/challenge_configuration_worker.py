@@ -0,0 +1,385 @@
+from __future__ import absolute_import
+import django
+import json
+import logging
+import os
+import pika
+import posixpath
+import sys
+import traceback
+import yaml
+import zipfile
+
+from datetime import datetime
+from os.path import dirname
+
+# need to add django project path in sys path
+# root directory : where manage.py lives
+# worker is present in root-directory/scripts/workers
+# but make sure that this worker is run like `python scripts/workers/challenge_configuration_worker.py`
+DJANGO_PROJECT_PATH = dirname(dirname(dirname(os.path.abspath(__file__))))
+
+# default settings module will be `dev`, to override it pass
+# as command line arguments
+DJANGO_SETTINGS_MODULE = 'settings.dev'
+if len(sys.argv) == 2:
+    DJANGO_SETTINGS_MODULE = sys.argv[1]
+
+logger = logging.getLogger(__name__)
+
+sys.path.insert(0, DJANGO_PROJECT_PATH)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', DJANGO_SETTINGS_MODULE)
+django.setup()
+
+from django.conf import settings                    # noqa
+from django.core.files.base import ContentFile      # noqa
+from django.db import transaction                   # noqa
+from django.utils import six, timezone              # noqa
+from django.utils.dateparse import parse_datetime   # noqa
+
+from challenges.models import (Challenge,           # noqa
+                               ChallengeConfiguration,
+                               ChallengePhase,
+                               ChallengePhaseSplit,
+                               DatasetSplit,
+                               Leaderboard,)
+from challenges.sender import publish_challenge_message     # noqa
+from challenges.utils import sync_leaderboard_data_indexes, sync_leaderboard_entry_indexes  # noqa
+from hosts.models import ChallengeHostTeam          # noqa
+
+# the fields of the challenge and its phases which can either be given in the yaml file
+# or be the path of a file of the zip holding them, e.g. `description: templates/description.html`
+CHALLENGE_TEXT_FIELDS = ('short_description', 'description', 'evaluation_details', 'terms_and_conditions',
+                         'submission_guidelines',)
+CHALLENGE_PHASE_TEXT_FIELDS = ('description',)
+
+django.db.close_old_connections()
+
+
+class ChallengeConfigurationError(Exception):
+    pass
+
+
+class ZipConfiguration(object):
+    '''
+        Reads the files of a zip configuration on demand, relative to the directory of its yaml file,
+        without extracting the whole zip.
+    '''
+
+    def __init__(self, zip_file):
+        try:
+            self.zip_file = zipfile.ZipFile(zip_file)
+        except zipfile.BadZipfile:
+            raise ChallengeConfigurationError('The challenge configuration is not a valid zip file')
+        self.names = set(self.zip_file.namelist())
+        yaml_names = sorted((name for name in self.names if name.endswith(('.yaml', '.yml'))
+                             and not name.startswith('__MACOSX/')), key=lambda name: (name.count('/'), name))
+        if not yaml_names:
+            raise ChallengeConfigurationError('There is no yaml file in the zip configuration')
+        self.yaml_name = yaml_names[0]
+        self.base_directory = posixpath.dirname(self.yaml_name)
+
+    def load_yaml(self):
+        try:
+            configuration = yaml.safe_load(self.zip_file.read(self.yaml_name))
+        except yaml.YAMLError as e:
+            raise ChallengeConfigurationError('{} is not valid yaml: {}'.format(self.yaml_name, e))
+        if not isinstance(configuration, dict):
+            raise ChallengeConfigurationError('{} should describe a challenge'.format(self.yaml_name))
+        return configuration
+
+    def get_name(self, path):
+        return posixpath.normpath(posixpath.join(self.base_directory, path))
+
+    def has_file(self, path):
+        return isinstance(path, six.string_types) and self.get_name(path) in self.names
+
+    def get_file(self, path):
+        if not self.has_file(path):
+            raise ChallengeConfigurationError('{} is not in the zip configuration'.format(path))
+        return ContentFile(self.zip_file.read(self.get_name(path)), name=posixpath.basename(path))
+
+    def get_text(self, value):
+        if self.has_file(value):
+            return self.zip_file.read(self.get_name(value)).decode('utf-8')
+        return value
+
+
+def get_date(data, key, errors, context):
+    value = data.get(key)
+    if isinstance(value, six.string_types):
+        value = parse_datetime(value)
+    if not isinstance(value, datetime):
+        errors.append('{} should have a valid {}'.format(context, key))
+        return None
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+def get_entries(configuration, key, errors, required_keys):
+    '''
+        Returns the entries of a list of the configuration by their id, recording the ones
+        which miss one of the `required_keys` or whose id is repeated.
+    '''
+    entries = configuration.get(key)
+    if not isinstance(entries, list) or not entries:
+        errors.append('The configuration should have a list of {}'.format(key))
+        return {}
+
+    entries_by_id = {}
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            errors.append('{} {} should be a mapping'.format(key, index + 1))
+            continue
+        missing_keys = [required_key for required_key in required_keys if entry.get(required_key) in (None, '')]
+        if missing_keys:
+            errors.append('{} {} misses {}'.format(key, index + 1, ', '.join(missing_keys)))
+            continue
+        if entry['id'] in entries_by_id:
+            errors.append('{} {} repeats the id {}'.format(key, index + 1, entry['id']))
+            continue
+        entries_by_id[entry['id']] = entry
+    return entries_by_id
+
+
+def build_challenge(zip_configuration, challenge_host_team, errors):
+    '''
+        Validates the configuration and builds the unsaved challenge, leaderboards, dataset splits,
+        phases and phase splits it describes, recording every problem in `errors`.
+    '''
+    configuration = zip_configuration.load_yaml()
+
+    for key in ('title', 'evaluation_script'):
+        if not configuration.get(key):
+            errors.append('The challenge should have a {}'.format(key))
+    challenge = Challenge(
+        title=configuration.get('title'),
+        creator=challenge_host_team,
+        start_date=get_date(configuration, 'start_date', errors, 'The challenge'),
+        end_date=get_date(configuration, 'end_date', errors, 'The challenge'),
+        published=bool(configuration.get('published', False)),
+        enable_forum=bool(configuration.get('enable_forum', True)),
+        anonymous_leaderboard=bool(configuration.get('anonymous_leaderboard', False)),
+    )
+    for field_name in CHALLENGE_TEXT_FIELDS:
+        setattr(challenge, field_name, zip_configuration.get_text(configuration.get(field_name)))
+    for field_name in ('image', 'evaluation_script'):
+        if configuration.get(field_name):
+            try:
+                setattr(challenge, field_name, zip_configuration.get_file(configuration[field_name]))
+            except ChallengeConfigurationError as e:
+                errors.append(str(e))
+
+    leaderboards = {}
+    for leaderboard_id, entry in get_entries(configuration, 'leaderboard', errors, ('id', 'schema')).items():
+        schema = entry['schema']
+        if (not isinstance(schema, dict) or not isinstance(schema.get('labels'), list) or
+                schema.get('default_order_by') not in schema['labels']):
+            errors.append('The schema of leaderboard {} should have labels including its default_order_by'.format(
+                leaderboard_id))
+            continue
+        leaderboards[leaderboard_id] = Leaderboard(schema=schema)
+
+    dataset_splits = {}
+    entries = get_entries(configuration, 'dataset_splits', errors, ('id', 'name', 'codename'))
+    codenames = [entry['codename'] for entry in entries.values()]
+    taken_codenames = set(DatasetSplit.objects.filter(codename__in=codenames).values_list('codename', flat=True))
+    for dataset_split_id, entry in entries.items():
+        if entry['codename'] in taken_codenames or codenames.count(entry['codename']) > 1:
+            errors.append('The codename {} of dataset split {} is already used'.format(
+                entry['codename'], dataset_split_id))
+            continue
+        dataset_splits[dataset_split_id] = DatasetSplit(name=entry['name'], codename=entry['codename'])
+
+    challenge_phases = {}
+    entries = get_entries(configuration, 'challenge_phases', errors, ('id', 'name', 'codename', 'test_annotation_file'))
+    codenames = [entry['codename'] for entry in entries.values()]
+    for challenge_phase_id, entry in entries.items():
+        context = 'Challenge phase {}'.format(challenge_phase_id)
+        if codenames.count(entry['codename']) > 1:
+            errors.append('{} repeats the codename {}'.format(context, entry['codename']))
+            continue
+        challenge_phase = ChallengePhase(
+            name=entry['name'],
+            codename=entry['codename'],
+            start_date=get_date(entry, 'start_date', errors, context),
+            end_date=get_date(entry, 'end_date', errors, context),
+            leaderboard_public=bool(entry.get('leaderboard_public', False)),
+            is_public=bool(entry.get('is_public', False)),
+            is_submission_public=bool(entry.get('is_submission_public', False)),
+        )
+        for field_name in CHALLENGE_PHASE_TEXT_FIELDS:
+            setattr(challenge_phase, field_name, zip_configuration.get_text(entry.get(field_name)) or '')
+        for field_name in ('max_submissions_per_day', 'max_submissions'):
+            if field_name in entry:
+                setattr(challenge_phase, field_name, entry[field_name])
+        try:
+            challenge_phase.test_annotation = zip_configuration.get_file(entry['test_annotation_file'])
+        except ChallengeConfigurationError as e:
+            errors.append(str(e))
+        challenge_phases[challenge_phase_id] = challenge_phase
+
+    challenge_phase_splits = []
+    visibilities = dict(ChallengePhaseSplit.VISIBILITY_OPTIONS)
+    for index, entry in enumerate(configuration.get('challenge_phase_splits') or []):
+        context = 'Challenge phase split {}'.format(index + 1)
+        if not isinstance(entry, dict):
+            errors.append('{} should be a mapping'.format(context))
+            continue
+        references = (('challenge_phase_id', challenge_phases), ('leaderboard_id', leaderboards),
+                      ('dataset_split_id', dataset_splits))
+        unknown_references = [key for key, objects in references if entry.get(key) not in objects]
+        if unknown_references:
+            errors.append('{} has an unknown {}'.format(context, ', '.join(unknown_references)))
+            continue
+        visibility = entry.get('visibility', ChallengePhaseSplit.PUBLIC)
+        if visibility not in visibilities:
+            errors.append('{} should have a visibility among {}'.format(context, sorted(visibilities)))
+            continue
+        challenge_phase_splits.append((entry, visibility))
+    if not challenge_phase_splits:
+        errors.append('The configuration should have a list of challenge_phase_splits')
+
+    return challenge, leaderboards, dataset_splits, challenge_phases, challenge_phase_splits
+
+
+def create_challenge(challenge_configuration, challenge_host_team, log):
+    '''
+        Creates the challenge described by a zip configuration with everything in it in one transaction,
+        and returns it. Raises `ChallengeConfigurationError` with all the problems of an invalid configuration.
+    '''
+    # FieldFile.open does not return the file, it opens the field file itself
+    challenge_configuration.zip_configuration.open('rb')
+    try:
+        zip_configuration = ZipConfiguration(challenge_configuration.zip_configuration)
+        log('Reading {}'.format(zip_configuration.yaml_name))
+
+        errors = []
+        challenge, leaderboards, dataset_splits, challenge_phases, challenge_phase_splits = build_challenge(
+            zip_configuration, challenge_host_team, errors)
+        if errors:
+            raise ChallengeConfigurationError('\n'.join(errors))
+
+        with transaction.atomic():
+            challenge.save()
+            log('Created challenge {}'.format(challenge.pk))
+
+            # on postgres bulk_create sets the primary keys of the objects it creates
+            Leaderboard.objects.bulk_create(leaderboards.values())
+            DatasetSplit.objects.bulk_create(dataset_splits.values())
+            for challenge_phase in challenge_phases.values():
+                challenge_phase.challenge = challenge
+            ChallengePhase.objects.bulk_create(challenge_phases.values())
+            ChallengePhaseSplit.objects.bulk_create([
+                ChallengePhaseSplit(challenge_phase=challenge_phases[entry['challenge_phase_id']],
+                                    leaderboard=leaderboards[entry['leaderboard_id']],
+                                    dataset_split=dataset_splits[entry['dataset_split_id']],
+                                    visibility=visibility)
+                for entry, visibility in challenge_phase_splits])
+            log('Created {} leaderboards, {} dataset splits, {} phases and {} phase splits'.format(
+                len(leaderboards), len(dataset_splits), len(challenge_phases), len(challenge_phase_splits)))
+
+            challenge_configuration.challenge = challenge
+            challenge_configuration.is_created = True
+            challenge_configuration.save()
+
+            # bulk_create sends no post_save signal, which indexes the data of new leaderboards
+            for leaderboard in leaderboards.values():
+                transaction.on_commit(lambda leaderboard_id=leaderboard.pk: sync_leaderboard_data_indexes(
+                    leaderboard_id))
+            transaction.on_commit(sync_leaderboard_entry_indexes)
+    finally:
+        challenge_configuration.zip_configuration.close()
+    return challenge
+
+
+def write_logs(challenge_configuration, stdout_lines, stderr_lines):
+    challenge_configuration.stdout_file.save('stdout.txt', ContentFile('\n'.join(stdout_lines)), save=False)
+    if stderr_lines:
+        challenge_configuration.stderr_file.save('stderr.txt', ContentFile('\n'.join(stderr_lines)), save=False)
+    challenge_configuration.save(update_fields=['stdout_file', 'stderr_file'])
+
+
+def process_challenge_configuration_message(message):
+    challenge_configuration_id = message.get('challenge_configuration_id')
+    challenge_host_team_id = message.get('challenge_host_team_id')
+
+    try:
+        challenge_configuration = ChallengeConfiguration.objects.get(pk=challenge_configuration_id)
+        challenge_host_team = ChallengeHostTeam.objects.get(pk=challenge_host_team_id)
+    except (ChallengeConfiguration.DoesNotExist, ChallengeHostTeam.DoesNotExist):
+        logger.critical('Challenge configuration {} or host team {} does not exist'.format(
+            challenge_configuration_id, challenge_host_team_id))
+        return
+
+    # the message can be delivered again if the worker stopped before acknowledging it
+    if challenge_configuration.is_created:
+        logger.info('The challenge of configuration {} is already created'.format(challenge_configuration_id))
+        return
+
+    stdout_lines = []
+    stderr_lines = []
+
+    def log(line):
+        logger.info(line)
+        stdout_lines.append(line)
+
+    log('Creating the challenge of configuration {}'.format(challenge_configuration_id))
+    write_logs(challenge_configuration, stdout_lines, stderr_lines)
+    try:
+        challenge = create_challenge(challenge_configuration, challenge_host_team, log)
+    except ChallengeConfigurationError as e:
+        log('The challenge configuration is invalid')
+        stderr_lines.append(str(e))
+    except Exception:
+        log('The challenge could not be created')
+        stderr_lines.append(traceback.format_exc())
+    else:
+        # so that the submission workers load the challenge
+        publish_challenge_message(challenge.pk)
+        log('Challenge {} is created'.format(challenge.pk))
+    write_logs(challenge_configuration, stdout_lines, stderr_lines)
+
+
+def process_challenge_configuration_callback(ch, method, properties, body):
+    try:
+        logger.info("[x] Received challenge configuration message %s" % body)
+        body = json.loads(body)
+        process_challenge_configuration_message(body)
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+    except Exception as e:
+        logger.error('Error in receiving message from challenge configuration queue with error {}'.format(e))
+        traceback.print_exc()
+
+
+def main():
+    connection = pika.BlockingConnection(pika.ConnectionParameters(
+        host=settings.RABBITMQ_PARAMETERS['HOST'], heartbeat_interval=0))
+
+    channel = connection.channel()
+    channel.exchange_declare(
+        exchange=settings.RABBITMQ_PARAMETERS['EVALAI_EXCHANGE']['NAME'],
+        type=settings.RABBITMQ_PARAMETERS['EVALAI_EXCHANGE']['TYPE'])
+
+    channel.queue_declare(
+        queue=settings.RABBITMQ_PARAMETERS['CHALLENGE_CONFIGURATION_QUEUE'],
+        durable=True)
+    channel.queue_bind(
+        exchange=settings.RABBITMQ_PARAMETERS['EVALAI_EXCHANGE']['NAME'],
+        queue=settings.RABBITMQ_PARAMETERS['CHALLENGE_CONFIGURATION_QUEUE'],
+        routing_key='challenge_configuration.*')
+
+    # a challenge is created at a time, the others wait in the queue for a free worker
+    channel.basic_qos(prefetch_count=1)
+    channel.basic_consume(
+        process_challenge_configuration_callback,
+        queue=settings.RABBITMQ_PARAMETERS['CHALLENGE_CONFIGURATION_QUEUE'])
+    logger.info('[*] Waiting for messages. To exit press CTRL+C')
+
+    channel.start_consuming()
+
+
+if __name__ == '__main__':
+    main()
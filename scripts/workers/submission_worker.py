@@ -48,6 +48,8 @@ from challenges.models import (Challenge,
                                ChallengePhaseSplit,
                                DatasetSplit,
                                LeaderboardData) # noqa
+from challenges.utils import (update_aggregate_leaderboard_data,  # noqa
+                              update_leaderboard_entries_for_submission,)
 
 from jobs.models import Submission          # noqa
 
@@ -357,6 +359,8 @@ def run_submission(challenge_id, challenge_phase, submission_id, submission, use
 
             if successful_submission_flag:
                 LeaderboardData.objects.bulk_create(leaderboard_data_list)
+                update_aggregate_leaderboard_data(submission)
+                update_leaderboard_entries_for_submission(submission)
 
         # Once the submission_output is processed, then save the submission object with appropriate status
         else:
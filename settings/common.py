@@ -143,6 +143,17 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = "/media/"
 
+# Stream uploaded files to a temporary file on disk instead of holding them
+# in the memory of the web worker, submission files can be large.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Chunked submission uploads are assembled here until they are finalized.
+# It has to be shared by all the app servers behind the load balancer.
+SUBMISSION_UPLOAD_DIR = os.environ.get('SUBMISSION_UPLOAD_DIR', os.path.join(BASE_DIR, 'submission_uploads'))
+SUBMISSION_UPLOAD_MAX_CHUNK_SIZE = 16 * 1024 * 1024
+
 SITE_ID = 1
 
 REST_FRAMEWORK = {
@@ -153,16 +164,17 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_expiring_authtoken.authentication.ExpiringTokenAuthentication',
+        'accounts.authentication.CachedExpiringTokenAuthentication',
     ],
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
     'DEFAULT_THROTTLE_CLASSES': (
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'base.throttling.AnonRateThrottle',
+        'base.throttling.UserRateThrottle'
     ),
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/minute',
-        'user': '100/minute'
+        'user': '100/minute',
+        'submission_upload': '600/minute'
     },
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
@@ -272,4 +284,5 @@ RABBITMQ_PARAMETERS = {
         'TYPE': 'topic',
     },
     'SUBMISSION_QUEUE': 'submission_task_queue',
+    'CHALLENGE_CONFIGURATION_QUEUE': 'challenge_configuration_task_queue',
 }
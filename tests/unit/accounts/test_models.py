@@ -1,7 +1,12 @@
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
 
+from allauth.account.models import EmailAddress
+
 from accounts.models import Profile, UserStatus
+from accounts.utils import has_verified_email
 
 
 class BaseTestCase(TestCase):
@@ -34,3 +39,27 @@ class ProfileTestCase(BaseTestCase):
 
     def test__str__(self):
         self.assertEqual('{}'.format(self.profile.user), self.profile.__str__())
+
+
+class VerifiedEmailTestCase(BaseTestCase):
+
+    def test_has_verified_email_is_cached(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            with self.assertNumQueries(1):
+                self.assertFalse(has_verified_email(self.user))
+            with self.assertNumQueries(0):
+                self.assertFalse(has_verified_email(self.user))
+
+    def test_has_verified_email_is_invalidated_when_an_email_is_verified(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            email_address = EmailAddress.objects.create(user=self.user, email='user@test.com', primary=True)
+            self.assertFalse(has_verified_email(self.user))
+
+            email_address.verified = True
+            email_address.save()
+            self.assertTrue(has_verified_email(self.user))
+
+            email_address.delete()
+            self.assertFalse(has_verified_email(self.user))
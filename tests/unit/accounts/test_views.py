@@ -1,9 +1,26 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse_lazy
 from django.contrib.auth.models import User
 
 from allauth.account.models import EmailAddress
-from rest_framework import status
-from rest_framework.test import APITestCase, APIClient
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+from rest_framework_expiring_authtoken.models import ExpiringToken
+
+from accounts.authentication import CachedExpiringTokenAuthentication, get_auth_token_cache_key
+from accounts.permissions import HasVerifiedEmail
+
+
+class AuthenticatedView(APIView):
+    authentication_classes = (CachedExpiringTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated, HasVerifiedEmail)
+    throttle_classes = ()
+
+    def get(self, request):
+        return Response({'username': request.user.username})
 
 
 class BaseAPITestClass(APITestCase):
@@ -32,3 +49,63 @@ class DisableUserTest(BaseAPITestClass):
     def test_disable_user(self):
         response = self.client.post(self.url, {})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CachedTokenAuthenticationTest(BaseAPITestClass):
+
+    url = reverse_lazy('accounts:disable_user')
+
+    def setUp(self):
+        super(CachedTokenAuthenticationTest, self).setUp()
+        self.client.force_authenticate(user=None)
+        self.token = ExpiringToken.objects.create(user=self.user)
+
+    def test_disabled_user_is_not_authenticated_with_a_cached_token(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(self.token.key))
+            response = self.client.post(self.url, {})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self.client.post(self.url, {})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cached_token_does_not_hold_the_password(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            authentication = CachedExpiringTokenAuthentication()
+            authentication.authenticate_credentials(self.token.key)
+            created, user_values = cache.get(get_auth_token_cache_key(self.token.key))
+            self.assertEqual(created, self.token.created)
+            self.assertNotIn(self.user.password, user_values)
+
+            with self.assertNumQueries(0):
+                user, token = authentication.authenticate_credentials(self.token.key)
+                self.assertEqual(user.pk, self.user.pk)
+                self.assertEqual(user.username, self.user.username)
+            # the fields which are not cached are loaded when they are used
+            with self.assertNumQueries(1):
+                self.assertEqual(user.password, self.user.password)
+
+    def test_authenticated_request_makes_no_query_once_cached(self):
+        view = AuthenticatedView.as_view()
+        request_factory = APIRequestFactory()
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            request = request_factory.get('/', HTTP_AUTHORIZATION='Token {}'.format(self.token.key))
+            self.assertEqual(view(request).data, {'username': self.user.username})
+
+            request = request_factory.get('/', HTTP_AUTHORIZATION='Token {}'.format(self.token.key))
+            with self.assertNumQueries(0):
+                response = view(request)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data, {'username': self.user.username})
+
+    def test_deleted_token_is_not_authenticated(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            CachedExpiringTokenAuthentication().authenticate_credentials(self.token.key)
+            self.token.delete()
+            self.client.credentials(HTTP_AUTHORIZATION='Token {}'.format(self.token.key))
+            response = self.client.post(self.url, {})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
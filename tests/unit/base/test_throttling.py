@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from base.throttling import AnonRateThrottle
+
+
+class ThreePerMinuteAnonRateThrottle(AnonRateThrottle):
+    rate = '3/minute'
+    now = 120.0
+
+    def timer(self):
+        return ThreePerMinuteAnonRateThrottle.now
+
+
+class ThrottledView(APIView):
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+    throttle_classes = (ThreePerMinuteAnonRateThrottle,)
+
+    def get(self, request):
+        return Response(status=status.HTTP_200_OK)
+
+
+class RacingCache(object):
+    """Cache on which another request creates the count between a missed increment and the add"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.raced = False
+
+    def incr(self, key):
+        if not self.raced:
+            self.raced = True
+            self.cache.add(key, 1)
+            raise ValueError('Key {} not found'.format(key))
+        return self.cache.incr(key)
+
+    def add(self, key, value, timeout=None):
+        return self.cache.add(key, value, timeout)
+
+
+class FixedWindowRateThrottleTestCase(TestCase):
+
+    def setUp(self):
+        self.cache_settings = self.settings(CACHES=settings.LOCMEM_CACHES)
+        self.cache_settings.enable()
+        cache.clear()
+        ThreePerMinuteAnonRateThrottle.now = 120.0
+        self.factory = APIRequestFactory()
+        self.view = ThrottledView.as_view()
+
+    def tearDown(self):
+        self.cache_settings.disable()
+
+    def get(self):
+        return self.view(self.factory.get('/', REMOTE_ADDR='127.0.0.1'))
+
+    def test_request_over_the_rate_is_throttled(self):
+        for _ in range(3):
+            self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+        response = self.get()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_wait_is_the_time_left_in_the_window(self):
+        throttle = ThreePerMinuteAnonRateThrottle()
+        request = self.factory.get('/', REMOTE_ADDR='127.0.0.1')
+        request.user = AnonymousUser()
+        for _ in range(3):
+            self.assertTrue(throttle.allow_request(request, None))
+
+        ThreePerMinuteAnonRateThrottle.now = 140.0
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertEqual(throttle.wait(), 40.0)
+
+    def test_new_window_resets_the_count(self):
+        for _ in range(3):
+            self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        ThreePerMinuteAnonRateThrottle.now = 180.0
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+
+    def test_count_created_by_another_request_is_incremented(self):
+        throttle = ThreePerMinuteAnonRateThrottle()
+        throttle.cache = RacingCache(cache)
+        self.assertEqual(throttle.increment_count('throttle_count'), 2)
+        self.assertEqual(cache.get('throttle_count'), 2)
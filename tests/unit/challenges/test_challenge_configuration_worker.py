@@ -0,0 +1,190 @@
+import io
+import json
+import os
+import shutil
+import zipfile
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from challenges.models import (Challenge, ChallengeConfiguration, ChallengePhase, ChallengePhaseSplit, DatasetSplit,
+                               Leaderboard,)
+from hosts.models import ChallengeHostTeam
+from scripts.workers.challenge_configuration_worker import (ChallengeConfigurationError, ZipConfiguration,
+                                                            build_challenge, create_challenge)
+
+
+class BaseTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='someuser',
+            email='user@test.com',
+            password='secret_password')
+        self.challenge_host_team = ChallengeHostTeam.objects.create(
+            team_name='Test Challenge Host Team',
+            created_by=self.user)
+
+        self.configuration = {
+            'title': 'Zip Challenge',
+            'description': 'templates/description.html',
+            'evaluation_script': 'evaluation_script.zip',
+            'start_date': '2017-01-01T00:00:00',
+            'end_date': '2099-01-01T00:00:00',
+            'leaderboard': [
+                {'id': 1, 'schema': {'labels': ['score'], 'default_order_by': 'score'}},
+            ],
+            'dataset_splits': [
+                {'id': 1, 'name': 'Test Split', 'codename': 'zip_test_split'},
+            ],
+            'challenge_phases': [
+                {
+                    'id': 1,
+                    'name': 'Test Phase',
+                    'codename': 'zip_test_phase',
+                    'test_annotation_file': 'annotations/test_annotations.txt',
+                    'start_date': '2017-01-01T00:00:00',
+                    'end_date': '2099-01-01T00:00:00',
+                },
+            ],
+            'challenge_phase_splits': [
+                {'challenge_phase_id': 1, 'leaderboard_id': 1, 'dataset_split_id': 1},
+            ],
+        }
+
+    def get_zip_content(self):
+        zip_content = io.BytesIO()
+        with zipfile.ZipFile(zip_content, 'w') as zip_file:
+            zip_file.writestr('challenge/challenge_config.yaml', json.dumps(self.configuration))
+            zip_file.writestr('challenge/templates/description.html', '<p>Description of the zip challenge</p>')
+            zip_file.writestr('challenge/evaluation_script.zip', 'Dummy evaluation script')
+            zip_file.writestr('challenge/annotations/test_annotations.txt', 'Dummy annotations')
+        return zip_content.getvalue()
+
+    def build_challenge(self):
+        errors = []
+        build_challenge(ZipConfiguration(io.BytesIO(self.get_zip_content())), self.challenge_host_team, errors)
+        return errors
+
+
+class BuildChallengeTestCase(BaseTestCase):
+
+    def test_build_challenge(self):
+        errors = []
+        challenge, leaderboards, dataset_splits, challenge_phases, challenge_phase_splits = build_challenge(
+            ZipConfiguration(io.BytesIO(self.get_zip_content())), self.challenge_host_team, errors)
+        self.assertEqual(errors, [])
+        self.assertEqual(challenge.title, 'Zip Challenge')
+        self.assertEqual(challenge.description, '<p>Description of the zip challenge</p>')
+        self.assertEqual(list(leaderboards.keys()), [1])
+        self.assertEqual(dataset_splits[1].codename, 'zip_test_split')
+        self.assertEqual(challenge_phases[1].codename, 'zip_test_phase')
+        self.assertEqual(len(challenge_phase_splits), 1)
+
+    def test_build_challenge_with_missing_keys(self):
+        del self.configuration['title']
+        del self.configuration['leaderboard']
+        del self.configuration['challenge_phases'][0]['codename']
+        errors = self.build_challenge()
+        self.assertIn('The challenge should have a title', errors)
+        self.assertIn('The configuration should have a list of leaderboard', errors)
+        self.assertIn('challenge_phases 1 misses codename', errors)
+
+    def test_build_challenge_with_duplicate_codenames(self):
+        DatasetSplit.objects.create(name='Existing Split', codename='existing_split')
+        self.configuration['dataset_splits'] = [
+            {'id': 1, 'name': 'Test Split', 'codename': 'existing_split'},
+            {'id': 2, 'name': 'Other Split', 'codename': 'zip_test_split'},
+            {'id': 3, 'name': 'Another Split', 'codename': 'zip_test_split'},
+        ]
+        self.configuration['challenge_phases'].append(dict(self.configuration['challenge_phases'][0], id=2))
+        errors = self.build_challenge()
+        self.assertIn('The codename existing_split of dataset split 1 is already used', errors)
+        self.assertIn('The codename zip_test_split of dataset split 2 is already used', errors)
+        self.assertIn('The codename zip_test_split of dataset split 3 is already used', errors)
+        self.assertIn('Challenge phase 1 repeats the codename zip_test_phase', errors)
+        self.assertIn('Challenge phase 2 repeats the codename zip_test_phase', errors)
+
+    def test_build_challenge_with_unknown_split_references(self):
+        self.configuration['challenge_phase_splits'].append(
+            {'challenge_phase_id': 1, 'leaderboard_id': 2, 'dataset_split_id': 1})
+        errors = self.build_challenge()
+        self.assertEqual(errors, ['Challenge phase split 2 has an unknown leaderboard_id'])
+
+    def test_build_challenge_with_bad_schema(self):
+        self.configuration['leaderboard'][0]['schema'] = {'labels': ['score'], 'default_order_by': 'accuracy'}
+        errors = self.build_challenge()
+        self.assertIn('The schema of leaderboard 1 should have labels including its default_order_by', errors)
+        # the phase split referencing the invalid leaderboard is reported too
+        self.assertIn('Challenge phase split 1 has an unknown leaderboard_id', errors)
+
+    def test_build_challenge_with_missing_file(self):
+        self.configuration['challenge_phases'][0]['test_annotation_file'] = 'annotations/missing.txt'
+        errors = self.build_challenge()
+        self.assertEqual(errors, ['annotations/missing.txt is not in the zip configuration'])
+
+    def test_zip_configuration_which_is_not_a_zip(self):
+        with self.assertRaises(ChallengeConfigurationError):
+            ZipConfiguration(io.BytesIO(b'Dummy file content'))
+
+
+class CreateChallengeTestCase(BaseTestCase):
+
+    def setUp(self):
+        super(CreateChallengeTestCase, self).setUp()
+        try:
+            os.makedirs('/tmp/evalai')
+        except OSError:
+            pass
+
+        # every file stored by a test is kept under /tmp/evalai, which is removed on tearDown
+        self.media_settings = self.settings(MEDIA_ROOT='/tmp/evalai')
+        self.media_settings.enable()
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree('/tmp/evalai')
+
+    def get_challenge_configuration(self):
+        return ChallengeConfiguration.objects.create(
+            user=self.user,
+            zip_configuration=SimpleUploadedFile('challenge.zip', self.get_zip_content(),
+                                                 content_type='application/zip'))
+
+    def test_create_challenge(self):
+        challenge_configuration = self.get_challenge_configuration()
+        log_lines = []
+        challenge = create_challenge(challenge_configuration, self.challenge_host_team, log_lines.append)
+
+        self.assertEqual(challenge.creator, self.challenge_host_team)
+        self.assertEqual(Leaderboard.objects.count(), 1)
+        self.assertEqual(DatasetSplit.objects.get().codename, 'zip_test_split')
+        challenge_phase = ChallengePhase.objects.get()
+        self.assertEqual(challenge_phase.challenge, challenge)
+        self.assertEqual(challenge_phase.test_annotation.read(), b'Dummy annotations')
+
+        challenge_phase_split = ChallengePhaseSplit.objects.get()
+        self.assertEqual(challenge_phase_split.challenge_phase, challenge_phase)
+        self.assertEqual(challenge_phase_split.leaderboard, Leaderboard.objects.get())
+        self.assertEqual(challenge_phase_split.visibility, ChallengePhaseSplit.PUBLIC)
+
+        challenge_configuration = ChallengeConfiguration.objects.get(pk=challenge_configuration.pk)
+        self.assertTrue(challenge_configuration.is_created)
+        self.assertEqual(challenge_configuration.challenge, challenge)
+        self.assertEqual(log_lines[0], 'Reading challenge/challenge_config.yaml')
+
+    def test_create_challenge_with_invalid_configuration(self):
+        del self.configuration['title']
+        self.configuration['challenge_phase_splits'][0]['dataset_split_id'] = 2
+        challenge_configuration = self.get_challenge_configuration()
+        with self.assertRaises(ChallengeConfigurationError) as context:
+            create_challenge(challenge_configuration, self.challenge_host_team, lambda line: None)
+
+        self.assertEqual(str(context.exception).split('\n'), [
+            'The challenge should have a title',
+            'Challenge phase split 1 has an unknown dataset_split_id',
+        ])
+        self.assertEqual(Challenge.objects.count(), 0)
+        self.assertEqual(Leaderboard.objects.count(), 0)
+        self.assertFalse(ChallengeConfiguration.objects.get(pk=challenge_configuration.pk).is_created)
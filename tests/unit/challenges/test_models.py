@@ -4,12 +4,18 @@ import shutil
 
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.contrib.auth.models import User
+from django.db import connection
 from django.utils import timezone
 
-from challenges.models import Challenge, ChallengePhase, ChallengePhaseSplit, DatasetSplit, Leaderboard, LeaderboardData
+from base.utils import get_cached_model_object
+from challenges.models import (Challenge, ChallengePhase, ChallengePhaseSplit, DatasetSplit, Leaderboard,
+                               LeaderboardData, LeaderboardEntry)
+from challenges.utils import get_leaderboard_data_index_name, sync_leaderboard_data_indexes, update_leaderboard_entry
 from hosts.models import ChallengeHostTeam
 from jobs.models import Submission
 from participants.models import ParticipantTeam
@@ -130,6 +136,30 @@ class ChallengeTestCase(BaseTestCase):
                          self.challenge.get_end_date())
 
 
+class CachedChallengeTestCase(BaseTestCase):
+
+    def test_cached_challenge_is_looked_up_once(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            with self.assertNumQueries(1):
+                get_cached_model_object(None, Challenge, self.challenge.pk)
+            with self.assertNumQueries(0):
+                challenge = get_cached_model_object(None, Challenge, self.challenge.pk)
+            self.assertEqual(challenge.title, self.challenge.title)
+
+    def test_cached_challenge_is_invalidated_on_save(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            get_cached_model_object(None, Challenge, self.challenge.pk)
+            self.challenge.title = 'Renamed Challenge'
+            self.challenge.save()
+            self.assertEqual(get_cached_model_object(None, Challenge, self.challenge.pk).title, 'Renamed Challenge')
+
+    def test_cached_challenge_with_other_field_values_does_not_exist(self):
+        with self.assertRaises(Challenge.DoesNotExist):
+            get_cached_model_object(None, Challenge, self.challenge.pk, creator_id=self.challenge_host_team.pk + 1)
+
+
 class DatasetSplitTestCase(BaseTestCase):
 
     def setUp(self):
@@ -184,6 +214,31 @@ class LeaderboardTestCase(BaseTestCase):
         self.assertEqual(instance_id,
                          self.leaderboard.__str__())
 
+    def test_deferred_schema_is_not_loaded(self):
+        with self.assertNumQueries(1):
+            leaderboard = Leaderboard.objects.defer('schema').get(pk=self.leaderboard.pk)
+        with self.assertNumQueries(1):
+            leaderboard.save()
+
+    def test_sync_leaderboard_data_indexes(self):
+        self.leaderboard.schema = {'labels': ['Score'], 'default_order_by': 'score'}
+        self.leaderboard.save()
+        score_index_name = get_leaderboard_data_index_name(self.leaderboard.pk, 'score')
+        sync_leaderboard_data_indexes(self.leaderboard.pk)
+        self.assertIn(score_index_name, self.get_leaderboard_data_index_names())
+
+        self.leaderboard.schema = {'labels': ['Accuracy'], 'default_order_by': 'accuracy'}
+        self.leaderboard.save()
+        sync_leaderboard_data_indexes(self.leaderboard.pk)
+        index_names = self.get_leaderboard_data_index_names()
+        self.assertNotIn(score_index_name, index_names)
+        self.assertIn(get_leaderboard_data_index_name(self.leaderboard.pk, 'accuracy'), index_names)
+
+    def get_leaderboard_data_index_names(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'leaderboard_data'")
+            return [row[0] for row in cursor.fetchall()]
+
 
 class ChallengePhaseSplitTestCase(BaseTestCase):
 
@@ -200,6 +255,13 @@ class ChallengePhaseSplitTestCase(BaseTestCase):
         self.assertEqual(string_to_compare,
                          self.challenge_phase_split.__str__())
 
+    def test_deferred_fields_are_not_loaded(self):
+        with self.assertNumQueries(1):
+            challenge_phase_splits = list(ChallengePhaseSplit.objects.only('challenge_phase', 'dataset_split'))
+        # the update and the lookup of the challenge whose bundle is invalidated, the leaderboard is not rebuilt
+        with self.assertNumQueries(2):
+            challenge_phase_splits[0].save()
+
 
 class LeaderboardDataTestCase(BaseTestCase):
 
@@ -228,3 +290,23 @@ class LeaderboardDataTestCase(BaseTestCase):
     def test__str__(self):
         self.assertEqual('{0} : {1}'.format(self.challenge_phase_split, self.submission),
                          self.leaderboard_data.__str__())
+
+    def test_non_numeric_score_is_indexed_and_ranked_last(self):
+        self.leaderboard.schema = {'labels': ['Score'], 'default_order_by': 'score'}
+        self.leaderboard.save()
+        sync_leaderboard_data_indexes(self.leaderboard.pk)
+        Submission.objects.filter(pk=self.submission.pk).update(is_public=True)
+
+        LeaderboardData.objects.create(
+            challenge_phase_split=self.challenge_phase_split,
+            submission=self.submission,
+            leaderboard=self.leaderboard,
+            result={'score': 'n/a'})
+        best_leaderboard_data = LeaderboardData.objects.create(
+            challenge_phase_split=self.challenge_phase_split,
+            submission=self.submission,
+            leaderboard=self.leaderboard,
+            result={'score': 10})
+
+        update_leaderboard_entry(self.challenge_phase_split, self.participant_team.pk)
+        self.assertEqual(LeaderboardEntry.objects.get().leaderboard_data, best_leaderboard_data)
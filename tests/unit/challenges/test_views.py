@@ -1,9 +1,13 @@
+import io
 import json
 import os
 import shutil
+import zipfile
 
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse_lazy
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import User
@@ -14,7 +18,10 @@ from allauth.account.models import EmailAddress
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
-from challenges.models import Challenge, ChallengePhase, DatasetSplit, ChallengePhaseSplit, Leaderboard
+from base.utils import get_cached_model_object
+from challenges.models import (Challenge, ChallengeConfiguration, ChallengePhase, DatasetSplit, ChallengePhaseSplit,
+                               Leaderboard,)
+from challenges.utils import get_challenge_list_cache_timeout
 from participants.models import Participant, ParticipantTeam
 from hosts.models import ChallengeHost, ChallengeHostTeam
 
@@ -79,11 +86,7 @@ class GetChallengeTest(BaseAPITestClass):
             {
                 "id": self.challenge.pk,
                 "title": self.challenge.title,
-                "description": self.challenge.description,
                 "short_description": self.challenge.short_description,
-                "terms_and_conditions": self.challenge.terms_and_conditions,
-                "submission_guidelines": self.challenge.submission_guidelines,
-                "evaluation_details": self.challenge.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -154,6 +157,54 @@ class CreateChallengeTest(BaseAPITestClass):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class CreateChallengeUsingZipFileTest(BaseAPITestClass):
+
+    def setUp(self):
+        super(CreateChallengeUsingZipFileTest, self).setUp()
+        self.url = reverse_lazy('challenges:create_challenge_using_zip_file',
+                                kwargs={'challenge_host_team_pk': self.challenge_host_team.pk})
+        zip_content = io.BytesIO()
+        with zipfile.ZipFile(zip_content, 'w') as zip_file:
+            zip_file.writestr('challenge/challenge_config.yaml', 'title: Zip Challenge')
+        self.zip_configuration = SimpleUploadedFile('challenge.zip', zip_content.getvalue(),
+                                                    content_type='application/zip')
+        try:
+            os.makedirs('/tmp/evalai')
+        except OSError:
+            pass
+
+    def tearDown(self):
+        shutil.rmtree('/tmp/evalai')
+
+    def test_create_challenge_using_zip_file(self):
+        with self.settings(MEDIA_ROOT='/tmp/evalai'):
+            response = self.client.post(self.url, {'zip_configuration': self.zip_configuration}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(response.data['is_created'])
+
+        challenge_configuration = ChallengeConfiguration.objects.get(pk=response.data['id'])
+        self.assertEqual(challenge_configuration.user, self.user)
+
+        self.url = reverse_lazy('challenges:get_challenge_configuration', kwargs={'pk': challenge_configuration.pk})
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], challenge_configuration.pk)
+
+    def test_create_challenge_using_a_file_which_is_not_a_zip(self):
+        zip_configuration = SimpleUploadedFile('challenge.zip', b'Dummy file content', content_type='application/zip')
+        with self.settings(MEDIA_ROOT='/tmp/evalai'):
+            response = self.client.post(self.url, {'zip_configuration': zip_configuration}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ChallengeConfiguration.objects.count(), 0)
+
+    def test_create_challenge_using_zip_file_when_user_is_not_a_host(self):
+        self.challenge_host.delete()
+        with self.settings(MEDIA_ROOT='/tmp/evalai'):
+            response = self.client.post(self.url, {'zip_configuration': self.zip_configuration}, format='multipart')
+        self.assertEqual(response.data, {'error': 'Sorry, you do not belong to this Host Team!'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
 class GetParticularChallenge(BaseAPITestClass):
 
     def setUp(self):
@@ -286,6 +337,20 @@ class UpdateParticularChallenge(BaseAPITestClass):
         response = self.client.put(self.url, self.data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_partial_update_of_a_cached_challenge_keeps_its_other_fields(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            get_cached_model_object(None, Challenge, self.challenge.pk)
+            # changed without invalidating the cached challenge
+            Challenge.objects.filter(pk=self.challenge.pk).update(description='Updated description')
+
+            response = self.client.patch(self.url, {'title': self.partial_update_challenge_title})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['description'], 'Updated description')
+            challenge = Challenge.objects.get(pk=self.challenge.pk)
+            self.assertEqual(challenge.title, self.partial_update_challenge_title)
+            self.assertEqual(challenge.description, 'Updated description')
+
 
 class DeleteParticularChallenge(BaseAPITestClass):
 
@@ -446,6 +511,22 @@ class MapChallengeAndParticipantTeam(BaseAPITestClass):
         self.assertEqual(response.data, expected)
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
 
+    def test_add_participant_team_with_members_to_challenge_again(self):
+        self.url = reverse_lazy('challenges:add_participant_team_to_challenge',
+                                kwargs={'challenge_pk': self.challenge.pk,
+                                        'participant_team_pk': self.participant_team2.pk})
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        expected = {
+            'error': 'Team already exists',
+            'challenge_id': self.challenge.pk,
+            'participant_team_id': self.participant_team2.pk
+        }
+        response = self.client.post(self.url, {})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
 
 class DisableChallengeTest(BaseAPITestClass):
 
@@ -481,6 +562,19 @@ class DisableChallengeTest(BaseAPITestClass):
         response = self.client.post(self.url, {})
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_disable_a_cached_challenge_keeps_its_other_fields(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            get_cached_model_object(None, Challenge, self.challenge.pk)
+            # changed without invalidating the cached challenge
+            Challenge.objects.filter(pk=self.challenge.pk).update(title='Renamed Challenge')
+
+            response = self.client.post(self.url, {})
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+            challenge = Challenge.objects.get(pk=self.challenge.pk)
+            self.assertTrue(challenge.is_disabled)
+            self.assertEqual(challenge.title, 'Renamed Challenge')
+
     def test_particular_challenge_for_disable_does_not_exist(self):
         self.url = reverse_lazy('challenges:disable_challenge',
                                 kwargs={'challenge_pk': self.challenge.pk + 2})
@@ -585,10 +679,6 @@ class GetAllChallengesTest(BaseAPITestClass):
                 "id": self.challenge3.pk,
                 "title": self.challenge3.title,
                 "short_description": self.challenge3.short_description,
-                "description": self.challenge3.description,
-                "terms_and_conditions": self.challenge3.terms_and_conditions,
-                "submission_guidelines": self.challenge3.submission_guidelines,
-                "evaluation_details": self.challenge3.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge3.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge3.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -616,10 +706,6 @@ class GetAllChallengesTest(BaseAPITestClass):
                 "id": self.challenge2.pk,
                 "title": self.challenge2.title,
                 "short_description": self.challenge2.short_description,
-                "description": self.challenge2.description,
-                "terms_and_conditions": self.challenge2.terms_and_conditions,
-                "submission_guidelines": self.challenge2.submission_guidelines,
-                "evaluation_details": self.challenge2.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge2.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge2.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -647,10 +733,6 @@ class GetAllChallengesTest(BaseAPITestClass):
                 "id": self.challenge4.pk,
                 "title": self.challenge4.title,
                 "short_description": self.challenge4.short_description,
-                "description": self.challenge4.description,
-                "terms_and_conditions": self.challenge4.terms_and_conditions,
-                "submission_guidelines": self.challenge4.submission_guidelines,
-                "evaluation_details": self.challenge4.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge4.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge4.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -678,10 +760,6 @@ class GetAllChallengesTest(BaseAPITestClass):
                 "id": self.challenge2.pk,
                 "title": self.challenge2.title,
                 "short_description": self.challenge2.short_description,
-                "description": self.challenge2.description,
-                "terms_and_conditions": self.challenge2.terms_and_conditions,
-                "submission_guidelines": self.challenge2.submission_guidelines,
-                "evaluation_details": self.challenge2.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge2.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge2.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -699,10 +777,6 @@ class GetAllChallengesTest(BaseAPITestClass):
                 "id": self.challenge3.pk,
                 "title": self.challenge3.title,
                 "short_description": self.challenge3.short_description,
-                "description": self.challenge3.description,
-                "terms_and_conditions": self.challenge3.terms_and_conditions,
-                "submission_guidelines": self.challenge3.submission_guidelines,
-                "evaluation_details": self.challenge3.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge3.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge3.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -720,10 +794,6 @@ class GetAllChallengesTest(BaseAPITestClass):
                 "id": self.challenge4.pk,
                 "title": self.challenge4.title,
                 "short_description": self.challenge4.short_description,
-                "description": self.challenge4.description,
-                "terms_and_conditions": self.challenge4.terms_and_conditions,
-                "submission_guidelines": self.challenge4.submission_guidelines,
-                "evaluation_details": self.challenge4.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge4.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge4.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -750,6 +820,88 @@ class GetAllChallengesTest(BaseAPITestClass):
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
         self.assertEqual(response.data, expected)
 
+    def test_cached_challenges_are_invalidated_when_a_challenge_is_saved(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            response = self.client.get(self.url, {}, format='json')
+            self.assertEqual([challenge['id'] for challenge in response.data['results']], [self.challenge3.pk])
+
+            self.challenge2.end_date = timezone.now() - timedelta(hours=1)
+            self.challenge2.save()
+            response = self.client.get(self.url, {}, format='json')
+            self.assertEqual(sorted(challenge['id'] for challenge in response.data['results']),
+                             sorted([self.challenge2.pk, self.challenge3.pk]))
+
+    def test_cached_challenges_are_shared_by_requests_with_unknown_parameters(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            response = self.client.get(self.url, {}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(self.url, {'unknown': 'value'}, format='json')
+            self.assertEqual([challenge['id'] for challenge in response.data['results']], [self.challenge3.pk])
+
+    def test_challenge_list_cache_timeout_is_the_next_start_or_end(self):
+        self.challenge4.start_date = timezone.now() + timedelta(hours=1)
+        self.challenge4.end_date = timezone.now() + timedelta(days=3)
+        self.challenge4.save()
+        self.assertAlmostEqual(get_challenge_list_cache_timeout(), 60 * 60, delta=5)
+
+
+class SearchChallengesTest(BaseAPITestClass):
+
+    def setUp(self):
+        super(SearchChallengesTest, self).setUp()
+        self.url = reverse_lazy('challenges:search_challenges')
+
+        self.image_challenge = Challenge.objects.create(
+            title='Visual Question Answering',
+            short_description='Answer questions about images',
+            description='Description for the visual challenge',
+            creator=self.challenge_host_team,
+            published=True,
+            start_date=timezone.now() - timedelta(days=2),
+            end_date=timezone.now() + timedelta(days=1),
+        )
+
+        self.caption_challenge = Challenge.objects.create(
+            title='Caption Generation',
+            short_description='Describe images in a sentence',
+            description='Models generate captions for questions',
+            creator=self.challenge_host_team,
+            published=True,
+            start_date=timezone.now() - timedelta(days=10),
+            end_date=timezone.now() - timedelta(days=5),
+        )
+
+    def search(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [challenge['id'] for challenge in response.data['results']]
+
+    def test_search_challenges_ranks_title_matches_first(self):
+        self.assertEqual(self.search({'q': 'questions'}), [self.image_challenge.pk, self.caption_challenge.pk])
+
+    def test_search_challenges_filters_by_challenge_time(self):
+        self.assertEqual(self.search({'q': 'images', 'challenge_time': 'past'}), [self.caption_challenge.pk])
+
+    def test_search_challenges_leaves_out_unpublished_challenges(self):
+        self.challenge.title = 'Unpublished Question Challenge'
+        self.challenge.save()
+        self.assertEqual(self.search({'q': 'question'}), [self.image_challenge.pk, self.caption_challenge.pk])
+
+    def test_search_challenges_follows_updates(self):
+        self.caption_challenge.title = 'Picture Captioning'
+        self.caption_challenge.short_description = 'Caption pictures'
+        self.caption_challenge.save()
+        self.assertEqual(self.search({'q': 'images'}), [self.image_challenge.pk])
+
+    def test_search_challenges_without_query(self):
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.data, {'error': 'A search query is required'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class GetChallengeByPk(BaseAPITestClass):
 
@@ -828,10 +980,6 @@ class GetChallengeBasedOnTeams(BaseAPITestClass):
             "id": self.challenge2.pk,
             "title": self.challenge2.title,
             "short_description": self.challenge2.short_description,
-            "description": self.challenge2.description,
-            "terms_and_conditions": self.challenge2.terms_and_conditions,
-            "submission_guidelines": self.challenge2.submission_guidelines,
-            "evaluation_details": self.challenge2.evaluation_details,
             "image": None,
             "start_date": "{0}{1}".format(self.challenge2.start_date.isoformat(), 'Z').replace("+00:00", ""),
             "end_date": "{0}{1}".format(self.challenge2.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -857,10 +1005,6 @@ class GetChallengeBasedOnTeams(BaseAPITestClass):
             "id": self.challenge2.pk,
             "title": self.challenge2.title,
             "short_description": self.challenge2.short_description,
-            "description": self.challenge2.description,
-            "terms_and_conditions": self.challenge2.terms_and_conditions,
-            "submission_guidelines": self.challenge2.submission_guidelines,
-            "evaluation_details": self.challenge2.evaluation_details,
             "image": None,
             "start_date": "{0}{1}".format(self.challenge2.start_date.isoformat(), 'Z').replace("+00:00", ""),
             "end_date": "{0}{1}".format(self.challenge2.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -886,10 +1030,6 @@ class GetChallengeBasedOnTeams(BaseAPITestClass):
             "id": self.challenge2.pk,
             "title": self.challenge2.title,
             "short_description": self.challenge2.short_description,
-            "description": self.challenge2.description,
-            "terms_and_conditions": self.challenge2.terms_and_conditions,
-            "submission_guidelines": self.challenge2.submission_guidelines,
-            "evaluation_details": self.challenge2.evaluation_details,
             "image": None,
             "start_date": "{0}{1}".format(self.challenge2.start_date.isoformat(), 'Z').replace("+00:00", ""),
             "end_date": "{0}{1}".format(self.challenge2.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -916,10 +1056,6 @@ class GetChallengeBasedOnTeams(BaseAPITestClass):
                 "id": self.challenge.pk,
                 "title": self.challenge.title,
                 "short_description": self.challenge.short_description,
-                "description": self.challenge.description,
-                "terms_and_conditions": self.challenge.terms_and_conditions,
-                "submission_guidelines": self.challenge.submission_guidelines,
-                "evaluation_details": self.challenge.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -937,10 +1073,6 @@ class GetChallengeBasedOnTeams(BaseAPITestClass):
                 "id": self.challenge2.pk,
                 "title": self.challenge2.title,
                 "short_description": self.challenge2.short_description,
-                "description": self.challenge2.description,
-                "terms_and_conditions": self.challenge2.terms_and_conditions,
-                "submission_guidelines": self.challenge2.submission_guidelines,
-                "evaluation_details": self.challenge2.evaluation_details,
                 "image": None,
                 "start_date": "{0}{1}".format(self.challenge2.start_date.isoformat(), 'Z').replace("+00:00", ""),
                 "end_date": "{0}{1}".format(self.challenge2.end_date.isoformat(), 'Z').replace("+00:00", ""),
@@ -1283,6 +1415,19 @@ class UpdateParticularChallengePhase(BaseChallengePhaseClass):
         response = self.client.put(self.url, self.data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_partial_update_of_a_cached_challenge_phase_keeps_its_other_fields(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            get_cached_model_object(None, ChallengePhase, self.challenge_phase.pk)
+            # changed without invalidating the cached phase
+            ChallengePhase.objects.filter(pk=self.challenge_phase.pk).update(description='Updated description')
+
+            response = self.client.patch(self.url, {'name': self.partial_update_challenge_phase_name})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            challenge_phase = ChallengePhase.objects.get(pk=self.challenge_phase.pk)
+            self.assertEqual(challenge_phase.name, self.partial_update_challenge_phase_name)
+            self.assertEqual(challenge_phase.description, 'Updated description')
+
     def test_particular_challenge_update_when_user_is_not_authenticated(self):
         self.client.force_authenticate(user=None)
 
@@ -1391,3 +1536,65 @@ class GetChallengePhaseSplitTest(BaseChallengePhaseSplitClass):
         response = self.client.get(self.url, {})
         self.assertEqual(response.data, expected)
         self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+
+
+class GetChallengeBundleTest(BaseChallengePhaseSplitClass):
+
+    def setUp(self):
+        super(GetChallengeBundleTest, self).setUp()
+        self.url = reverse_lazy('challenges:get_challenge_bundle',
+                                kwargs={'pk': self.challenge.pk})
+
+    def test_get_challenge_bundle(self):
+        # the challenge with its host team, its phases, its splits and the cache timeout
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['challenge']['id'], self.challenge.pk)
+        self.assertEqual(response.data['challenge']['creator'], {
+            'id': self.challenge_host_team.pk,
+            'team_name': self.challenge_host_team.team_name,
+            'created_by': self.user.username,
+        })
+        self.assertEqual([phase['id'] for phase in response.data['challenge_phases']], [self.challenge_phase.pk])
+        expected = [
+            {
+                "id": self.challenge_phase_split.id,
+                "challenge_phase": self.challenge_phase.id,
+                "challenge_phase_name": self.challenge_phase.name,
+                "dataset_split": self.dataset_split.id,
+                "dataset_split_name": self.dataset_split.name,
+                "visibility": self.challenge_phase_split.visibility,
+            }
+        ]
+        self.assertEqual(response.data['challenge_phase_splits'], expected)
+
+    def test_get_challenge_bundle_is_invalidated_when_a_related_object_changes(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            response = self.client.get(self.url, {})
+            self.assertEqual(response.data['challenge_phase_splits'][0]['dataset_split_name'], "Test Dataset Split")
+
+            # the query parameters are left out of the cache key
+            with self.assertNumQueries(0):
+                self.client.get(self.url, {'unknown': 'value'})
+
+            self.dataset_split.name = "Renamed Dataset Split"
+            self.dataset_split.save()
+            response = self.client.get(self.url, {})
+            self.assertEqual(response.data['challenge_phase_splits'][0]['dataset_split_name'], "Renamed Dataset Split")
+
+            self.challenge_host_team.team_name = "Renamed Host Team"
+            self.challenge_host_team.save()
+            response = self.client.get(self.url, {})
+            self.assertEqual(response.data['challenge']['creator']['team_name'], "Renamed Host Team")
+
+    def test_get_challenge_bundle_when_challenge_does_not_exist(self):
+        self.url = reverse_lazy('challenges:get_challenge_bundle',
+                                kwargs={'pk': self.challenge.pk + 10})
+        expected = {
+            'error': 'Challenge does not exist!'
+        }
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
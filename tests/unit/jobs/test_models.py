@@ -4,13 +4,15 @@ import shutil
 from datetime import timedelta
 
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
 
 from challenges.models import Challenge, ChallengePhase
 from hosts.models import ChallengeHostTeam
-from jobs.models import Submission
+from jobs.models import FileBlob, Submission
 from participants.models import ParticipantTeam
 
 
@@ -44,20 +46,24 @@ class BaseTestCase(TestCase):
         except OSError:
             pass
 
-        with self.settings(MEDIA_ROOT='/tmp/evalai'):
-            self.challenge_phase = ChallengePhase.objects.create(
-                name='Challenge Phase',
-                description='Description for Challenge Phase',
-                leaderboard_public=False,
-                is_public=True,
-                start_date=timezone.now() - timedelta(days=2),
-                end_date=timezone.now() + timedelta(days=1),
-                challenge=self.challenge,
-                test_annotation=SimpleUploadedFile('test_sample_file.txt',
-                                                   'Dummy file content', content_type='text/plain')
-            )
+        # every file stored by a test is kept under /tmp/evalai, which is removed on tearDown
+        self.media_settings = self.settings(MEDIA_ROOT='/tmp/evalai')
+        self.media_settings.enable()
+
+        self.challenge_phase = ChallengePhase.objects.create(
+            name='Challenge Phase',
+            description='Description for Challenge Phase',
+            leaderboard_public=False,
+            is_public=True,
+            start_date=timezone.now() - timedelta(days=2),
+            end_date=timezone.now() + timedelta(days=1),
+            challenge=self.challenge,
+            test_annotation=SimpleUploadedFile('test_sample_file.txt',
+                                               'Dummy file content', content_type='text/plain')
+        )
 
     def tearDown(self):
+        self.media_settings.disable()
         shutil.rmtree('/tmp/evalai')
 
 
@@ -77,3 +83,98 @@ class SubmissionTestCase(BaseTestCase):
 
     def test__str__(self):
         self.assertEqual('{}'.format(self.submission.id), self.submission.__str__())
+
+    def test_input_file_is_stored_once_per_content(self):
+        submissions = [
+            Submission.objects.create(
+                participant_team=self.participant_team,
+                challenge_phase=self.challenge_phase,
+                created_by=self.challenge_host_team.created_by,
+                status='submitted',
+                input_file=SimpleUploadedFile('input.txt', 'Same content', content_type='text/plain'),
+            ) for _ in range(2)
+        ]
+        self.assertEqual(submissions[0].input_file.name, submissions[1].input_file.name)
+        self.assertTrue(submissions[0].input_file.name.startswith('blobs/'))
+        self.assertEqual(FileBlob.objects.get(name=submissions[0].input_file.name).reference_count, 2)
+
+        submissions[1].delete()
+        self.assertEqual(FileBlob.objects.get(name=submissions[0].input_file.name).reference_count, 1)
+
+    def test_blob_saved_again_is_not_copied(self):
+        self.submission.stdout_file.save('stdout.txt', ContentFile('Output'))
+        blob_name = self.submission.stdout_file.name
+
+        # the content is still stored although its blob is not counted anymore
+        FileBlob.objects.filter(name=blob_name).delete()
+        submission = Submission.objects.get(pk=self.submission.pk)
+        submission.stdout_file.save('stdout.txt', ContentFile('Output'))
+        self.assertEqual(submission.stdout_file.name, blob_name)
+        self.assertEqual(os.listdir(os.path.dirname(submission.stdout_file.path)),
+                         [os.path.basename(blob_name)])
+
+    def test_get_submissions_with_same_input_file(self):
+        submissions = [
+            Submission.objects.create(
+                participant_team=self.participant_team,
+                challenge_phase=self.challenge_phase,
+                created_by=self.challenge_host_team.created_by,
+                status='submitted',
+                input_file=SimpleUploadedFile(file_name, content, content_type='text/plain'),
+            ) for file_name, content in (('input.txt', 'Same content'), ('other_name.txt', 'Same content'),
+                                         ('input.txt', 'Other content'))
+        ]
+        self.assertEqual(list(submissions[0].get_submissions_with_same_input_file()), [submissions[1]])
+        self.assertEqual(list(submissions[2].get_submissions_with_same_input_file()), [])
+
+    def test_overwritten_file_is_released(self):
+        self.submission.stdout_file.save('stdout.txt', ContentFile('First output'))
+        first_name = self.submission.stdout_file.name
+
+        # the same content saved again keeps a single reference
+        submission = Submission.objects.get(pk=self.submission.pk)
+        submission.stdout_file.save('stdout.txt', ContentFile('First output'))
+        self.assertEqual(FileBlob.objects.get(name=first_name).reference_count, 1)
+
+        submission.stdout_file.save('stdout.txt', ContentFile('Second output'))
+        self.assertEqual(FileBlob.objects.get(name=first_name).reference_count, 0)
+        self.assertEqual(FileBlob.objects.get(name=submission.stdout_file.name).reference_count, 1)
+
+    def test_submission_number_is_incremented_per_participant_team(self):
+        submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.challenge_host_team.created_by,
+            status='submitted',
+            input_file=self.challenge_phase.test_annotation,
+        )
+        self.assertEqual(self.submission.submission_number, 1)
+        self.assertEqual(submission.submission_number, 2)
+
+    def test_max_submissions_is_enforced(self):
+        self.challenge_phase.max_submissions = 1
+        self.challenge_phase.save()
+
+        with self.assertRaises(PermissionDenied):
+            Submission.objects.create(
+                participant_team=self.participant_team,
+                challenge_phase=self.challenge_phase,
+                created_by=self.challenge_host_team.created_by,
+                status='submitted',
+                input_file=self.challenge_phase.test_annotation,
+            )
+
+    def test_failed_submissions_are_not_counted_in_max_submissions_per_day(self):
+        self.challenge_phase.max_submissions_per_day = 1
+        self.challenge_phase.save()
+        self.submission.status = Submission.FAILED
+        self.submission.save()
+
+        submission = Submission.objects.create(
+            participant_team=self.participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.challenge_host_team.created_by,
+            status='submitted',
+            input_file=self.challenge_phase.test_annotation,
+        )
+        self.assertEqual(submission.submission_number, 2)
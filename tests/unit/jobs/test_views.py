@@ -3,6 +3,8 @@ import shutil
 
 from datetime import timedelta
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse_lazy
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth.models import User
@@ -12,9 +14,14 @@ from allauth.account.models import EmailAddress
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
-from challenges.models import Challenge, ChallengePhase
+from challenges.models import (Challenge, ChallengePhase, ChallengePhaseSplit, DatasetSplit, Leaderboard,
+                               LeaderboardData, LeaderboardEntry)
+from challenges.utils import (compute_aggregate_result, rebuild_leaderboard_entries, repair_leaderboard_entries,
+                              take_leaderboard_snapshot, update_aggregate_leaderboard_data,
+                              update_leaderboard_entries_for_submission)
 from hosts.models import ChallengeHostTeam
-from jobs.models import Submission
+from jobs.models import Submission, SubmissionUpload
+from jobs.utils import clear_submission_quota_counts, get_submission_quota_version, set_submission_quota_counts
 from participants.models import ParticipantTeam, Participant
 
 
@@ -75,18 +82,21 @@ class BaseAPITestClass(APITestCase):
         except OSError:
             pass
 
-        with self.settings(MEDIA_ROOT='/tmp/evalai'):
-            self.challenge_phase = ChallengePhase.objects.create(
-                name='Challenge Phase',
-                description='Description for Challenge Phase',
-                leaderboard_public=False,
-                is_public=True,
-                start_date=timezone.now() - timedelta(days=2),
-                end_date=timezone.now() + timedelta(days=1),
-                challenge=self.challenge,
-                test_annotation=SimpleUploadedFile('test_sample_file.txt',
-                                                   'Dummy file content', content_type='text/plain')
-            )
+        # every file stored by a test is kept under /tmp/evalai, which is removed on tearDown
+        self.media_settings = self.settings(MEDIA_ROOT='/tmp/evalai')
+        self.media_settings.enable()
+
+        self.challenge_phase = ChallengePhase.objects.create(
+            name='Challenge Phase',
+            description='Description for Challenge Phase',
+            leaderboard_public=False,
+            is_public=True,
+            start_date=timezone.now() - timedelta(days=2),
+            end_date=timezone.now() + timedelta(days=1),
+            challenge=self.challenge,
+            test_annotation=SimpleUploadedFile('test_sample_file.txt',
+                                               'Dummy file content', content_type='text/plain')
+        )
 
         self.url = reverse_lazy('jobs:challenge_submission',
                                 kwargs={'challenge_id': self.challenge.pk,
@@ -98,6 +108,7 @@ class BaseAPITestClass(APITestCase):
             "dummy_input.txt", "file_content", content_type="text/plain")
 
     def tearDown(self):
+        self.media_settings.disable()
         shutil.rmtree('/tmp/evalai')
 
     def test_challenge_submission_when_challenge_does_not_exist(self):
@@ -260,6 +271,47 @@ class BaseAPITestClass(APITestCase):
                                     'status': 'submitting', 'input_file': self.input_file}, format="multipart")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_challenge_submission_when_cached_quota_is_exhausted(self):
+        self.url = reverse_lazy('jobs:challenge_submission',
+                                kwargs={'challenge_id': self.challenge.pk,
+                                        'challenge_phase_id': self.challenge_phase.pk})
+
+        self.challenge.participant_teams.add(self.participant_team)
+        self.challenge.save()
+
+        expected = {
+            'error': 'The maximum number of submission for today has been reached'
+        }
+
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            set_submission_quota_counts(self.challenge_phase, self.participant_team.pk,
+                                        self.challenge_phase.max_submissions_per_day,
+                                        self.challenge_phase.max_submissions_per_day)
+            response = self.client.post(self.url, {
+                                        'status': 'submitting', 'input_file': self.input_file}, format="multipart")
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_challenge_submission_when_stale_quota_is_cached_after_it_was_cleared(self):
+        self.url = reverse_lazy('jobs:challenge_submission',
+                                kwargs={'challenge_id': self.challenge.pk,
+                                        'challenge_phase_id': self.challenge_phase.pk})
+
+        self.challenge.participant_teams.add(self.participant_team)
+        self.challenge.save()
+
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            version = get_submission_quota_version(self.challenge_phase.pk, self.participant_team.pk)
+            # a submission failed before the counts read under `version` were cached
+            clear_submission_quota_counts(self.challenge_phase.pk, self.participant_team.pk)
+            set_submission_quota_counts(self.challenge_phase, self.participant_team.pk,
+                                        self.challenge_phase.max_submissions_per_day,
+                                        self.challenge_phase.max_submissions_per_day, version)
+            response = self.client.post(self.url, {
+                                        'status': 'submitting', 'input_file': self.input_file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
 
 class GetChallengeSubmissionTest(BaseAPITestClass):
 
@@ -371,3 +423,433 @@ class GetChallengeSubmissionTest(BaseAPITestClass):
         response = self.client.get(self.url, {})
         self.assertEqual(response.data['results'], expected)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class SubmissionUploadTest(BaseAPITestClass):
+
+    def setUp(self):
+        super(SubmissionUploadTest, self).setUp()
+        self.challenge.participant_teams.add(self.participant_team)
+        self.url = reverse_lazy('jobs:create_submission_upload',
+                                kwargs={'challenge_id': self.challenge.pk,
+                                        'challenge_phase_id': self.challenge_phase.pk})
+
+        # received chunks are kept under /tmp/evalai too
+        self.upload_settings = self.settings(SUBMISSION_UPLOAD_DIR='/tmp/evalai/submission_uploads')
+        self.upload_settings.enable()
+
+    def tearDown(self):
+        self.upload_settings.disable()
+        super(SubmissionUploadTest, self).tearDown()
+
+    def create_submission_upload(self):
+        response = self.client.post(self.url, {'file_name': 'dummy_input.txt', 'total_size': 10})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_create_submission_upload(self):
+        response = self.client.post(self.url, {'file_name': 'dummy_input.txt', 'total_size': 10})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['uploaded_size'], 0)
+        self.assertEqual(response.data['participant_team'], self.participant_team.pk)
+
+    def test_create_submission_upload_when_participant_team_hasnt_participated_in_challenge(self):
+        self.challenge.participant_teams.remove(self.participant_team)
+        expected = {
+            'error': 'You haven\'t participated in the challenge'
+        }
+        response = self.client.post(self.url, {'file_name': 'dummy_input.txt', 'total_size': 10})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_upload_chunks(self):
+        upload_id = self.create_submission_upload()
+        url = reverse_lazy('jobs:submission_upload_detail', kwargs={'upload_id': upload_id})
+
+        response = self.client.put(url, b'01234', content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE='bytes 0-4/10')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['uploaded_size'], 5)
+
+        # resending an old chunk tells the client where to resume from and leaves the file as it is
+        response = self.client.put(url, b'abcde', content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE='bytes 0-4/10')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['uploaded_size'], 5)
+
+        response = self.client.put(url, b'56789', content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE='bytes 5-9/10')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['uploaded_size'], 10)
+
+        with open(SubmissionUpload.objects.get(pk=upload_id).get_temporary_file_path(), 'rb') as f:
+            self.assertEqual(f.read(), b'0123456789')
+
+    def test_upload_chunk_without_content_range(self):
+        upload_id = self.create_submission_upload()
+        url = reverse_lazy('jobs:submission_upload_detail', kwargs={'upload_id': upload_id})
+
+        expected = {
+            'error': 'Content-Range header of the form `bytes <start>-<end>/<total>` is required'
+        }
+        response = self.client.put(url, b'01234', content_type='application/octet-stream')
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_finalize_incomplete_submission_upload(self):
+        upload_id = self.create_submission_upload()
+        url = reverse_lazy('jobs:finalize_submission_upload', kwargs={'upload_id': upload_id})
+
+        expected = {
+            'error': 'Submission file is not uploaded completely',
+            'uploaded_size': 0
+        }
+        response = self.client.post(url, {})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.assertFalse(Submission.objects.exists())
+
+    def test_finalize_submission_upload(self):
+        upload_id = self.create_submission_upload()
+        url = reverse_lazy('jobs:submission_upload_detail', kwargs={'upload_id': upload_id})
+        response = self.client.put(url, b'0123456789', content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE='bytes 0-9/10')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = reverse_lazy('jobs:finalize_submission_upload', kwargs={'upload_id': upload_id})
+        response = self.client.post(url, {'method_name': 'Test Method'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        submission = Submission.objects.get()
+        submission_upload = SubmissionUpload.objects.get(pk=upload_id)
+        self.assertEqual(response.data['id'], submission.pk)
+        self.assertEqual(submission_upload.submission, submission)
+        self.assertEqual(submission.participant_team, self.participant_team)
+        self.assertEqual(submission.challenge_phase, self.challenge_phase)
+        self.assertEqual(submission.created_by, self.user1)
+        self.assertEqual(submission.status, Submission.SUBMITTED)
+        self.assertEqual(submission.method_name, 'Test Method')
+        self.assertEqual(submission.submission_number, 1)
+        self.assertEqual(submission.input_file.read(), b'0123456789')
+        submission.input_file.close()
+        self.assertFalse(os.path.exists(submission_upload.get_temporary_file_path()))
+
+        # a finalized upload cannot be finalized again
+        response = self.client.post(url, {})
+        self.assertEqual(response.data, {'error': 'Submission upload is already finalized'})
+        self.assertEqual(response.status_code, status.HTTP_406_NOT_ACCEPTABLE)
+        self.assertEqual(Submission.objects.count(), 1)
+
+
+class LeaderboardTest(BaseAPITestClass):
+
+    def setUp(self):
+        super(LeaderboardTest, self).setUp()
+        self.challenge_phase.is_submission_public = True
+        self.challenge_phase.save()
+
+        self.participant_team2 = ParticipantTeam.objects.create(
+            team_name='Another Participant Team for Challenge',
+            created_by=self.user)
+
+        self.dataset_split = DatasetSplit.objects.create(name='Test Dataset Split', codename='test-split')
+
+        self.leaderboard = Leaderboard.objects.create(schema={'labels': ['Score'], 'default_order_by': 'score'})
+
+        self.challenge_phase_split = ChallengePhaseSplit.objects.create(
+            dataset_split=self.dataset_split,
+            challenge_phase=self.challenge_phase,
+            leaderboard=self.leaderboard,
+            visibility=ChallengePhaseSplit.PUBLIC)
+
+        self.url = reverse_lazy('jobs:leaderboard',
+                                kwargs={'challenge_phase_split_id': self.challenge_phase_split.pk})
+
+    def create_leaderboard_data(self, participant_team, score):
+        submission = Submission.objects.create(
+            participant_team=participant_team,
+            challenge_phase=self.challenge_phase,
+            created_by=self.user1,
+            status='submitted',
+            input_file=self.challenge_phase.test_annotation)
+        leaderboard_data = LeaderboardData.objects.create(
+            challenge_phase_split=self.challenge_phase_split,
+            submission=submission,
+            leaderboard=self.leaderboard,
+            result={'score': score})
+        update_leaderboard_entries_for_submission(submission)
+        return leaderboard_data
+
+    def test_leaderboard_ranks_best_entry_of_every_team(self):
+        self.create_leaderboard_data(self.participant_team, 50)
+        best_leaderboard_data = self.create_leaderboard_data(self.participant_team, 80)
+        other_leaderboard_data = self.create_leaderboard_data(self.participant_team2, 60)
+
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([(item['id'], item['result']) for item in response.data['results']],
+                         [(best_leaderboard_data.id, [80]), (other_leaderboard_data.id, [60])])
+
+    def test_leaderboard_promotes_next_best_entry_when_best_leaderboard_data_is_deleted(self):
+        next_best_leaderboard_data = self.create_leaderboard_data(self.participant_team, 50)
+        best_leaderboard_data = self.create_leaderboard_data(self.participant_team, 80)
+        other_leaderboard_data = self.create_leaderboard_data(self.participant_team2, 60)
+
+        best_leaderboard_data.delete()
+        # the leaderboard is repaired once the transaction deleting the data commits
+        repair_leaderboard_entries(self.challenge_phase_split)
+
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(item['id'], item['result'], item['rank']) for item in response.data['results']],
+                         [(other_leaderboard_data.id, [60], 1), (next_best_leaderboard_data.id, [50], 2)])
+
+    def test_leaderboard_drops_entry_of_submission_made_private(self):
+        self.create_leaderboard_data(self.participant_team, 50)
+        best_leaderboard_data = self.create_leaderboard_data(self.participant_team, 80)
+        best_leaderboard_data.submission.is_public = False
+        best_leaderboard_data.submission.save()
+        update_leaderboard_entries_for_submission(best_leaderboard_data.submission)
+
+        response = self.client.get(self.url, {})
+        self.assertEqual([item['result'] for item in response.data['results']], [[50]])
+
+    def test_rebuilt_leaderboard_entries_match_incremental_updates(self):
+        self.create_leaderboard_data(self.participant_team, 50)
+        self.create_leaderboard_data(self.participant_team2, 60)
+        self.create_leaderboard_data(self.participant_team, 70)
+        expected = list(LeaderboardEntry.objects.order_by('rank').values_list('leaderboard_data', 'rank'))
+
+        rebuild_leaderboard_entries(self.challenge_phase_split)
+        self.assertEqual(list(LeaderboardEntry.objects.order_by('rank').values_list('leaderboard_data', 'rank')),
+                         expected)
+
+    def test_cached_leaderboard_is_invalidated_by_new_results(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            self.create_leaderboard_data(self.participant_team, 50)
+            response = self.client.get(self.url, {})
+            self.assertEqual([item['result'] for item in response.data['results']], [[50]])
+
+            # served from the cache as long as the leaderboard has not changed
+            LeaderboardEntry.objects.update(result={'score': 55})
+            response = self.client.get(self.url, {})
+            self.assertEqual([item['result'] for item in response.data['results']], [[50]])
+
+            self.create_leaderboard_data(self.participant_team2, 60)
+            response = self.client.get(self.url, {})
+            self.assertEqual([item['result'] for item in response.data['results']], [[60], [55]])
+
+    def test_cached_leaderboard_is_shared_by_requests_with_unknown_parameters(self):
+        with self.settings(CACHES=settings.LOCMEM_CACHES):
+            cache.clear()
+            self.create_leaderboard_data(self.participant_team, 50)
+            response = self.client.get(self.url, {})
+            self.assertEqual([item['result'] for item in response.data['results']], [[50]])
+
+            LeaderboardEntry.objects.update(result={'score': 55})
+            response = self.client.get(self.url, {'junk': 'value'})
+            self.assertEqual([item['result'] for item in response.data['results']], [[50]])
+
+            # known parameters still get their own response
+            response = self.client.get(self.url, {'direction': 'asc'})
+            self.assertEqual([item['result'] for item in response.data['results']], [[55]])
+
+    def test_leaderboard_ties_are_broken_by_submission_time(self):
+        first_leaderboard_data = self.create_leaderboard_data(self.participant_team2, 60)
+        second_leaderboard_data = self.create_leaderboard_data(self.participant_team, 60)
+
+        response = self.client.get(self.url, {})
+        self.assertEqual([item['id'] for item in response.data['results']],
+                         [first_leaderboard_data.id, second_leaderboard_data.id])
+
+    def test_leaderboard_ordered_by_label_in_ascending_direction(self):
+        self.create_leaderboard_data(self.participant_team, 80)
+        self.create_leaderboard_data(self.participant_team2, 60)
+
+        response = self.client.get(self.url, {'order_by': 'Score', 'direction': 'asc'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(item['result'], item['rank']) for item in response.data['results']],
+                         [([60], 1), ([80], 2)])
+
+        # entries are ranked in the requested ordering across pages
+        with self.settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, PAGE_SIZE=1)):
+            response = self.client.get(self.url, {'order_by': 'Score', 'direction': 'asc', 'page': 2})
+        self.assertEqual([(item['result'], item['rank']) for item in response.data['results']], [([80], 2)])
+
+    def test_leaderboard_with_cursor_pagination(self):
+        self.create_leaderboard_data(self.participant_team, 80)
+        self.create_leaderboard_data(self.participant_team2, 60)
+
+        with self.settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, PAGE_SIZE=1)):
+            response = self.client.get(self.url, {'pagination': 'cursor', 'count': 'true'})
+            self.assertEqual(response.data['count'], 2)
+            self.assertEqual([item['result'] for item in response.data['results']], [[80]])
+
+            response = self.client.get(response.data['next'])
+            self.assertNotIn('count', response.data)
+            self.assertEqual([item['result'] for item in response.data['results']], [[60]])
+            self.assertIsNone(response.data['next'])
+
+    def test_leaderboard_ordered_by_unknown_label(self):
+        response = self.client.get(self.url, {'order_by': 'accuracy'})
+        self.assertEqual(response.data, {'error': 'Sorry, the leaderboard cannot be ordered by accuracy!'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_challenge_phase_leaderboards_returns_top_entries_of_public_splits(self):
+        ChallengePhaseSplit.objects.create(
+            dataset_split=DatasetSplit.objects.create(name='Private Dataset Split', codename='private-split'),
+            challenge_phase=self.challenge_phase,
+            leaderboard=self.leaderboard,
+            visibility=ChallengePhaseSplit.HOST)
+        best_leaderboard_data = self.create_leaderboard_data(self.participant_team, 80)
+        self.create_leaderboard_data(self.participant_team2, 60)
+
+        url = reverse_lazy('jobs:challenge_phase_leaderboards',
+                           kwargs={'challenge_phase_id': self.challenge_phase.pk})
+        response = self.client.get(url, {'top': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['challenge_phase_split'] for item in response.data],
+                         [self.challenge_phase_split.pk])
+        self.assertEqual([(item['id'], item['result']) for item in response.data[0]['results']],
+                         [(best_leaderboard_data.id, [80])])
+
+    def test_challenge_leaderboards_with_invalid_top(self):
+        url = reverse_lazy('jobs:challenge_leaderboards', kwargs={'challenge_id': self.challenge.pk})
+        response = self.client.get(url, {'top': 'all'})
+        self.assertEqual(response.data, {'error': 'top should be a number between 1 and 100'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_leaderboard_history(self):
+        self.create_leaderboard_data(self.participant_team, 50)
+        first_snapshot = take_leaderboard_snapshot(self.challenge_phase_split)
+        self.assertIsNone(take_leaderboard_snapshot(self.challenge_phase_split))
+        self.create_leaderboard_data(self.participant_team2, 60)
+        second_snapshot = take_leaderboard_snapshot(self.challenge_phase_split)
+        self.assertFalse(second_snapshot.is_keyframe)
+        self.assertEqual(second_snapshot.ranks, [self.participant_team2.pk, 1])
+
+        url = reverse_lazy('jobs:leaderboard_history',
+                           kwargs={'challenge_phase_split_id': self.challenge_phase_split.pk})
+        response = self.client.get(url, {'team': self.participant_team.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([point['rank'] for point in response.data['timeline']], [1, 2])
+
+        response = self.client.get(url, {'at': first_snapshot.created_at.isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [
+            {'rank': 1, 'participant_team': self.participant_team.pk, 'team_name': self.participant_team.team_name}])
+
+    def test_leaderboard_neighbourhood_of_team(self):
+        self.create_leaderboard_data(self.participant_team, 80)
+        self.create_leaderboard_data(self.participant_team2, 60)
+
+        response = self.client.get(self.url, {'team': self.participant_team2.pk, 'around': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['rank'], 2)
+        self.assertEqual([item['rank'] for item in response.data['results']], [1, 2])
+
+    def test_leaderboard_neighbourhood_of_team_not_on_leaderboard(self):
+        response = self.client.get(self.url, {'team': self.participant_team2.pk})
+        self.assertEqual(response.data, {'error': 'Participant team is not on the leaderboard'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_leaderboard_search_by_team_name(self):
+        self.create_leaderboard_data(self.participant_team, 80)
+        self.create_leaderboard_data(self.participant_team2, 60)
+
+        response = self.client.get(self.url, {'q': 'another'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(item['submission__participant_team__team_name'], item['rank'])
+                          for item in response.data['results']],
+                         [(self.participant_team2.team_name, 2)])
+
+    def test_aggregate_leaderboard_ranks_weighted_mean_of_splits(self):
+        other_challenge_phase_split = ChallengePhaseSplit.objects.create(
+            dataset_split=DatasetSplit.objects.create(name='Other Dataset Split', codename='other-split'),
+            challenge_phase=self.challenge_phase,
+            leaderboard=self.leaderboard)
+        aggregate_challenge_phase_split = ChallengePhaseSplit.objects.create(
+            dataset_split=DatasetSplit.objects.create(name='Overall', codename='overall'),
+            challenge_phase=self.challenge_phase,
+            leaderboard=Leaderboard.objects.create(schema={
+                'labels': ['Overall'],
+                'default_order_by': 'overall',
+                'aggregate': {
+                    'splits': ['test-split', 'other-split'],
+                    'keys': 'score',
+                    'weights': {'test-split': 1, 'other-split': 3},
+                },
+            }))
+
+        for participant_team, scores in ((self.participant_team, (80, 40)), (self.participant_team2, (40, 60))):
+            submission = self.create_leaderboard_data(participant_team, scores[0]).submission
+            LeaderboardData.objects.create(
+                challenge_phase_split=other_challenge_phase_split,
+                submission=submission,
+                leaderboard=self.leaderboard,
+                result={'score': scores[1]})
+            update_aggregate_leaderboard_data(submission)
+            update_leaderboard_entries_for_submission(submission)
+
+        url = reverse_lazy('jobs:leaderboard',
+                           kwargs={'challenge_phase_split_id': aggregate_challenge_phase_split.pk})
+        response = self.client.get(url, {})
+        self.assertEqual([(item['submission__participant_team__team_name'], item['result'])
+                          for item in response.data['results']],
+                         [(self.participant_team2.team_name, [55.0]), (self.participant_team.team_name, [50.0])])
+
+    def test_aggregate_schema_change_keeps_evaluated_results(self):
+        leaderboard_data = self.create_leaderboard_data(self.participant_team, 80)
+        other_challenge_phase_split = ChallengePhaseSplit.objects.create(
+            dataset_split=DatasetSplit.objects.create(name='Other Dataset Split', codename='other-split'),
+            challenge_phase=self.challenge_phase,
+            leaderboard=Leaderboard.objects.create(schema={'labels': ['Score'], 'default_order_by': 'score'}))
+        LeaderboardData.objects.create(
+            challenge_phase_split=other_challenge_phase_split,
+            submission=leaderboard_data.submission,
+            leaderboard=other_challenge_phase_split.leaderboard,
+            result={'score': 40})
+
+        self.leaderboard.schema = {'labels': ['Score'], 'default_order_by': 'score',
+                                   'aggregate': {'splits': ['other-split']}}
+        self.leaderboard.save()
+        self.assertTrue(LeaderboardData.objects.filter(pk=leaderboard_data.pk).exists())
+        aggregate_leaderboard_data = LeaderboardData.objects.get(
+            challenge_phase_split=self.challenge_phase_split, is_aggregate=True)
+        self.assertEqual(aggregate_leaderboard_data.result['score'], 40.0)
+
+        self.leaderboard.schema = {'labels': ['Score'], 'default_order_by': 'score'}
+        self.leaderboard.save()
+        self.assertEqual(list(LeaderboardData.objects.filter(challenge_phase_split=self.challenge_phase_split)),
+                         [leaderboard_data])
+        leaderboard_entry = LeaderboardEntry.objects.get(challenge_phase_split=self.challenge_phase_split)
+        self.assertEqual(leaderboard_entry.leaderboard_data, leaderboard_data)
+
+    def test_aggregate_result_with_missing_split(self):
+        aggregate = {
+            'order_by': 'overall',
+            'splits': [('test-split', 'score', 1.0), ('other-split', 'score', 3.0)],
+            'missing_split_policy': 'exclude',
+        }
+        results = {'test-split': {'score': 80}}
+        self.assertIsNone(compute_aggregate_result(aggregate, results))
+
+        aggregate['missing_split_policy'] = 'zero'
+        self.assertEqual(compute_aggregate_result(aggregate, results)['overall'], 20.0)
+
+        aggregate['missing_split_policy'] = 'renormalize'
+        self.assertEqual(compute_aggregate_result(aggregate, results)['overall'], 80.0)
+
+    def test_leaderboard_when_challenge_phase_split_is_not_public(self):
+        self.challenge_phase_split.visibility = ChallengePhaseSplit.HOST
+        self.challenge_phase_split.save()
+
+        expected = {
+            'error': 'Sorry, leaderboard is not public yet for this Challenge Phase Split!'
+        }
+
+        response = self.client.get(self.url, {})
+        self.assertEqual(response.data, expected)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)